@@ -1,16 +1,36 @@
-from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
-from src.crews.crew import MathTutorCrew
+from flask import Flask, Response, render_template, request
+from flask_socketio import SocketIO
 import asyncio
+import atexit
 from dotenv import load_dotenv
+from contextlib import aclosing
 from functools import partial
 import warnings
 import logging
-import re
 import time
+import json
 from datetime import datetime
 import os
-from src.services.tts_service import generate_speech
+import socket
+from src.services import tts_service
+from src.services.tts_service import generate_speech, stream_speech
+from src.services.audio_pipeline import stream_ahead, synthesize_ahead
+from src.services.explanation_cache import create_explanation_cache
+from src.services.lesson_store import Lesson, create_lesson_store
+from src.services.lesson_log import create_lesson_log
+from src.services.async_runtime import AsyncRuntime
+from src.services.request_registry import RequestRegistry
+from src.services.local_solver import solve_locally
+from src.services import call_scheduler, http_clients, metrics
+from src.models.math_models import MathExplanation
+from src.utils.latex_formatter import format_board_latex, board_hash
+from src.utils.board_diff import BoardDiffer
+from src.utils.lazy import Lazy
+from src.utils.query_classifier import COMPLEX, classify_query
+from src.config.settings import (
+    STREAMING_CONFIG, TTS_CONFIG, EXPLANATION_CACHE_CONFIG, RUNTIME_CONFIG, BOARD_DIFF_CONFIG, METRICS_CONFIG,
+    LESSON_STORE_CONFIG, LESSON_LOG_CONFIG, STARTUP_CONFIG, CALL_SCHEDULER_CONFIG
+)
 
 # Configure logging
 logging.basicConfig(
@@ -40,178 +60,444 @@ socketio = SocketIO(app,
                    max_http_buffer_size=1e8,
                    binary=True)
 
-# Initialize the math teaching crew
-math_crew = MathTutorCrew()
+def build_crew_factory():
+    # crewai (and litellm behind it) take seconds to import, so they are
+    # loaded on first use or by the post-startup warm-up, never at import
+    from src.crews.crew import CrewFactory
+    return CrewFactory()
+
+# Build the math teaching crews once; each request runs its own copy
+math_crew = Lazy(build_crew_factory, 'crew factory')
+
+# Explanations already generated for equivalent prompts
+explanation_cache = create_explanation_cache(EXPLANATION_CACHE_CONFIG)
+
+# Lessons precomputed by `run_crew.py batch`, served without LLM or TTS calls
+lesson_store = create_lesson_store(LESSON_STORE_CONFIG)
+
+# Every lesson the app generated, replayable without LLM or TTS calls
+lesson_log = create_lesson_log(LESSON_LOG_CONFIG)
+
+# Shared event loop that runs every socket handler coroutine
+runtime = AsyncRuntime(
+    max_concurrent=RUNTIME_CONFIG['max_concurrent_requests'],
+    executor_workers=RUNTIME_CONFIG['executor_workers']
+)
+atexit.register(runtime.shutdown)
+
+# Track the active request of each Socket.IO session
+active_requests = RequestRegistry()
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness check; answers even while the crew is still being initialized."""
+    return {'status': 'ok', 'crewReady': math_crew.ready, 'httpPools': http_clients.pool_stats()}
 
-# Track active requests
-active_requests = {}
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request, stage latency and cache metrics in the Prometheus text format."""
+    if not METRICS_CONFIG['enabled']:
+        return Response('metrics disabled\n', status=404, mimetype='text/plain')
+    metrics.RUNTIME_ACTIVE.set(runtime.active)
+    http_clients.update_pool_metrics()
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
-def format_latex(latex):
-    r"""
-    Format LaTeX content for proper display in MathJax.
+def request_handler(func):
     """
-    if not latex:
-        return latex
-    
-    logger.debug("=== LaTeX Formatting Debug ===")
-    logger.debug(f"Original LaTeX:\n{latex}")
-    
-    # Remove any existing math delimiters using precise regex
-    latex = latex.strip()
-    
-    # First preserve LaTeX commands by temporarily replacing them
-    commands = {}
-    def preserve_command(match):
-        cmd = match.group(0)
-        token = f"CMD{len(commands)}"
-        commands[token] = cmd
-        return token
-    latex = re.sub(r'\\[a-zA-Z]+(?:\{[^}]*\})*', preserve_command, latex)
-    
-    # Normalize backslashes for line breaks
-    latex = re.sub(r'\\{2,}', r'\\\\ ', latex)
-    
-    # Restore preserved LaTeX commands
-    for token, cmd in commands.items():
-        latex = latex.replace(token, cmd)
-    
-    # Ensure proper spacing in text mode
-    latex = re.sub(r'(^|\\\\|\s|[^\\])text{', r'\1\\text{', latex)
-    latex = re.sub(r'}text{', '} \\text{', latex)
+    Run an async socket handler that starts a request on the shared
+    runtime loop. The request is registered for the session (superseding
+    its previous one) before it waits for a runtime slot, so a request
+    still queued for a slot can be superseded or cancelled on disconnect
+    too. The handler receives the ActiveRequest and the event data, since
+    the Flask request context is not available on the runtime thread.
+    """
+    def wrapper(data=None):
+        data = data or {}
+        request_id = data.get('requestId', str(time.time()))
+        active = active_requests.start(request.sid, request_id, data.get('prompt') or data.get('lessonId') or '')
+        active.attach(runtime.submit(func(active, data)))
+    return wrapper
+
+def emit_step(active, step, step_number, audio_data, formatted_math=None, audio_stream=False):
+    """
+    Format a step's math (unless already formatted) and emit it to the requesting session.
+    With `audio_stream`, the step's audio follows in audio_chunk events.
+    """
+    request_id = active.request_id
+    logger.info(f"[Request {request_id}] Processing step {step_number}/{active.total_steps or '?'}")
+    logger.debug(f"[Request {request_id}] Step {step_number} math content:\n{step.math}")
     
-    # Remove any existing math delimiters
-    latex = re.sub(r'(^|[^\\])\$\$', '', latex)
-    latex = re.sub(r'^\\\[|\\\]$', '', latex)
-    latex = latex.strip()
-    logger.debug(f"After delimiter removal:\n{latex}")
+    if formatted_math is None:
+        with active.timer.span('format_latex'):
+            formatted_math = format_board_latex(step.math)
+    logger.debug(f"[Request {request_id}] Formatted math:\n{formatted_math}")
     
-    # Split into lines and wrap in align* environment
-    lines = [line.strip() for line in latex.split('\\\\')]
-    processed_lines = []
-    for i, line in enumerate(lines):
-        if line:
-            if i > 0 and not line.startswith('&'):
-                line = '& ' + line
-            processed_lines.append(line)
+    active.step_count = step_number
     
-    latex = '\\begin{align*} ' + ' \\\\ '.join(processed_lines) + ' \\end{align*}'
-    logger.debug(f"After alignment processing:\n{latex}")
+    payload = {
+        'natural': step.natural,
+        'requestId': request_id,
+        'stepNumber': step_number,
+        'totalSteps': active.total_steps,
+        'audio': audio_data,
+        'hasAudio': audio_data is not None or audio_stream,
+        'audioLength': len(audio_data) if audio_data else 0,
+        'boardHash': board_hash(formatted_math) if formatted_math else None
+    }
+    if audio_stream:
+        payload['audioStream'] = True
+    if active.board is not None:
+        # Either the full board or a line patch against the previous step's board
+        payload.update(active.board.encode(formatted_math))
+    else:
+        payload['math'] = formatted_math
     
-    # Ensure color commands are properly formatted
-    latex = re.sub(r'\\color{([^}]+)}([^{])', r'\\color{\1}{\2}', latex)
+    with active.timer.span('emit'):
+        socketio.emit('display_step', payload, to=active.sid)
+    return formatted_math
+
+async def emit_audio_chunks(active, step_number, chunks):
+    """Send a step's audio chunks as they arrive; returns the whole audio."""
+    parts = []
+    async for data in chunks:
+        with active.timer.span('emit'):
+            socketio.emit('audio_chunk', {
+                'requestId': active.request_id,
+                'stepNumber': step_number,
+                'index': len(parts),
+                'audio': data,
+                'last': False
+            }, to=active.sid)
+        parts.append(data)
+    socketio.emit('audio_chunk', {
+        'requestId': active.request_id,
+        'stepNumber': step_number,
+        'index': len(parts),
+        'audio': None,
+        'last': True
+    }, to=active.sid)
+    return b''.join(parts) or None
+
+def emit_queue_position(sid, request_id, pool, position):
+    """Tell a client waiting for an OpenAI call slot its place in line (0 once admitted)."""
+    socketio.emit('queue_position', {
+        'requestId': request_id,
+        'pool': pool,
+        'position': position
+    }, to=sid)
+
+def emit_error(sid, request_id, error):
+    socketio.emit('display_step', {
+        'natural': f'Error processing math request: {str(error)}',
+        'math': r'\[\begin{align*} \text{Error processing math request} \end{align*}\]',
+        'requestId': request_id,
+        'error': True,
+        'hasAudio': False,
+        'audioLength': 0
+    }, to=sid)
+
+async def explanation_steps(active, use_cache=True):
+    """Yield the explanation steps for a request as they become available."""
+    request_id, prompt = active.request_id, active.prompt
+    # Common problem types are solved deterministically, without the crew
+    local_start = time.perf_counter()
+    with active.timer.span('local_solver'):
+        solution = solve_locally(prompt)
+    metrics.LOCAL_SOLVER.inc(result='fallback' if solution is None else solution.problem_class)
+    if solution is not None:
+        metrics.LOCAL_SOLVE_SECONDS.observe(time.perf_counter() - local_start, problem_class=solution.problem_class)
+        logger.info(f"[Request {request_id}] Solved locally as {solution.problem_class} "
+                    f"({len(solution.explanation.steps)} steps)")
+        active.total_steps = len(solution.explanation.steps)
+        for step in solution.explanation.steps:
+            yield step
+        return
+
+    use_cache = use_cache and explanation_cache is not None
+    if use_cache:
+        cached = await asyncio.get_running_loop().run_in_executor(None, explanation_cache.get, prompt)
+        metrics.CACHE_LOOKUPS.inc(cache='explanation', result='miss' if cached is None else 'hit')
+        if cached is not None:
+            logger.info(f"[Request {request_id}] Explanation cache hit ({len(cached.steps)} steps)")
+            active.total_steps = len(cached.steps)
+            for step in cached.steps:
+                yield step
+            return
     
-    # Add proper spacing around text mode content
-    latex = re.sub(r'([^{\\])\\text{', r'\1 \\text{', latex)
-    latex = re.sub(r'}\\text{', '} \\text{', latex)
+    # Simple queries skip the draft task and are explained in a single LLM call
+    route = classify_query(prompt)
+    logger.info(f"[Request {request_id}] Routed to the {route.complexity} pipeline ({route.reason})")
+    metrics.QUERY_ROUTES.inc(route=route.complexity)
+    generation_start = time.perf_counter()
+
+    inputs = {'user_query': prompt}
+    if STREAMING_CONFIG['enabled']:
+        # Steps arrive one by one while the crew is still generating; each of its
+        # LLM calls is admitted by the shared scheduler separately
+        steps = []
+
+        def steps_known(total):
+            active.total_steps = total
+        crew_factory = await math_crew.aget()
+        generated = crew_factory.stream_explanation(inputs=inputs, timer=active.timer, simple=route.is_simple,
+                                                    on_total_steps=steps_known)
+        async with aclosing(generated):
+            async for step in generated:
+                steps.append(step)
+                yield step
+        explanation = MathExplanation(problem=prompt, steps=steps)
+        # Also covers a completion cut off before its steps array was closed
+        active.total_steps = len(steps)
+    else:
+        # Get the crew result with Pydantic model, timing each task as it finishes. Once
+        # the request is cancelled or superseded, the crew's thread skips its remaining tasks
+        task_start = time.perf_counter()
+        def on_task_done(output):
+            nonlocal task_start
+            active.timer.record(getattr(output, 'name', None) or 'crew_task', task_start)
+            task_start = time.perf_counter()
+        crew_factory = await math_crew.aget()
+        # Admitted by the shared scheduler, which budgets each run at the route's estimated tokens
+        result = await call_scheduler.scheduler.call(
+            'llm', partial(crew_factory.kickoff, inputs, simple=route.is_simple, task_callback=on_task_done,
+                           should_stop=lambda: not active_requests.is_current(active)),
+            cost=CALL_SCHEDULER_CONFIG['crew_tokens'][route.complexity]
+        )
+        usage = getattr(result, 'token_usage', None)
+        if usage is not None:
+            metrics.record_token_usage(usage.prompt_tokens, usage.completion_tokens)
+        
+        # Get the explanation from the Pydantic model
+        explanation = result.pydantic
+        active.total_steps = len(explanation.steps)
+        logger.info(f"[Request {request_id}] Received explanation with {active.total_steps} steps")
+        for step in explanation.steps:
+            yield step
     
-    final_latex = f'\\[{latex}\\]'
-    logger.debug(f"Final formatted LaTeX:\n{final_latex}")
+    record_generation(request_id, route, time.perf_counter() - generation_start)
+    if use_cache:
+        await asyncio.get_running_loop().run_in_executor(None, explanation_cache.set, prompt, explanation)
+
+def record_generation(request_id, route, seconds):
+    """Observe generation time per route and estimate what the fast path saved."""
+    metrics.GENERATION_SECONDS.observe(seconds, route=route.complexity)
+    if not route.is_simple:
+        return
+    complex_mean = metrics.GENERATION_SECONDS.mean(route=COMPLEX)
+    if complex_mean is not None and complex_mean > seconds:
+        metrics.FAST_PATH_SAVED.inc(complex_mean - seconds)
+        logger.info(f"[Request {request_id}] Fast path generated in {seconds:.2f}s, "
+                    f"about {complex_mean - seconds:.2f}s under the complex route average")
+
+async def stored_lesson_steps(lesson):
+    for step in lesson.steps:
+        yield step
+
+async def emit_explanation(active, use_cache=True):
+    """
+    Synthesize audio ahead of emission and send each step once its audio is
+    ready, or (with chunked TTS) once its audio starts, streaming the rest.
+    """
+    # The lesson store and explanation cache read from disk, so lookups run
+    # on the executor rather than on the runtime loop
+    lesson = None
+    if use_cache and lesson_store is not None:
+        lesson = await asyncio.get_running_loop().run_in_executor(None, lesson_store.get, active.prompt)
+        metrics.CACHE_LOOKUPS.inc(cache='lesson', result='miss' if lesson is None else 'hit')
+
+    async def synthesize(text):
+        # Stored lessons carry their audio; fall back to TTS for anything missing
+        audio = lesson.audio_for(text) if lesson is not None else None
+        if audio is not None:
+            return audio
+        with active.timer.span('tts'):
+            return await generate_speech(text)
+
+    def speak(text):
+        # Times only the synthesis, not the waits for the step to be played
+        return stream_speech(text, timer=active.timer)
+
+    if lesson is not None:
+        logger.info(f"[Request {active.request_id}] Serving stored lesson ({len(lesson.steps)} steps)")
+        active.total_steps = len(lesson.steps)
+        steps = stored_lesson_steps(lesson)
+    else:
+        steps = explanation_steps(active, use_cache)
+
+    # Stored lessons already have whole audio per step
+    chunked = TTS_CONFIG['chunked'] and lesson is None
+    if chunked:
+        pipeline = stream_ahead(
+            steps,
+            speak,
+            lookahead=TTS_CONFIG['lookahead'],
+            buffer_size=TTS_CONFIG['buffer_size'],
+            chunk_buffer=TTS_CONFIG['chunk_buffer']
+        )
+    else:
+        pipeline = synthesize_ahead(
+            steps,
+            synthesize,
+            lookahead=TTS_CONFIG['lookahead'],
+            buffer_size=TTS_CONFIG['buffer_size']
+        )
+    # Freshly generated lessons are written to the lesson log once complete
+    recorded = [] if lesson is None and lesson_log is not None else None
+    step_number = 0
+    async with aclosing(pipeline):
+        async for step, audio in pipeline:
+            step_number += 1
+            if step_number == 1:
+                active.timer.record('first_step', active.timer.origin)
+                logger.info(f"[Request {active.request_id}] First step ready after {active.elapsed():.2f}s")
+            
+            if chunked:
+                formatted_math = emit_step(active, step, step_number, None, audio_stream=audio is not None)
+                audio_data = await emit_audio_chunks(active, step_number, audio) if audio is not None else None
+            else:
+                audio_data = audio
+                formatted_math = emit_step(active, step, step_number, audio_data)
+            if recorded is not None:
+                recorded.append((step, formatted_math, audio_data, round(active.elapsed(), 3)))
     
-    return final_latex
+    if step_number == 0:
+        raise ValueError("No explanation steps were generated")
+    if recorded:
+        await record_lesson(active, recorded)
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+async def record_lesson(active, recorded):
+    """Append a completed lesson to the lesson log and tell the client its id."""
+    steps, formatted, audio, emitted_at = (list(column) for column in zip(*recorded))
+    timings = {'total_seconds': round(active.elapsed(), 3), 'step_seconds': emitted_at,
+               'stages': active.timer.summary()}
+    try:
+        lesson_id = await asyncio.get_running_loop().run_in_executor(
+            None, lesson_log.record, Lesson(active.prompt, steps, formatted, audio), timings
+        )
+    except Exception:
+        # The lesson was already delivered; only its replay is lost
+        logger.warning(f"[Request {active.request_id}] Could not record the lesson", exc_info=True)
+        metrics.ERRORS.inc(stage='lesson_log')
+        return
+    logger.info(f"[Request {active.request_id}] Recorded lesson {lesson_id}")
+    socketio.emit('lesson_recorded', {'requestId': active.request_id, 'lessonId': lesson_id}, to=active.sid)
 
-def async_handler(func):
-    def wrapper(*args, **kwargs):
-        return asyncio.run(func(*args, **kwargs))
-    return wrapper
+async def replay_logged_lesson(active, lesson_id=None, prompt=None, board_diffs=False):
+    """Re-emit a logged lesson, by id or by prompt, straight from storage."""
+    sid, request_id = active.sid, active.request_id
+    active.board = BoardDiffer() if board_diffs else None
+    try:
+        lesson = None
+        if lesson_log is not None:
+            find = partial(lesson_log.get, lesson_id) if lesson_id else partial(lesson_log.latest, prompt or '')
+            lesson = await asyncio.get_running_loop().run_in_executor(None, find)
+        metrics.LESSON_REPLAYS.inc(result='miss' if lesson is None else 'hit')
+        if lesson is None:
+            raise LookupError(f"No recorded lesson for {'id ' + lesson_id if lesson_id else repr(prompt)}")
+        logger.info(f"[Request {request_id}] Replaying lesson {lesson.lesson_id} ({len(lesson.steps)} steps)")
+        active.total_steps = len(lesson.steps)
+        for step_number, (step, formatted_math, audio_data) in enumerate(
+                zip(lesson.steps, lesson.formatted, lesson.audio), 1):
+            emit_step(active, step, step_number, audio_data, formatted_math=formatted_math or None)
+            # Lets a superseding request cancel a long replay between steps
+            await asyncio.sleep(0)
+    except asyncio.CancelledError:
+        logger.info(f"[Request {request_id}] Replay cancelled after {active.step_count} steps")
+        raise
+    except Exception as e:
+        logger.warning(f"[Request {request_id}] Replay failed: {str(e)}")
+        emit_error(sid, request_id, e)
+    finally:
+        active_requests.finish(active)
 
 @socketio.on('request_math')
-@async_handler
-async def handle_math_request(data):
+@request_handler
+async def handle_math_request(active, data):
     """Handle incoming math requests using the math teaching crew."""
+    sid, request_id, prompt = active.sid, active.request_id, active.prompt
+    bypass_cache = bool(data.get('bypassCache', False))
+    board_diffs = bool(data.get('boardDiffs', False)) and BOARD_DIFF_CONFIG['enabled']
+    
+    logger.info(f"[Request {request_id}] New math request received: {prompt}")
+    
+    # OpenAI calls made for this request queue fairly with other clients' and report their place in line
+    call_scheduler.set_caller(sid, partial(emit_queue_position, sid, request_id))
+    active.board = BoardDiffer() if board_diffs else None
+    metrics.REQUESTS_IN_FLIGHT.inc()
+    outcome = 'error'
     try:
-        prompt = data.get('prompt', '')
-        request_id = data.get('requestId', str(time.time()))
-        
-        logger.info(f"[Request {request_id}] New math request received: {prompt}")
-        logger.info(f"[Request {request_id}] Active requests before: {list(active_requests.keys())}")
-        
-        # Cancel any existing request from this client
-        for old_request_id in list(active_requests.keys()):
-            logger.info(f"[Request {request_id}] Cancelling old request: {old_request_id}")
-            del active_requests[old_request_id]
-        
-        # Track request start time
-        active_requests[request_id] = {
-            'start_time': datetime.now(),
-            'prompt': prompt,
-            'step_count': 0
-        }
-        
-        # Get the crew result with Pydantic model
         logger.info(f"[Request {request_id}] Starting crew execution")
-        result = await math_crew.crew().kickoff_async(inputs={'user_query': prompt})
+        await emit_explanation(active, use_cache=not bypass_cache)
         
-        # Get the explanation from the Pydantic model
-        explanation = result.pydantic
-        total_steps = len(explanation.steps)
-        logger.info(f"[Request {request_id}] Received explanation with {total_steps} steps")
-        
-        # Process all steps in parallel for TTS
-        tts_tasks = []
-        for step in explanation.steps:
-            if step.natural:
-                tts_tasks.append(generate_speech(step.natural))
-            
-        audio_results = await asyncio.gather(*tts_tasks)
-        
-        # Send each step with its audio
-        for i, (step, audio_data) in enumerate(zip(explanation.steps, audio_results), 1):
-            if request_id not in active_requests:
-                logger.info(f"[Request {request_id}] Request cancelled, stopping step emission")
-                break
-                
-            logger.info(f"[Request {request_id}] Processing step {i}/{total_steps}")
-            logger.debug(f"[Request {request_id}] Step {i} math content:\n{step.math}")
-            
-            formatted_math = format_latex(step.math)
-            logger.debug(f"[Request {request_id}] Formatted math:\n{formatted_math}")
-            
-            active_requests[request_id]['step_count'] = i
-            
-            emit('display_step', {
-                'natural': step.natural,
-                'math': formatted_math,
-                'requestId': request_id,
-                'stepNumber': i,
-                'totalSteps': total_steps,
-                'audio': audio_data,
-                'hasAudio': audio_data is not None,
-                'audioLength': len(audio_data) if audio_data else 0
-            })
-            
-            # Small delay between steps for readability
-            await asyncio.sleep(0.5)  # Reduced delay to 0.5s for better responsiveness
-            
         # Log completion
-        if request_id in active_requests:
-            duration = datetime.now() - active_requests[request_id]['start_time']
-            logger.info(f"[Request {request_id}] Completed in {duration.total_seconds():.2f}s")
-            logger.info(f"[Request {request_id}] Emitted {active_requests[request_id]['step_count']} steps")
-            del active_requests[request_id]
-            
+        logger.info(f"[Request {request_id}] Completed in {active.elapsed():.2f}s")
+        logger.info(f"[Request {request_id}] Emitted {active.step_count} steps")
+        outcome = 'completed'
+    
+    except asyncio.CancelledError:
+        outcome = 'cancelled'
+        logger.info(f"[Request {request_id}] Cancelled after {active.elapsed():.2f}s and {active.step_count} steps")
+        raise
+    
     except Exception as e:
         logger.error(f"[Request {request_id}] Error processing request:", exc_info=True)
-        emit('display_step', {
-            'natural': f'Error processing math request: {str(e)}',
-            'math': r'\[\begin{align*} \text{Error processing math request} \end{align*}\]',
-            'requestId': request_id,
-            'error': True,
-            'hasAudio': False,
-            'audioLength': 0
-        })
-        if request_id in active_requests:
-            del active_requests[request_id]
+        metrics.ERRORS.inc(stage='request')
+        emit_error(sid, request_id, e)
+    
+    finally:
+        active_requests.finish(active)
+        active.timer.record('request', active.timer.origin)
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        metrics.REQUESTS.inc(outcome=outcome)
+        logger.info(f"[Request {request_id}] Stage timings ({outcome}): {json.dumps(active.timer.summary())}")
+        logger.debug(f"[Request {request_id}] Spans: {json.dumps([span.as_dict() for span in active.timer.spans])}")
+
+@socketio.on('replay_lesson')
+@request_handler
+async def handle_replay_request(active, data):
+    """Replay a logged lesson (by lessonId, or the latest for a prompt) without LLM or TTS calls."""
+    board_diffs = bool(data.get('boardDiffs', False)) and BOARD_DIFF_CONFIG['enabled']
+    logger.info(f"[Request {active.request_id}] Replay requested: {data.get('lessonId') or data.get('prompt')}")
+    await replay_logged_lesson(active, lesson_id=data.get('lessonId'), prompt=data.get('prompt'),
+                               board_diffs=board_diffs)
+
+@socketio.on('board_resync')
+def handle_board_resync(data):
+    """The client could not apply a board patch; send the request's next board in full."""
+    active = active_requests.get(request.sid)
+    if active is None or active.request_id != (data or {}).get('requestId') or active.board is None:
+        return
+    logger.info(f"[Request {active.request_id}] Client lost the board, sending the next one in full")
+    # The differ is used on the runtime loop
+    runtime.loop.call_soon_threadsafe(active.board.reset)
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    """Clean up when a client disconnects"""
-    logger.info("Client disconnected, cleaning up active requests")
-    active_requests.clear()
+    """Cancel the disconnected client's in-flight request"""
+    logger.info(f"Client {request.sid} disconnected, cancelling its active request")
+    active_requests.cancel_session(request.sid)
+
+def warm_up_when_listening(host, port):
+    """Once the server accepts connections, initialize what the first request needs."""
+    deadline = time.monotonic() + STARTUP_CONFIG['listen_timeout_seconds']
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                break
+        except OSError:
+            time.sleep(0.05)
+    runtime.start()
+    math_crew.warm()
+    tts_service.client.warm()
 
 if __name__ == '__main__':
     logger.info("Starting Math Learning Application")
-    socketio.run(app, host='127.0.0.1', port=8000, debug=True)
+    host, port, debug = '127.0.0.1', 8000, True
+    # With the debug reloader, only the child process that serves requests warms up
+    if STARTUP_CONFIG['warm_up'] and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        socketio.start_background_task(warm_up_when_listening, host, port)
+    socketio.run(app, host=host, port=port, debug=debug)
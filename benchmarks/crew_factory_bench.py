@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Per-request crew construction overhead, before and after CrewFactory.
+
+    python benchmarks/crew_factory_bench.py [--iterations 50]
+
+Compares building a MathTutorCrew and its crew for every request (what the
+CLI scripts did) with copying the factory's prebuilt templates (what the
+web app does now). Only construction is timed; nothing is kicked off, so no
+API calls are made, although crewai still needs OPENAI_API_KEY to be set.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root directory to Python path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark-placeholder')
+
+from src.crews.crew import CrewFactory, MathTutorCrew
+
+
+def measure(build, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    factory = CrewFactory()
+    startup = (time.perf_counter() - start) * 1000
+
+    cases = [
+        ('MathTutorCrew().crew()', lambda: MathTutorCrew().crew()),
+        ('MathTutorCrew().draft_crew()', lambda: MathTutorCrew().draft_crew()),
+        ('CrewFactory.crew()', lambda: factory.crew()),
+        ('CrewFactory.draft_crew()', lambda: factory.draft_crew()),
+    ]
+    # Warm up imports and lazily built state
+    for _, build in cases:
+        build()
+
+    print(f"CrewFactory startup: {startup:.2f} ms (once per process)")
+    print(f"{'per request':<30} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9}")
+    results = {}
+    for name, build in cases:
+        timings = sorted(measure(build, args.iterations))
+        results[name] = statistics.mean(timings)
+        print(f"{name:<30} {results[name]:>9.2f} {timings[len(timings) // 2]:>9.2f} "
+              f"{timings[int(len(timings) * 0.9)]:>9.2f}")
+
+    saved = results['MathTutorCrew().crew()'] - results['CrewFactory.crew()']
+    print(f"Saved per full-crew request: {saved:.2f} ms "
+          f"({results['MathTutorCrew().crew()'] / results['CrewFactory.crew()']:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
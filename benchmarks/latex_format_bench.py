@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Golden-corpus check and micro-benchmark for the whiteboard LaTeX formatter.
+
+    python benchmarks/latex_format_bench.py                 # verify + benchmark
+    python benchmarks/latex_format_bench.py --update-golden # rebuild corpus
+
+The corpus in data/latex_format_golden.json holds inputs together with the
+output of the original app.format_latex implementation (kept below as
+legacy_format_latex), and format_board_latex must reproduce it exactly.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# Add the project root directory to Python path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.latex_formatter import format_board_latex, _format_board
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'latex_format_golden.json')
+
+
+def legacy_format_latex(latex):
+    """
+    The format_latex implementation formerly in app.py, minus its logging.
+    Preserved tokens are restored longest-first: the original restored CMD1
+    before CMD10 and so corrupted any board with more than ten commands.
+    """
+    if not latex:
+        return latex
+    latex = latex.strip()
+    commands = {}
+    def preserve_command(match):
+        cmd = match.group(0)
+        token = f"CMD{len(commands)}"
+        commands[token] = cmd
+        return token
+    latex = re.sub(r'\\[a-zA-Z]+(?:\{[^}]*\})*', preserve_command, latex)
+    latex = re.sub(r'\\{2,}', r'\\\\ ', latex)
+    for token, cmd in reversed(list(commands.items())):
+        latex = latex.replace(token, cmd)
+    latex = re.sub(r'(^|\\\\|\s|[^\\])text{', r'\1\\text{', latex)
+    latex = re.sub(r'}text{', '} \\text{', latex)
+    latex = re.sub(r'(^|[^\\])\$\$', '', latex)
+    latex = re.sub(r'^\\\[|\\\]$', '', latex)
+    latex = latex.strip()
+    lines = [line.strip() for line in latex.split('\\\\')]
+    processed_lines = []
+    for i, line in enumerate(lines):
+        if line:
+            if i > 0 and not line.startswith('&'):
+                line = '& ' + line
+            processed_lines.append(line)
+    latex = '\\begin{align*} ' + ' \\\\ '.join(processed_lines) + ' \\end{align*}'
+    latex = re.sub(r'\\color{([^}]+)}([^{])', r'\\color{\1}{\2}', latex)
+    latex = re.sub(r'([^{\\])\\text{', r'\1 \\text{', latex)
+    latex = re.sub(r'}\\text{', '} \\text{', latex)
+    return f'\\[{latex}\\]'
+
+
+def progressive_boards(n_lines):
+    """Boards of a long derivation, one per step, each repeating the previous lines."""
+    lines = []
+    for i in range(n_lines):
+        lines.append(
+            f"\\text{{Step {i + 1}: }} &\\color{{blue}}{{{i + 2}x}} + \\frac{{{i + 1}}}{{{i + 3}}} "
+            f"= \\sqrt{{{i + 4}}} \\cdot \\underbrace{{y_{{{i}}}}}_{{\\text{{term}}}}"
+        )
+        yield ' \\\\ '.join(lines)
+
+
+def build_corpus():
+    inputs = [
+        r"ax^2 + bx + c = 0",
+        r"\color{blue}{a}x^2 + bx + c = 0",
+        r"\underbrace{\color{blue}{a}x^2}_{\text{first term}} + \underbrace{bx}_{\text{second term}} + \underbrace{c}_{\text{third term}} = 0",
+        r"x^2 + 5x + 6 = 0 \\ \text{Need: product = 6, sum = 5}",
+        r"x^2 + 5x + 6 = 0 \\ \text{Factors of 6:} \\ 1 \times 6 = 6, \text{ sum } = 7 \\ \color{blue}{2 \times 3 = 6, \text{ sum } = 5} \checkmark",
+        r"3x + \color{red}{15} = 6 \\ \color{blue}{\downarrow} \text{ subtract 15} \\ 3x = -9",
+        r"\text{The least common denominator is: } \color{blue}{6} \\ \frac{1}{2} = \frac{1 \cdot \color{blue}{3}}{2 \cdot \color{blue}{3}} = \frac{\color{blue}{3}}{\color{blue}{6}}",
+        r"x^2 + 5x + 6 = 0 \\ \\ \text{Factor into: } (x + 2)(x + 3) = 0 \\ \\ \text{Solutions: } x = -2 \text{ or } x = -3",
+        r"\text{Original equation: } &x^2 + 5x + 6 = 0 \\ \text{Factored form: } &(x + 2)(x + 3) = 0 \\ \text{Solutions: } &x = -2 \text{ or } x = -3",
+        r"$$x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}$$",
+        r"\[ a^2 + b^2 = c^2 \]",
+        r"\\[ 3^2 + 4^2 = 5^2 \\]",
+        r"2x + 3 = 7 \\\\ 2x = 4 \\\\\\ x = 2",
+        r"2x + 3 = 7 \\text{subtract 3}",
+        r"text{Answer: } x = 2",
+        r"x = 2 }text{ done}",
+        r"\color{red}x + \color{blue} y",
+        r"\boxed{x = 2} \\ \fbox{y = 3}",
+        r"\frac{\sqrt{2}}{3} \\ \frac{1}{\sqrt{x}}",
+        r"  \\  \\ x  \\  ",
+        r"a \rightarrow b \\ & c \rightarrow d",
+        r"\text{Area} = \pi r^2 \\ = \pi \cdot 3^2 \\ = 9\pi",
+    ]
+    inputs.extend(progressive_boards(30))
+    return [{'input': text, 'expected': legacy_format_latex(text)} for text in inputs]
+
+
+def check_golden(corpus):
+    failures = [case for case in corpus if format_board_latex(case['input']) != case['expected']]
+    for case in failures[:5]:
+        print(f"MISMATCH for input: {case['input']!r}")
+        print(f"  expected: {case['expected']!r}")
+        print(f"  got:      {format_board_latex(case['input'])!r}")
+    print(f"Golden corpus: {len(corpus) - len(failures)}/{len(corpus)} cases identical")
+    return not failures
+
+
+def throughput(func, boards, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            func(board)
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(len(board) for board in boards) * repeat
+    return len(boards) * repeat / elapsed, total_bytes / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update-golden', action='store_true', help='rebuild the golden corpus from the legacy implementation')
+    parser.add_argument('--lines', type=int, default=40, help='lines in the longest benchmark board')
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the benchmark boards')
+    args = parser.parse_args()
+
+    if args.update_golden:
+        corpus = build_corpus()
+        with open(GOLDEN_PATH, 'w') as f:
+            json.dump(corpus, f, indent=1)
+        print(f"Wrote {len(corpus)} cases to {GOLDEN_PATH}")
+        return
+
+    with open(GOLDEN_PATH) as f:
+        if not check_golden(json.load(f)):
+            sys.exit(1)
+
+    # A lesson re-sends the growing board with every step
+    boards = list(progressive_boards(args.lines))
+    print(f"\nBenchmark: {len(boards)} progressive align* boards (up to {len(boards[-1])} chars), x{args.repeat}")
+    for name, func in [
+        ('legacy format_latex', legacy_format_latex),
+        ('format_board_latex (uncached)', _format_board),
+        ('format_board_latex (memoized)', format_board_latex),
+    ]:
+        boards_per_sec, mb_per_sec = throughput(func, boards, args.repeat)
+        print(f"  {name:32s} {boards_per_sec:10.0f} boards/s {mb_per_sec:8.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
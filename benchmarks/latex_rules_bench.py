@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Correctness corpus and throughput benchmark for the LaTeX rewrite rules.
+
+    python benchmarks/latex_rules_bench.py                 # verify + benchmark
+    python benchmarks/latex_rules_bench.py --update-corpus # re-record outputs
+
+data/latex_rules_corpus.json pairs inputs with the reviewed outputs of
+fix_common_latex_issues and natural_text_to_latex. The benchmark compares
+the compiled rule sets against the previous one-re.sub-per-rule loops.
+
+natural_text_to_latex on the long line stays around legacy speed: its
+rule set is recursive, so every capture (and "square root of" captures up
+to the next colon) is rescanned for nested phrases, which the legacy loop
+never converted. Short inputs, the common case, are several times faster.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# Add the project root directory to Python path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.latex_utils import fix_common_latex_issues, natural_text_to_latex
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'latex_rules_corpus.json')
+
+FUNCTIONS = {
+    'fix_common_latex_issues': fix_common_latex_issues,
+    'natural_text_to_latex': natural_text_to_latex,
+}
+
+CORPUS_INPUTS = {
+    'fix_common_latex_issues': [
+        r"2x + 3 = 7",
+        r"x^12 + y_10 = z^2",
+        r"sqrt2 + sqrt{x}",
+        r"\sqrt{x} + \sqrt 9 + \sqrt[3]{8}",
+        r"\frac12 + \frac 3{4} + \frac{5}{6}",
+        r"sum x + int f + prod g",
+        r"\sum_{i=1}^{10} i + \int_0^1 x dx",
+        r"integral and summary are words",
+        r"3\alpha + 4 \beta",
+        r"\color{blue}{2x} = 10",
+        r"\boxed x = 2",
+        r"x^2y + 10 z",
+        r"",
+    ],
+    'natural_text_to_latex': [
+        r"square root of 16",
+        r"square root of pi: and more",
+        r"square root of fraction 1/4",
+        r"fraction a/b plus fraction 3/4",
+        r"sum from i=1 to n: of i",
+        r"integral from 0 to infinity",
+        r"Integral From 0 To 1",
+        r"alpha plus beta equals theta",
+        r"Pi is about three",
+        r"the spider saw an alphabet",
+        r"x to the 5th power",
+        r"a subscript 2",
+        r"no math here",
+    ],
+}
+
+
+def legacy_fix_common_latex_issues(latex):
+    """
+    The previous sequential implementation. Its first replacement used a bad
+    escape (\\c) and its number rule referenced a missing group, so every
+    call raised re.error; those two templates are repaired here so it can
+    be timed.
+    """
+    fixes = [
+        (r'([0-9]) *([a-zA-Z])', r'\1\\cdot\2'),
+        (r'\\frac([^{])', r'\\frac{\1}'),
+        (r'([^\\])(sqrt)', r'\1\\sqrt'),
+        (r'([^_\^])(\d+)', r'\1{\2}'),
+        (r'([^\\])(sum|int|prod)', r'\1\\\2'),
+        (r'\\([a-zA-Z]+)([^{])', r'\\\1{\2}')
+    ]
+    result = latex
+    for pattern, replacement in fixes:
+        result = re.sub(pattern, replacement, result)
+    return result
+
+
+def legacy_natural_text_to_latex(text):
+    """The previous sequential implementation, unchanged."""
+    math_patterns = {
+        r'square root of ([^:]+)': r'\\sqrt{\1}',
+        r'fraction (\w+)/(\w+)': r'\\frac{\1}{\2}',
+        r'sum from ([^:]+) to ([^:]+)': r'\\sum_{\1}^{\2}',
+        r'integral from ([^:]+) to ([^:]+)': r'\\int_{\1}^{\2}',
+        r'infinity': r'\\infty',
+        r'alpha': r'\\alpha',
+        r'beta': r'\\beta',
+        r'pi': r'\\pi',
+        r'theta': r'\\theta',
+        r'([0-9]+)th power': r'^{\1}',
+        r'subscript ([0-9]+)': r'_{\1}'
+    }
+    result = text
+    for pattern, replacement in math_patterns.items():
+        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+    return result
+
+
+LEGACY_FUNCTIONS = {
+    'fix_common_latex_issues': legacy_fix_common_latex_issues,
+    'natural_text_to_latex': legacy_natural_text_to_latex,
+}
+
+
+def check_corpus(corpus):
+    passed = total = 0
+    for name, cases in corpus.items():
+        for case in cases:
+            total += 1
+            output = FUNCTIONS[name](case['input'])
+            if output == case['expected']:
+                passed += 1
+            else:
+                print(f"MISMATCH in {name} for input: {case['input']!r}")
+                print(f"  expected: {case['expected']!r}")
+                print(f"  got:      {output!r}")
+    print(f"Corpus: {passed}/{total} cases match")
+    return passed == total
+
+
+def throughput(func, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update-corpus', action='store_true', help='re-record expected outputs from the current rules')
+    parser.add_argument('--repeat', type=int, default=2000, help='passes over the benchmark texts')
+    args = parser.parse_args()
+
+    if args.update_corpus:
+        corpus = {
+            name: [{'input': text, 'expected': FUNCTIONS[name](text)} for text in inputs]
+            for name, inputs in CORPUS_INPUTS.items()
+        }
+        with open(CORPUS_PATH, 'w') as f:
+            json.dump(corpus, f, indent=1)
+        print(f"Wrote corpus to {CORPUS_PATH}; review the diff before committing")
+        return
+
+    with open(CORPUS_PATH) as f:
+        if not check_corpus(json.load(f)):
+            sys.exit(1)
+
+    print(f"\nThroughput in calls/s (x{args.repeat}):")
+    for name, inputs in CORPUS_INPUTS.items():
+        for label, texts in [('corpus inputs', inputs), ('long line', [' '.join(inputs) * 4])]:
+            legacy = throughput(LEGACY_FUNCTIONS[name], texts, args.repeat)
+            compiled = throughput(FUNCTIONS[name], texts, args.repeat)
+            print(f"  {name:24s} {label:14s} legacy {legacy:9.0f}   compiled {compiled:9.0f}   ({compiled / legacy:.1f}x)")
+
+if __name__ == '__main__':
+    main()
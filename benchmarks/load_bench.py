@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+"""
+Offline end-to-end load benchmark for the Socket.IO server.
+
+    python benchmarks/load_bench.py --clients 16 --requests 4
+    python benchmarks/load_bench.py --clients 64 --crew-latency lognormal:2:0.5 --json results.json
+    python benchmarks/load_bench.py --tts-stub api --tts-latency lognormal:0.5:0.8 [--no-hedge]
+
+Starts app.py in a child process with the crew and generate_speech replaced
+(with --tts-stub api, only the OpenAI speech endpoints) by deterministic
+local stand-ins whose latencies follow the configured distributions, so no
+OpenAI key or network access is needed. N concurrent
+Socket.IO clients each run a number of lessons back to back, and the run
+reports time-to-first-step, time-to-first-audio and full-lesson latency
+percentiles, throughput and the server's peak RSS.
+
+Latency distributions are written as kind:params (seconds):
+    fixed:0.5   uniform:0.2:0.8   lognormal:<median>:<sigma>
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from types import SimpleNamespace
+
+# Add the project root directory to Python path for imports
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+
+class Latency:
+    """A latency distribution parsed from 'kind:param[:param]'."""
+
+    def __init__(self, spec: str, seed: int = 0):
+        kind, *params = spec.split(':')
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        expected = {'fixed': 1, 'uniform': 2, 'lognormal': 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Bad latency '{spec}', expected fixed:s, uniform:lo:hi or lognormal:median:sigma")
+        self._random = random.Random(f'{spec}/{seed}')
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == 'fixed':
+                return self.params[0]
+            if self.kind == 'uniform':
+                return self._random.uniform(*self.params)
+            median, sigma = self.params
+            return median * math.exp(self._random.gauss(0, sigma))
+
+
+class StubCrew:
+    """
+    Stand-in for CrewFactory producing a deterministic lesson per prompt.
+
+    Supports both the streaming path (stream_explanation) and the
+    kickoff path, so either STREAMING_CONFIG setting works (see
+    --no-streaming). Simple queries skip the draft latency, like the real
+    single-task route.
+    """
+
+    def __init__(self, steps: int, crew_latency: Latency, step_latency: Latency):
+        self.steps = steps
+        self.crew_latency = crew_latency
+        self.step_latency = step_latency
+
+    def lesson(self, prompt: str):
+        from src.models.math_models import MathExplanation, Step
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+        a, b = rng.randint(2, 9), rng.randint(1, 50)
+        lines, steps = [], []
+        for i in range(self.steps):
+            lines.append(f'{a}x + {b + i} &= {rng.randint(1, 99)} \\text{{ (step {i + 1})}}')
+            steps.append(Step(
+                natural=f'In step {i + 1} we move {b + i} to the other side. Then we divide both sides by {a}, '
+                        f'which keeps the equation balanced while leaving x on its own. Each side is simplified '
+                        f'before we check the result against the original equation.',
+                math=' \\\\ '.join(lines)
+            ))
+        return MathExplanation(problem=prompt, steps=steps)
+
+    async def stream_explanation(self, inputs, timer=None, simple=False, on_total_steps=None):
+        from src.config.settings import CALL_SCHEDULER_CONFIG
+        from src.services.call_scheduler import scheduler
+        costs = CALL_SCHEDULER_CONFIG['task_tokens']
+
+        def span(stage):
+            return timer.span(stage) if timer else nullcontext()
+
+        async def steps():
+            lesson = self.lesson(inputs['user_query']).steps
+            for step in lesson:
+                await asyncio.sleep(self.step_latency.sample())
+                if step is lesson[-1] and on_total_steps is not None:
+                    on_total_steps(len(lesson))
+                yield step
+
+        # Like CrewFactory.stream_explanation: the llm pool admits each call separately
+        if not simple:
+            with span('generate_explanation'):
+                await scheduler.call('llm', lambda: asyncio.sleep(self.crew_latency.sample()),
+                                     cost=costs['generate_explanation'])
+        task_name = 'explain_directly' if simple else 'optimize_visual_narrative'
+        with span(task_name):
+            async with aclosing(scheduler.stream('llm', steps, cost=costs[task_name], buffered=True)) as generated:
+                async for step in generated:
+                    yield step
+
+    async def kickoff(self, inputs, simple=False, task_callback=None, should_stop=None):
+        from src.crews.crew import KickoffStopped
+
+        def task_done(name):
+            # Like CrewFactory.kickoff: checked after each task, skipping the rest
+            if should_stop is not None and should_stop():
+                raise KickoffStopped(f"Crew stopped after task {name}")
+            if task_callback is not None:
+                task_callback(SimpleNamespace(name=name))
+
+        if not simple:
+            await asyncio.sleep(self.crew_latency.sample())
+            task_done('generate_explanation')
+        await asyncio.sleep(sum(self.step_latency.sample() for _ in range(self.steps)))
+        task_done('explain_directly' if simple else 'optimize_visual_narrative')
+        return SimpleNamespace(pydantic=self.lesson(inputs['user_query']), token_usage=None)
+
+
+class StubSpeech:
+    """
+    Stand-in for generate_speech returning audio-sized bytes after a delay,
+    and for stream_speech, which splits the delay over the text chunks in
+    proportion to their length.
+    """
+
+    def __init__(self, latency: Latency, bytes_per_char: int):
+        self.latency = latency
+        self.bytes_per_char = bytes_per_char
+
+    async def __call__(self, text: str):
+        if not text:
+            return None
+        await asyncio.sleep(self.latency.sample())
+        return b'ID3' + bytes(len(text) * self.bytes_per_char)
+
+    async def stream(self, text: str, timer=None):
+        from src.config.settings import TTS_CONFIG
+        from src.utils.speech_chunks import split_speech
+        if not text:
+            return
+        latency = self.latency.sample()
+        for chunk in split_speech(text, TTS_CONFIG['first_chunk_max_chars'], TTS_CONFIG['max_chunk_chars']):
+            with timer.span('tts') if timer else nullcontext():
+                await asyncio.sleep(latency * len(chunk) / len(text))
+            yield bytes(len(chunk) * self.bytes_per_char)
+
+
+class StubTTSClient:
+    """
+    Stand-in for the OpenAI client's speech endpoints, one stub latency per
+    call, so tts_service itself (scheduling, hedging, deadlines) runs.
+    """
+
+    def __init__(self, speech: StubSpeech):
+        self.speech = speech
+        streaming = SimpleNamespace(create=self._stream)
+        self.audio = SimpleNamespace(speech=SimpleNamespace(create=self._create, with_streaming_response=streaming))
+
+    async def _create(self, input, **params):
+        return SimpleNamespace(content=await self.speech(input))
+
+    @asynccontextmanager
+    async def _stream(self, input, **params):
+        async def body():
+            yield await self.speech(input)
+        yield SimpleNamespace(iter_bytes=body)
+
+
+def serve(args) -> None:
+    """Run app.py's Socket.IO server with the stand-ins installed."""
+    import logging
+    os.environ.setdefault('OPENAI_API_KEY', 'offline-benchmark')
+    import app as server
+    from src.utils.lazy import Lazy
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
+    stub_crew = StubCrew(
+        args.steps,
+        Latency(args.crew_latency, args.seed),
+        Latency(args.step_latency, args.seed)
+    )
+    server.math_crew = Lazy(lambda: stub_crew, 'stub crew')
+    stub_speech = StubSpeech(Latency(args.tts_latency, args.seed), args.audio_bytes_per_char)
+    if args.tts_stub == 'api':
+        server.tts_service.client = Lazy(lambda: StubTTSClient(stub_speech), 'stub TTS client')
+        server.tts_service.audio_cache = None
+    else:
+        server.generate_speech = stub_speech
+        server.stream_speech = stub_speech.stream
+    server.TTS_CONFIG['hedge'] = not args.no_hedge
+    # The stand-ins have no provider rate limits for the call scheduler to budget for
+    server.call_scheduler.scheduler.enabled = False
+    server.TTS_CONFIG['chunked'] = args.tts_mode == 'chunked'
+    server.STREAMING_CONFIG['enabled'] = not args.no_streaming
+    if not args.cache:
+        server.explanation_cache = None
+        server.lesson_log = None
+    server.socketio.run(server.app, host='127.0.0.1', port=args.port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before accepting connections")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not accept connections within {timeout:.0f}s")
+
+
+class Lesson:
+    """Client-side timings of one request."""
+
+    def __init__(self, request_id: str, expected_steps: int):
+        self.request_id = request_id
+        self.expected_steps = expected_steps
+        self.start = time.perf_counter()
+        self.first_step = None
+        self.first_audio = None
+        self.end = None
+        self.steps = 0
+        self.error = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def on_step(self, data) -> None:
+        now = time.perf_counter()
+        if data.get('error'):
+            self.error = data.get('natural', 'error')
+            self.finished_at = now
+            self.done.set()
+            return
+        self.steps += 1
+        if self.first_step is None:
+            self.first_step = now - self.start
+        if self.first_audio is None and data.get('hasAudio') and not data.get('audioStream'):
+            self.first_audio = now - self.start
+        if self.steps >= self.expected_steps:
+            self.end = now - self.start
+            self.finished_at = now
+            self.done.set()
+
+    def on_audio_chunk(self, data) -> None:
+        if self.first_audio is None and data.get('audio'):
+            self.first_audio = time.perf_counter() - self.start
+
+
+def run_client(index: int, args, url: str, start_barrier: threading.Barrier, lessons: list) -> None:
+    import socketio
+
+    client = socketio.Client(reconnection=False)
+    current = {}
+
+    @client.on('display_step')
+    def on_display_step(data):
+        lesson = current.get(data.get('requestId'))
+        if lesson is not None:
+            lesson.on_step(data)
+
+    @client.on('audio_chunk')
+    def on_audio_chunk(data):
+        lesson = current.get(data.get('requestId'))
+        if lesson is not None:
+            lesson.on_audio_chunk(data)
+
+    client.connect(url, transports=['websocket'], wait_timeout=30)
+    try:
+        start_barrier.wait()
+        for i in range(args.requests):
+            request_id = f'bench-{index}-{i}'
+            lesson = Lesson(request_id, args.steps)
+            current[request_id] = lesson
+            client.emit('request_math', {
+                'prompt': f'Client {index} lesson {i}: solve {index + 2}x + {i} = 0',
+                'requestId': request_id,
+                'bypassCache': not args.cache,
+                'boardDiffs': True
+            })
+            if not lesson.done.wait(args.timeout):
+                lesson.error = 'timeout'
+                lesson.finished_at = time.perf_counter()
+            lessons.append(lesson)
+    finally:
+        client.disconnect()
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def rank(p):
+        return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+    return {
+        'p50': rank(50),
+        'p90': rank(90),
+        'p99': rank(99),
+        'max': values[-1],
+        'mean': sum(values) / len(values)
+    }
+
+
+def peak_child_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run(args) -> dict:
+    port = args.port or free_port()
+    command = [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port)] + [
+        f'--{name.replace("_", "-")}={getattr(args, name)}'
+        for name in ('steps', 'crew_latency', 'step_latency', 'tts_latency', 'tts_mode', 'tts_stub',
+                     'audio_bytes_per_char', 'seed')
+    ] + (['--cache'] if args.cache else []) + (['--no-hedge'] if args.no_hedge else []) + (
+        ['--no-streaming'] if args.no_streaming else [])
+    server = subprocess.Popen(command, cwd=PROJECT_ROOT)
+    try:
+        wait_for_port(port, server)
+        url = f'http://127.0.0.1:{port}'
+        lessons: list = []
+        barrier = threading.Barrier(args.clients + 1)
+        threads = [
+            threading.Thread(target=run_client, args=(i, args, url, barrier, lessons), daemon=True)
+            for i in range(args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait(timeout=60)
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        # Measured to the last lesson rather than the joins, which include disconnects
+        wall = max((lesson.finished_at for lesson in lessons), default=started) - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    completed = [lesson for lesson in lessons if lesson.error is None]
+    return {
+        'clients': args.clients,
+        'requests_per_client': args.requests,
+        'steps_per_lesson': args.steps,
+        'latency': {'crew': args.crew_latency, 'step': args.step_latency, 'tts': args.tts_latency},
+        'tts_mode': args.tts_mode,
+        'tts_stub': args.tts_stub,
+        'hedge': not args.no_hedge,
+        'streaming': not args.no_streaming,
+        'lessons': len(lessons),
+        'completed': len(completed),
+        'errors': sorted({lesson.error for lesson in lessons if lesson.error is not None}),
+        'wall_seconds': wall,
+        'lessons_per_second': len(completed) / wall if wall else 0.0,
+        'steps_per_second': sum(lesson.steps for lesson in lessons) / wall if wall else 0.0,
+        'time_to_first_step': percentiles([l.first_step for l in completed if l.first_step is not None]),
+        'time_to_first_audio': percentiles([l.first_audio for l in completed if l.first_audio is not None]),
+        'lesson_latency': percentiles([l.end for l in completed if l.end is not None]),
+        'server_peak_rss_mb': peak_child_rss_mb()
+    }
+
+
+def report(results: dict) -> None:
+    print(f"{results['clients']} clients x {results['requests_per_client']} lessons "
+          f"x {results['steps_per_lesson']} steps "
+          f"(crew {results['latency']['crew']}, step {results['latency']['step']}, tts {results['latency']['tts']}, "
+          f"{results['tts_mode']} audio, {results['tts_stub']} TTS stub"
+          f"{'' if results['hedge'] else ', no hedging'}"
+          f"{'' if results['streaming'] else ', crew kickoff without streaming'})")
+    print(f"completed {results['completed']}/{results['lessons']} lessons in {results['wall_seconds']:.2f}s: "
+          f"{results['lessons_per_second']:.2f} lessons/s, {results['steps_per_second']:.2f} steps/s")
+    for error in results['errors']:
+        print(f"  error: {error}")
+    print(f"{'':>22} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name in ('time_to_first_step', 'time_to_first_audio', 'lesson_latency'):
+        stats = results[name]
+        if stats:
+            print(f"{name:>22} " + ' '.join(f"{stats[p]:>7.3f}s" for p in ('p50', 'p90', 'p99', 'max')))
+    print(f"server peak RSS: {results['server_peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent Socket.IO clients')
+    parser.add_argument('--requests', type=int, default=3, help='lessons per client, run back to back')
+    parser.add_argument('--steps', type=int, default=6, help='steps per stub lesson')
+    parser.add_argument('--crew-latency', default='lognormal:1.0:0.4', help='delay before the first step')
+    parser.add_argument('--step-latency', default='uniform:0.1:0.4', help='delay between streamed steps')
+    parser.add_argument('--tts-latency', default='lognormal:0.5:0.3', help='delay of each TTS call')
+    parser.add_argument('--tts-mode', choices=('chunked', 'whole'), default='chunked',
+                        help='stream sentence chunks of audio, or send one clip per step')
+    parser.add_argument('--tts-stub', choices=('pipeline', 'api'), default='pipeline',
+                        help='replace generate_speech/stream_speech, or only the OpenAI speech endpoints '
+                             '(so TTS scheduling, hedging and deadlines are measured too)')
+    parser.add_argument('--no-hedge', action='store_true', help='disable hedged TTS requests')
+    parser.add_argument('--no-streaming', action='store_true',
+                        help='run the crew through kickoff instead of streaming its steps')
+    parser.add_argument('--audio-bytes-per-char', type=int, default=160, help='stub audio size per character')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds before a lesson counts as timed out')
+    parser.add_argument('--cache', action='store_true', help='leave the explanation cache and lesson log enabled')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    results = run(args)
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if results['completed'] == results['lessons'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Per-class latency of the local solver.
+
+    python benchmarks/local_solver_bench.py [--iterations 200] [--seed 1]
+
+Generates random arithmetic, linear and quadratic prompts, solves each
+with LocalSolver and reports the time per explanation for every problem
+class, plus how many prompts fell back to the crew. Word problems are
+included to measure what a fallback costs before the crew is called.
+No API calls are made.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the project root directory to Python path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.local_solver import LocalSolver
+
+
+def signed(n):
+    return f"- {-n}" if n < 0 else f"+ {n}"
+
+
+def arithmetic_prompt(rng):
+    a, b, c = rng.randint(2, 99), rng.randint(2, 99), rng.randint(2, 12)
+    return rng.choice([
+        f"What is {a} + {b} * {c}?",
+        f"({a} - {b}) / {c}",
+        f"{a} times {b}",
+        f"{c}^3 - {a}",
+        f"{rng.randint(5, 95)}% of {a * 10}",
+        f"{a / 10} + {b / 100}",
+    ])
+
+
+def linear_prompt(rng):
+    a, b, c = rng.randint(2, 12), rng.randint(-20, 20), rng.randint(-50, 50)
+    return rng.choice([
+        f"Solve {a}x {signed(b)} = {c}",
+        f"{a}(x - {abs(b)}) = {c}",
+        f"Solve for x: {a}x - {abs(b)} = {c} - x",
+        f"x/{a} {signed(b)} = {c}",
+        # One step: divide by the coefficient
+        f"Solve {a}x = {a * c}",
+        f"{a}x={c}",
+        f"-x = {c}",
+    ])
+
+
+def quadratic_prompt(rng):
+    r, s, a = rng.randint(-9, 9), rng.randint(-9, 9), rng.randint(2, 5)
+    return rng.choice([
+        f"Solve x^2 {signed(-(r + s))}x {signed(r * s)} = 0",
+        f"x^2 = {r * r}",
+        f"{a}x^2 = {a * s * s}",
+        f"Solve {a}x^2 {signed(r)}x - {abs(s) + 1} = 0",
+    ])
+
+
+def fallback_prompt(rng):
+    return rng.choice([
+        "If a train travels 60 miles per hour for 3 hours, how far does it go?",
+        "What is the derivative of x^3?",
+        "Solve x + y = 10",
+        "Prove that the square root of 2 is irrational",
+        f"x^3 = {rng.randint(2, 100)}",
+    ])
+
+
+GENERATORS = [
+    ('arithmetic', arithmetic_prompt),
+    ('linear', linear_prompt),
+    ('quadratic', quadratic_prompt),
+    ('fallback', fallback_prompt),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200, help='prompts per problem class')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    solver = LocalSolver()
+    # Warm up regex compilation and lazily built state
+    solver.solve("1 + 1")
+
+    print(f"{'generated as':<12} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'solved':>8} {'steps':>7}")
+    for name, generate in GENERATORS:
+        timings, solved, steps = [], 0, 0
+        for _ in range(args.iterations):
+            prompt = generate(rng)
+            start = time.perf_counter()
+            solution = solver.solve(prompt)
+            timings.append((time.perf_counter() - start) * 1000)
+            if solution is not None:
+                solved += 1
+                steps += len(solution.explanation.steps)
+        timings.sort()
+        print(f"{name:<12} {statistics.mean(timings):>9.3f} {timings[len(timings) // 2]:>9.3f} "
+              f"{timings[int(len(timings) * 0.9)]:>9.3f} {solved / len(timings):>8.0%} "
+              f"{steps / solved if solved else 0:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Startup-time benchmark: import cost of app.py and time to first response.
+
+    python benchmarks/startup_bench.py [--top 15] [--runs 3]
+
+Runs `python -X importtime -c "import app"` and reports the slowest imports,
+checks that the heavyweight modules (crewai, litellm, openai, langchain) are
+not loaded at import time and that importing app stays within
+STARTUP_CONFIG['import_budget_seconds']. Then starts the server and measures
+how long after process start `/healthz` and `/` answer, and when the
+background warm-up has the crew ready. Exits non-zero if a check fails.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Add the project root directory to Python path for imports
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.config.settings import STARTUP_CONFIG
+
+DEFERRED_MODULES = ('crewai', 'litellm', 'openai', 'langchain')
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+SERVER_CODE = '''
+import sys
+import app
+host, port = '127.0.0.1', int(sys.argv[1])
+app.socketio.start_background_task(app.warm_up_when_listening, host, port)
+app.socketio.run(app.app, host=host, port=port, allow_unsafe_werkzeug=True, log_output=False)
+'''
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'startup-benchmark')
+    return env
+
+
+def import_profile():
+    """Parse one `-X importtime` run of `import app`."""
+    code = f'import app, sys; print(",".join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                'module': name,
+                'depth': len(indent) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000
+            })
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    app_entry = next(entry for entry in entries if entry['module'] == 'app')
+    return app_entry['cumulative_ms'], entries, loaded
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, started, timeout, predicate=lambda body: True):
+    """Seconds since `started` until `url` answers 200 and predicate(body) holds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                body = response.read()
+                if response.status == 200 and predicate(body):
+                    return time.monotonic() - started
+        except OSError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def server_startup(timeout):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, '-c', SERVER_CODE, str(port)],
+        cwd=PROJECT_ROOT, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health = wait_for(f'{base}/healthz', started, timeout)
+        index = wait_for(f'{base}/', started, timeout)
+        crew_ready = wait_for(f'{base}/healthz', started, timeout,
+                              lambda body: json.loads(body).get('crewReady') is True)
+    finally:
+        server.terminate()
+        server.wait()
+    return health, index, crew_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    parser.add_argument('--runs', type=int, default=3, help='import runs to take the median of')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds to wait for the server')
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    import_ms = statistics.median(profile[0] for profile in profiles)
+    _, entries, loaded = profiles[-1]
+    budget_ms = STARTUP_CONFIG['import_budget_seconds'] * 1000
+
+    print(f"import app: {import_ms:.0f} ms (median of {args.runs}, budget {budget_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    slowest = sorted((e for e in entries if e['depth'] <= 3), key=lambda e: e['cumulative_ms'], reverse=True)
+    for entry in slowest[:args.top]:
+        print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {'  ' * entry['depth']}{entry['module']}")
+    print(f"deferred modules loaded at import: {', '.join(loaded) or 'none'}")
+
+    health, index, crew_ready = server_startup(args.timeout)
+
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else 'timed out'
+    print(f"after process start: /healthz {seconds(health)}, / {seconds(index)}, crew warmed {seconds(crew_ready)}")
+
+    failures = []
+    if import_ms > budget_ms:
+        failures.append(f"import app took {import_ms:.0f} ms, over the {budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"heavy modules loaded at import: {', '.join(loaded)}")
+    if health is None or index is None:
+        failures.append("the server did not answer")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
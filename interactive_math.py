@@ -6,19 +6,19 @@ import time
 # Add the src directory to Python path for imports
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
-from crews.crew import MathTutorCrew
+from crews.crew import CrewFactory
+
+# Built once and reused for every question asked in this session
+math_crew = CrewFactory()
 
 async def run_interactive_explanation(prompt):
-    # Initialize the math tutor crew
-    math_crew = MathTutorCrew()
-    
     # Format the input correctly
     inputs = {
         'user_query': prompt
     }
     
     # Get the explanation steps
-    result = await math_crew.crew().kickoff_async(inputs=inputs)
+    result = await math_crew.kickoff(inputs)
     
     try:
         # Access the Pydantic model from the result
@@ -37,5 +37,297 @@ LATEX_CONFIG: Dict[str, Any] = {
         'alpha', 'beta', 'gamma', 'delta', 'theta',
         'pi', 'infty', 'partial'
     ],
-    'timeout_seconds': 30
+    'timeout_seconds': 30,
+    # Boards memoized by the whiteboard formatter
+    'format_cache_size': 1024,
+    # Hex digits of the board content hash sent to clients
+    'board_hash_length': 16
+}
+
+# Streaming Configuration
+STREAMING_CONFIG: Dict[str, Any] = {
+    # Stream the visual narrative task and emit each step as soon as it is parsed
+    'enabled': True
+}
+
+# TTS Configuration
+TTS_CONFIG: Dict[str, Any] = {
+    'model': 'tts-1',
+    'voice': 'alloy',
+    'response_format': 'mp3',
+    # Synthesis calls allowed to run ahead of the step being emitted
+    'lookahead': 2,
+    # Steps (with their audio) buffered between synthesis and emission
+    'buffer_size': 4,
+    # Split each step's narration at sentence boundaries and stream the audio
+    # to the client as it arrives, instead of one finished MP3 per step
+    'chunked': True,
+    # The first chunk is one sentence, cut at a comma beyond this length,
+    # so playback starts after a short synthesis; later sentences are
+    # grouped up to max_chunk_chars per call
+    'first_chunk_max_chars': 120,
+    'max_chunk_chars': 400,
+    # Chunks of a step synthesized at once after the first one has started
+    'chunk_concurrency': 2,
+    # Audio chunks held per step (and per text chunk) ahead of playback; when
+    # full, the TTS response is not read further until the step is played
+    'chunk_buffer': 16,
+    # Deadline per TTS call: for the whole audio, or for the first bytes of
+    # a streamed chunk. When it passes, 'skip' gives up on the call, so the
+    # step is emitted without that audio, and 'wait' only records the miss
+    'deadline_seconds': 5.0,
+    'on_deadline': 'skip',
+    # A call still unanswered after the hedge_quantile of recent latencies
+    # (at least hedge_min_delay_seconds) gets a duplicate request, and the
+    # first answer wins. Hedging starts once hedge_min_samples latencies
+    # are known and pauses while TTS calls are queued by the call scheduler
+    'hedge': True,
+    'hedge_quantile': 0.9,
+    'hedge_min_delay_seconds': 0.25,
+    'hedge_min_samples': 20,
+    'latency_window': 200
+}
+
+# Synthesized audio cache (memory LRU in front of a size-bounded disk store)
+AUDIO_CACHE_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'directory': BASE_DIR / '.cache' / 'tts',
+    'memory_max_bytes': 32 * 1024 * 1024,
+    'disk_max_bytes': 512 * 1024 * 1024
+}
+
+# Pooled HTTP clients shared by every OpenAI call (crew LLM calls and TTS), so
+# connections and TLS sessions are reused across steps and requests
+HTTP_CLIENT_CONFIG: Dict[str, Any] = {
+    # Used when the h2 package is installed (httpx[http2]); one connection
+    # then multiplexes many concurrent calls
+    'http2': True,
+    'max_connections': 64,
+    'max_keepalive_connections': 32,
+    'keepalive_expiry_seconds': 90.0,
+    'connect_timeout_seconds': 5.0,
+    # Per read: the gap between streamed chunks, or the wait for a whole
+    # non-streamed completion
+    'read_timeout_seconds': 120.0,
+    'write_timeout_seconds': 30.0,
+    # Waiting for a free connection when the pool is at max_connections
+    'pool_timeout_seconds': 10.0
+}
+
+# Admission control in front of OpenAI calls: whole crew runs ('llm') and
+# single TTS requests ('tts'), shared by every request
+CALL_SCHEDULER_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'pools': {
+        'llm': {'max_concurrent': 8, 'tokens_per_minute': 200000, 'requests_per_minute': None},
+        'tts': {'max_concurrent': 8, 'tokens_per_minute': None, 'requests_per_minute': 50}
+    },
+    # Tokens charged to the llm pool per crew run, by query route
+    'crew_tokens': {'simple': 2500, 'complex': 8000},
+    # Tokens charged per call when the tasks are streamed one call at a time
+    'task_tokens': {
+        'explain_directly': 2500,
+        'generate_explanation': 4000,
+        'optimize_visual_narrative': 4000,
+    },
+    # On a rate limit (429) the pool's concurrency limit is multiplied by
+    # decrease_factor and it pauses for the provider's Retry-After, else an
+    # exponential backoff from backoff_seconds up to max_backoff_seconds
+    'decrease_factor': 0.5,
+    'backoff_seconds': 1.0,
+    'max_backoff_seconds': 30.0,
+    'max_retries': 3
+}
+
+# Explanation cache in front of the crew, keyed by normalized prompt
+EXPLANATION_CACHE_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'backend': 'sqlite',  # 'sqlite' or 'memory'
+    'path': BASE_DIR / '.cache' / 'explanations.sqlite3',
+    'ttl_seconds': 7 * 24 * 3600,
+    'max_entries': 10000
+}
+
+# Shared async runtime for socket handlers
+RUNTIME_CONFIG: Dict[str, Any] = {
+    # Requests processed concurrently on the runtime loop; the rest queue
+    'max_concurrent_requests': 32,
+    # Threads available for blocking work such as crew kickoff
+    'executor_workers': 32
+}
+
+# LaTeX rewrite rules, compiled into one regex per stage by src/utils/latex_rules.py.
+# Within a stage the first listed rule that matches at a position wins.
+LATEX_RULES: Dict[str, Dict[str, Any]] = {
+    'fixes': {
+        'rules': [
+            {'name': 'bare_sqrt', 'pattern': r'(?<![\\a-zA-Z])sqrt(?![a-zA-Z])',
+             'replacement': r'\\sqrt'},
+            {'name': 'bare_big_operator', 'pattern': r'(?<![\\a-zA-Z])(sum|int|prod)(?![a-zA-Z])',
+             'replacement': r'\\\1'},
+            {'name': 'multi_digit_script', 'pattern': r'([_^])(\d{2,})',
+             'replacement': r'\1{\2}'},
+            {'name': 'implicit_multiplication', 'pattern': r'(?<![\\a-zA-Z_^\d])(\d+) *(?=[a-zA-Z])',
+             'replacement': r'\1 \\cdot '},
+            # Runs after the first stage so commands it added get their braces too
+            {'name': 'unbraced_argument',
+             'pattern': r'\\(frac|sqrt|boxed|overline|hat|bar|vec|mathbf)\s*([^{\s\\\[])',
+             'replacement': r'\\\1{\2}', 'stage': 1}
+        ]
+    },
+    'natural_text': {
+        'ignore_case': True,
+        # Phrases captured by another rule (e.g. "square root of pi") are converted too
+        'recursive': True,
+        'rules': [
+            {'name': 'square_root', 'pattern': r'square root of ([^:]+)',
+             'replacement': r'\\sqrt{\1}'},
+            {'name': 'fraction', 'pattern': r'fraction (\w+)/(\w+)',
+             'replacement': r'\\frac{\1}{\2}'},
+            {'name': 'sum', 'pattern': r'sum from ([^:]+?) to ([^:]+)',
+             'replacement': r'\\sum_{\1}^{\2}'},
+            {'name': 'integral', 'pattern': r'integral from ([^:]+?) to ([^:]+)',
+             'replacement': r'\\int_{\1}^{\2}'},
+            {'name': 'power', 'pattern': r'([0-9]+)th power',
+             'replacement': r'^{\1}'},
+            {'name': 'subscript', 'pattern': r'subscript ([0-9]+)',
+             'replacement': r'_{\1}'},
+            {'name': 'infinity', 'pattern': r'(?<![\\a-zA-Z])infinity(?![a-zA-Z])',
+             'replacement': r'\\infty'},
+            {'name': 'alpha', 'pattern': r'(?<![\\a-zA-Z])alpha(?![a-zA-Z])',
+             'replacement': r'\\alpha'},
+            {'name': 'beta', 'pattern': r'(?<![\\a-zA-Z])beta(?![a-zA-Z])',
+             'replacement': r'\\beta'},
+            {'name': 'pi', 'pattern': r'(?<![\\a-zA-Z])pi(?![a-zA-Z])',
+             'replacement': r'\\pi'},
+            {'name': 'theta', 'pattern': r'(?<![\\a-zA-Z])theta(?![a-zA-Z])',
+             'replacement': r'\\theta'}
+        ]
+    }
+}
+
+# Board diffs: clients that ask for them receive line patches against the previous step's board
+BOARD_DIFF_CONFIG: Dict[str, Any] = {
+    'enabled': True
+}
+
+# Metrics: per-stage latency histograms and counters served on /metrics
+METRICS_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'latency_buckets': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120]
+}
+
+# Lesson store: precomputed lessons (steps, boards, audio) served without LLM or TTS calls
+LESSON_STORE_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'path': BASE_DIR / 'data' / 'lessons.sqlite3'
+}
+
+# Append-only log of every generated lesson, replayable without LLM or TTS calls
+LESSON_LOG_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'path': BASE_DIR / 'data' / 'lesson_log' / 'lessons.log',
+    # zlib level for lesson records; audio is stored as is
+    'compression_level': 6,
+    # Compaction keeps the newest recordings of each prompt, up to this age
+    'keep_per_prompt': 1,
+    'max_age_seconds': 90 * 24 * 3600,
+    # Compact automatically once dead records make up this share of a log
+    # of at least compact_min_bytes
+    'compact_garbage_ratio': 0.5,
+    'compact_min_bytes': 64 * 1024 * 1024
+}
+
+# Batch precomputation (run_crew.py batch)
+BATCH_CONFIG: Dict[str, Any] = {
+    'processes': 4,
+    # Lessons generated concurrently within each process
+    'concurrency': 4,
+    'retries': 2,
+    'retry_backoff_seconds': 5.0,
+    # TTS calls in flight per process
+    'tts_concurrency': 8
+}
+
+# Startup: heavy modules (crewai, openai) load lazily and are warmed once the server listens
+STARTUP_CONFIG: Dict[str, Any] = {
+    'warm_up': True,
+    'listen_timeout_seconds': 30,
+    # Budget for `import app`, checked by benchmarks/startup_bench.py
+    'import_budget_seconds': 1.0
+}
+
+# Query routing: simple prompts skip the second crew task (see src/utils/query_classifier.py)
+QUERY_ROUTING_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    'max_simple_words': 12,
+    'max_simple_operators': 3,
+    'max_simple_variables': 1,
+    'complex_keywords': [
+        'prove', 'proof', 'why', 'explain', 'derive', 'derivative', 'differentiate', 'integral',
+        'integrate', 'limit', 'series', 'sequence', 'matri', 'vector', 'eigen', 'system',
+        'simultaneous', 'inequalit', 'log', 'ln', 'sin', 'cos', 'tan', 'probabilit', 'statistic',
+        'graph', 'plot', 'factor', 'quadratic', 'polynomial', 'complete the square', 'theorem',
+        'word problem', 'how many', 'how long', 'how far'
+    ],
+    'filler_phrases': [
+        'what is', "what's", 'what are', 'how much is', 'the value of', 'value of', 'compute',
+        'calculate', 'evaluate', 'work out', 'simplify', 'solve for', 'solve', 'find', 'for',
+        'please', 'can you', 'tell me', 'equals', 'the', 'answer'
+    ],
+    # Spoken operators rewritten before the expression check
+    'operator_words': {
+        'times': '*', 'multiplied by': '*', 'plus': '+', 'minus': '-', 'divided by': '/',
+        'over': '/', 'squared': '^2', 'cubed': '^3', 'to the power of': '^'
+    },
+    'simple_expression_pattern': r'[0-9a-z.+\-*/^=()%]+'
+}
+
+# Model tiering: which model runs each crew task (see src/services/model_policy.py)
+MODEL_TIERS_CONFIG: Dict[str, Any] = {
+    # When disabled, every task uses the llm from agents.yaml
+    'enabled': True,
+    'tiers': {
+        'large': {
+            'model': 'gpt-4o',
+            # Calls in flight at which new work goes to the fallback tier
+            'max_in_flight': 8,
+            # Smoothed call latency above which the tier counts as slow
+            'slow_after_seconds': 25.0,
+            'fallback': 'fast'
+        },
+        'fast': {
+            'model': 'gpt-4o-mini',
+            'max_in_flight': None,
+            'slow_after_seconds': None,
+            'fallback': None
+        }
+    },
+    'default_tier': 'large',
+    # Tier per task; derivations stay on the large model
+    'task_tiers': {
+        'generate_explanation': 'large',
+        'optimize_visual_narrative': 'fast',
+        'explain_directly': 'fast'
+    },
+    # Tier per query class, overriding task_tiers
+    'query_tiers': {
+        'simple': 'fast'
+    },
+    # Weight of the newest call in the smoothed latency
+    'latency_smoothing': 0.3,
+    # How long a slow or failing tier is bypassed before it is tried again
+    'cooldown_seconds': 60
+}
+
+# Local solver: lessons for common problems generated without the crew (see src/services/local_solver.py)
+LOCAL_SOLVER_CONFIG: Dict[str, Any] = {
+    'enabled': True,
+    # Tried in order; the first class that recognizes the prompt writes the lesson
+    'problem_classes': ['arithmetic', 'linear', 'quadratic'],
+    # Longer lessons go to the crew
+    'max_steps': 10,
+    # Largest numerator or denominator shown on the board
+    'max_magnitude': 10 ** 12,
+    'max_exponent': 20
 }
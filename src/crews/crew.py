@@ -1,7 +1,22 @@
-from crewai import Agent, Crew, Process, Task
+import json
+from contextlib import aclosing, nullcontext
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from crewai import LLM, Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
+from src.config.settings import CALL_SCHEDULER_CONFIG
 from src.crews.tools.latex_tools import LatexFormatter
-from src.models.math_models import MathExplanation
+from src.models.math_models import MathExplanation, Step
+from src.services.call_scheduler import scheduler
+from src.services.http_clients import install_litellm_session, openai_client
+from src.services.metrics import RequestTimer, record_token_usage
+from src.services.model_policy import ModelChoice, ModelPolicy
+from src.utils.step_stream import StepStreamParser
+from src.utils.query_classifier import COMPLEX, SIMPLE
+
+class KickoffStopped(Exception):
+    """Raised in a crew's worker thread to skip its remaining tasks."""
+
 
 @CrewBase
 class MathTutorCrew():
@@ -34,6 +49,13 @@ class MathTutorCrew():
             output_pydantic=MathExplanation
         )
 
+    @task
+    def explain_directly(self) -> Task:
+        return Task(
+            config=self.tasks_config['explain_directly'],
+            output_pydantic=MathExplanation
+        )
+
     @crew
     def crew(self) -> Crew:
         return Crew(
@@ -43,6 +65,24 @@ class MathTutorCrew():
             verbose=True
         )
 
+    def draft_crew(self) -> Crew:
+        """Crew that only runs generate_explanation, used by the streaming path."""
+        return Crew(
+            agents=[self.math_teacher()],
+            tasks=[self.generate_explanation()],
+            process=Process.sequential,
+            verbose=True
+        )
+
+    def fast_crew(self) -> Crew:
+        """Crew that only runs explain_directly, used for simple queries."""
+        return Crew(
+            agents=[self.math_teacher()],
+            tasks=[self.explain_directly()],
+            process=Process.sequential,
+            verbose=True
+        )
+
     # def _update_task_contexts(self, query: str) -> None:
     #     """Set the user query in task contexts"""
     #     for task_name in self.tasks_config:
@@ -72,3 +112,238 @@ class MathTutorCrew():
     #             "error": True,
     #             "message": str(e)
     #         }
+
+
+class CrewFactory:
+    """
+    Builds the math tutor crews once and gives each request its own copy.
+
+    Creating a MathTutorCrew loads and maps both YAML configs, and its
+    crew() is memoized, so requests sharing one instance also share one
+    Crew and its task state. The factory builds the template crews (agents
+    with their LLMs, tasks) once at startup; crew(), draft_crew() and
+    fast_crew() return Crew.copy() of a template, which clones agents and
+    tasks for isolated per-request state. The copies' agents are then
+    pointed at one shared LLM object per tier model.
+
+    kickoff() and stream_explanation() run each task on the model the
+    ModelPolicy picks for it and report every call back to the policy.
+    """
+
+    def __init__(self, definition: Optional[MathTutorCrew] = None, policy: Optional[ModelPolicy] = None):
+        self.definition = definition or MathTutorCrew()
+        self.policy = policy or ModelPolicy()
+        self.agents_config = self.definition.agents_config
+        self.tasks_config = self.definition.tasks_config
+        self._crew = self.definition.crew()
+        self._draft_crew = self.definition.draft_crew()
+        self._fast_crew = self.definition.fast_crew()
+        # crewai's LLM calls go through litellm; send them over the shared connection pool
+        install_litellm_session()
+        # One LLM per tier model, shared by every request
+        self._llms = {tier['model']: LLM(model=tier['model']) for tier in self.policy.tiers.values()}
+
+    def crew(self, task_callback: Optional[Callable[[Any], None]] = None) -> Crew:
+        """
+        A fresh copy of the full crew. task_callback, if given, is called
+        with each task's output as it finishes.
+        """
+        return self._copy(self._crew, task_callback)
+
+    def draft_crew(self) -> Crew:
+        """A fresh copy of the crew that only runs generate_explanation."""
+        return self._draft_crew.copy()
+
+    def fast_crew(self, task_callback: Optional[Callable[[Any], None]] = None) -> Crew:
+        """A fresh copy of the single-task crew for simple queries."""
+        return self._copy(self._fast_crew, task_callback)
+
+    @staticmethod
+    def _copy(template: Crew, task_callback: Optional[Callable[[Any], None]]) -> Crew:
+        crew = template.copy()
+        if task_callback is not None:
+            crew.task_callback = task_callback
+        return crew
+
+    def _assign_models(self, crew: Crew, route: str) -> List[ModelChoice]:
+        """
+        Point each task of a copied crew at the model the policy picks for
+        it. Tasks sharing an agent but not a model get their own agent copy.
+        """
+        if not self.policy.enabled:
+            return []
+        choices, agents = [], {}
+        for task in crew.tasks:
+            choice = self.policy.select(task.name, route)
+            key = (task.agent.role, choice.model)
+            if key not in agents:
+                if any(role == task.agent.role for role, _ in agents):
+                    agent = task.agent.copy()
+                    crew.agents.append(agent)
+                else:
+                    agent = task.agent
+                agent.llm = self._llms[choice.model]
+                agents[key] = agent
+            task.agent = agents[key]
+            choices.append(choice)
+        return choices
+
+    async def kickoff(self, inputs: Dict[str, Any], simple: bool = False,
+                      task_callback: Optional[Callable[[Any], None]] = None,
+                      should_stop: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Run the full crew, or the single-task crew for a simple query, on
+        the models the policy picks, and return the crew output.
+
+        crewai runs the crew in a worker thread that cancelling the awaiting
+        task does not stop. `should_stop`, if given, is checked in that
+        thread after each task; once it returns True the remaining tasks
+        are skipped by raising KickoffStopped. A task already calling the
+        LLM still runs to completion.
+        """
+        route = SIMPLE if simple else COMPLEX
+        crew = self.fast_crew() if simple else self.crew()
+        tracked = _TrackedTasks(self.policy, self._assign_models(crew, route))
+
+        def on_task_done(output):
+            if should_stop is not None and should_stop():
+                tracked.stop()
+                raise KickoffStopped(f"Crew stopped after task {getattr(output, 'name', None) or '?'}")
+            tracked.advance()
+            if task_callback is not None:
+                task_callback(output)
+        crew.task_callback = on_task_done
+
+        tracked.advance()
+        try:
+            return await crew.kickoff_async(inputs=inputs)
+        except BaseException as e:
+            tracked.fail(e)
+            raise
+
+    async def stream_explanation(self, inputs: Dict[str, Any], timer: Optional[RequestTimer] = None,
+                                 simple: bool = False,
+                                 on_total_steps: Optional[Callable[[int], None]] = None) -> AsyncIterator[Step]:
+        """
+        Run generate_explanation, then stream the optimize_visual_narrative
+        rewrite and yield each Step as soon as it has been fully generated.
+        With `simple`, skip the draft and stream explain_directly in a
+        single call instead. Each task's duration is recorded as a span on
+        `timer`, if given, and `on_total_steps` is called with the number of
+        steps as soon as the streamed steps array is closed.
+
+        Each call is admitted to the scheduler's llm pool on its own, so a
+        rate limited rewrite is retried without re-running the draft, and
+        streamed steps are buffered so a slow consumer does not hold the slot.
+        """
+        def span(stage):
+            return timer.span(stage) if timer else nullcontext()
+
+        def streamed(task_name, route, context=None):
+            make_stream = partial(self._stream_task, task_name, inputs, route, context=context,
+                                  on_total_steps=on_total_steps)
+            cost = CALL_SCHEDULER_CONFIG['task_tokens'][task_name]
+            return aclosing(scheduler.stream('llm', make_stream, cost=cost, buffered=True))
+
+        if simple:
+            with span('explain_directly'):
+                async with streamed('explain_directly', SIMPLE) as steps:
+                    async for step in steps:
+                        yield step
+            return
+
+        draft_crew = self.draft_crew()
+        choices = self._assign_models(draft_crew, COMPLEX)
+        # The draft runs in a crewai worker thread: if the request is cancelled
+        # meanwhile, its LLM call still completes, but the rewrite is never started
+        with span('generate_explanation'), self._track(choices[0] if choices else None):
+            draft = await scheduler.call('llm', partial(draft_crew.kickoff_async, inputs=inputs),
+                                         cost=CALL_SCHEDULER_CONFIG['task_tokens']['generate_explanation'])
+        usage = getattr(draft, 'token_usage', None)
+        if usage is not None:
+            record_token_usage(usage.prompt_tokens, usage.completion_tokens)
+
+        with span('optimize_visual_narrative'):
+            async with streamed('optimize_visual_narrative', COMPLEX, context=draft.raw) as steps:
+                async for step in steps:
+                    yield step
+
+    async def _stream_task(self, task_name: str, inputs: Dict[str, Any], route: str,
+                           context: Optional[str] = None,
+                           on_total_steps: Optional[Callable[[int], None]] = None) -> AsyncIterator[Step]:
+        """Stream one task as a MathExplanation JSON completion, yielding each finished Step."""
+        teacher = self.agents_config['math_teacher']
+        choice = self.policy.select(task_name, route) if self.policy.enabled else None
+        task_config = self.tasks_config[task_name]
+        system_prompt = (
+            f"You are {teacher['role']}. {teacher['backstory'].strip()}\n"
+            f"Your personal goal is: {teacher['goal']}"
+        )
+        context_prompt = f"This is the context you're working with:\n{context}\n\n" if context else ''
+        user_prompt = (
+            f"{task_config['description'].format(**inputs)}\n\n"
+            f"{context_prompt}"
+            f"Expected output: {task_config['expected_output']}\n"
+            "Respond with a single JSON object matching this schema, with the "
+            "\"problem\" field first and no other text:\n"
+            f"{json.dumps(MathExplanation.model_json_schema())}"
+        )
+
+        parser = StepStreamParser()
+        with self._track(choice):
+            client = await openai_client.aget()
+            stream = await client.chat.completions.create(
+                model=choice.model if choice else teacher['llm'],
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': user_prompt}
+                ],
+                response_format={'type': 'json_object'},
+                stream=True,
+                stream_options={'include_usage': True}
+            )
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    record_token_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                steps = parser.feed(chunk.choices[0].delta.content or '')
+                if parser.steps_complete and on_total_steps is not None:
+                    # Reported before the last step is passed on
+                    on_total_steps(len(parser.steps))
+                    on_total_steps = None
+                for step in steps:
+                    yield step
+
+    def _track(self, choice: Optional[ModelChoice]):
+        return self.policy.track(choice) if choice is not None else nullcontext()
+
+
+class _TrackedTasks:
+    """
+    Reports the tasks of one crew kickoff to the model policy in order:
+    advance() ends the current task's call and starts the next one.
+    """
+
+    def __init__(self, policy: ModelPolicy, choices: List[ModelChoice]):
+        self.policy = policy
+        self.pending = list(choices)
+        self.current = None
+
+    def advance(self) -> None:
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+        self.current = self.policy.track(self.pending.pop(0)) if self.pending else None
+        if self.current is not None:
+            self.current.__enter__()
+
+    def stop(self) -> None:
+        """End the current task's call without starting the next one."""
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+            self.current = None
+
+    def fail(self, error: BaseException) -> None:
+        if self.current is not None:
+            self.current.__exit__(type(error), error, error.__traceback__)
+            self.current = None
@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 import sys
 import os
+import argparse
+import logging
 
 # Add the project root directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.crews.crew import MathTutorCrew
+from src.crews.crew import CrewFactory, MathTutorCrew
+from src.config.settings import BATCH_CONFIG, LESSON_LOG_CONFIG, LESSON_STORE_CONFIG
 
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
@@ -21,7 +24,7 @@ def run(topic):
     inputs = {
         'user_query': topic  # Changed from 'topic' to 'user_query' to match tasks.yaml
     }
-    MathTutorCrew().crew().kickoff(inputs=inputs)
+    CrewFactory().crew().kickoff(inputs=inputs)
 
 
 def train():
@@ -68,6 +71,68 @@ def test():
         raise Exception(f"An error occurred while testing the crew: {e}")
 
 
+def batch():
+    """
+    Precompute lessons for a file of prompts into the lesson store.
+    """
+    parser = argparse.ArgumentParser(prog='run_crew.py batch')
+    parser.add_argument('prompts_file', help='text file with one prompt per line')
+    parser.add_argument('--store', default=str(LESSON_STORE_CONFIG['path']), help='lesson store path')
+    parser.add_argument('--processes', type=int, default=BATCH_CONFIG['processes'])
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONFIG['concurrency'],
+                        help='lessons generated at once per process')
+    parser.add_argument('--retries', type=int, default=BATCH_CONFIG['retries'])
+    parser.add_argument('--force', action='store_true', help='regenerate lessons already in the store')
+    args = parser.parse_args(sys.argv[1:])
+
+    # Imported here so the other commands don't need the TTS stack
+    from src.services.lesson_batch import run_batch
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    try:
+        report = run_batch(
+            args.prompts_file,
+            args.store,
+            processes=args.processes,
+            concurrency=args.concurrency,
+            retries=args.retries,
+            backoff=BATCH_CONFIG['retry_backoff_seconds'],
+            tts_concurrency=BATCH_CONFIG['tts_concurrency'],
+            force=args.force
+        )
+    except Exception as e:
+        raise Exception(f"An error occurred while running the batch: {e}")
+
+    print(f"Generated {report['generated']}, skipped {report['skipped']} already stored, "
+          f"failed {len(report['failed'])} of {report['total']} prompts")
+    for prompt, error in report['failed'].items():
+        print(f"  FAILED {prompt}: {error}")
+    if report['failed']:
+        print("Run the same command again to retry the failed prompts.")
+        sys.exit(1)
+
+
+def compact_log():
+    """
+    Compact the lesson log, dropping superseded and expired lessons.
+    Run it while the web app is stopped; a running app compacts its log
+    on its own.
+    """
+    parser = argparse.ArgumentParser(prog='run_crew.py compact-log')
+    parser.add_argument('--log', default=str(LESSON_LOG_CONFIG['path']), help='lesson log path')
+    args = parser.parse_args(sys.argv[1:])
+
+    from src.services.lesson_log import create_lesson_log
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    lesson_log = create_lesson_log({**LESSON_LOG_CONFIG, 'enabled': True, 'path': args.log})
+    try:
+        sizes = lesson_log.compact()
+    finally:
+        lesson_log.close()
+    print(f"Compacted {args.log}: {sizes['before']} -> {sizes['after']} bytes")
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python run_crew.py <command> [args...]")
@@ -76,6 +141,8 @@ if __name__ == "__main__":
         print("  train <n> <file> - Train the crew for n iterations")
         print("  replay <task_id> - Replay a specific task")
         print("  test <n> <model> - Test the crew with model for n iterations")
+        print("  batch <file>     - Precompute lessons for a file of prompts")
+        print("  compact-log      - Compact the lesson log")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -101,6 +168,14 @@ if __name__ == "__main__":
             print("Usage: python run_crew.py test <n_iterations> <model_name>")
             sys.exit(1)
         test()
+    elif command == "batch":
+        if len(sys.argv) < 2:
+            print("Usage: python run_crew.py batch <prompts_file> [--processes N] [--concurrency N] "
+                  "[--retries N] [--store PATH] [--force]")
+            sys.exit(1)
+        batch()
+    elif command == "compact-log":
+        compact_log()
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field
 
 from ...utils.latex_utils import (
     validate_latex,
+    find_latex_errors,
     sanitize_latex,
     fix_common_latex_issues,
     natural_text_to_latex,
@@ -76,8 +77,12 @@ class LatexValidator(BaseTool):
                 latex = fix_common_latex_issues(latex)
                 
                 # Validate again after fixes
-                if not validate_latex(latex):
-                    return "Invalid LaTeX expression that couldn't be automatically fixed"
+                errors = find_latex_errors(latex)
+                if errors:
+                    details = "; ".join(
+                        f"{error['message']} at position {error['position']}" for error in errors
+                    )
+                    return f"Invalid LaTeX expression that couldn't be automatically fixed: {details}"
             
             return latex
         except Exception as e:
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    A long-lived asyncio event loop running in a background thread.
+
+    Socket handlers submit coroutines here instead of spinning up a loop
+    per request, so async clients (and their connection pools) created on
+    this loop are reused across requests. At most `max_concurrent` submitted
+    coroutines run at once; the rest wait their turn on the loop. Blocking
+    work pushed to the default executor (e.g. crew kickoff_async) runs on a
+    pool of `executor_workers` threads.
+    """
+
+    def __init__(self, max_concurrent: int = 32, executor_workers: int = 32, name: str = 'mathboard-runtime'):
+        self.max_concurrent = max_concurrent
+        self.executor_workers = executor_workers
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        """Number of submitted coroutines currently holding a concurrency slot."""
+        return self._active
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+        logger.info(f"Async runtime started (max_concurrent={self.max_concurrent})")
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule a coroutine on the runtime loop and return its future."""
+        # Always go through start(): its lock makes concurrent first submits
+        # wait until the loop is actually running
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Cancel outstanding work and stop the loop thread."""
+        with self._lock:
+            if self._thread is None:
+                return
+            loop, thread = self.loop, self._thread
+            self._thread = None
+
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_default_executor()
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Async runtime did not shut down cleanly: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        logger.info("Async runtime stopped")
+
+    def _run(self, ready: threading.Event) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix=f'{self.name}-worker')
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _limited(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            # Cancelled while waiting for a slot: the coroutine never started
+            coro.close()
+            raise
+        self._active += 1
+        try:
+            return await coro
+        finally:
+            self._active -= 1
+            self._slots.release()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def audio_cache_key(text: str, model: str, voice: str, response_format: str) -> str:
+    """Content hash identifying one synthesized utterance."""
+    payload = json.dumps([text, model, voice, response_format], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier cache of synthesized audio keyed by content hash.
+
+    The memory tier is an LRU bounded by total bytes. The disk tier stores
+    one file per key under `directory` and evicts the least recently used
+    files once `disk_max_bytes` is exceeded. Disk hits are promoted into
+    memory. All methods are thread-safe; the *_memory methods never touch
+    the disk and are cheap enough for an event loop, while get/put and the
+    *_disk methods block on file I/O.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        memory_max_bytes: int = 32 * 1024 * 1024,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.directory = Path(directory) if directory else None
+        self.stats: Dict[str, int] = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+        self._memory: OrderedDict = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for `key`, or None on a miss."""
+        data = self.get_memory(key)
+        return data if data is not None else self.get_disk(key)
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """Look `key` up in the memory tier only. Never touches the disk."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+            return data
+
+    def get_disk(self, key: str) -> Optional[bytes]:
+        """Look `key` up in the disk tier, promoting a hit into memory. Blocks on file I/O."""
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._store_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store audio for `key` in both tiers."""
+        self.put_memory(key, data)
+        self.put_disk(key, data)
+
+    def put_memory(self, key: str, data: bytes) -> None:
+        """Store audio for `key` in the memory tier only."""
+        if not data:
+            return
+        with self._lock:
+            self._store_memory(key, data)
+
+    def put_disk(self, key: str, data: bytes) -> None:
+        """Store audio for `key` in the disk tier only. Blocks on file I/O."""
+        if data:
+            self._write_disk(key, data)
+
+    def clear(self) -> None:
+        """Drop every cached entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            removed = list(self._disk)
+            self._disk.clear()
+            self._disk_bytes = 0
+        self._unlink(removed)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus current tier sizes."""
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes
+            }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for path in self.directory.glob('*/*'):
+            if path.is_file() and not path.name.endswith('.tmp'):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._unlink(self._evict_disk())
+
+    # File I/O happens outside the lock, so a slow disk never holds up
+    # memory-tier lookups; only the disk index is updated under it
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        with self._lock:
+            if key not in self._disk:
+                return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"Dropping unreadable audio cache entry {key}: {str(e)}")
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            self._unlink([key])
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return data
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.directory or len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Per-thread temporary name: two threads may write the same key
+            tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write audio cache entry {key}: {str(e)}")
+            return
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            evicted = self._evict_disk()
+        self._unlink(evicted)
+
+    def _evict_disk(self) -> List[str]:
+        """Drop least recently used keys from the disk index until it fits; returns them for _unlink."""
+        evicted = []
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats['evictions'] += 1
+            evicted.append(key)
+        return evicted
+
+    def _unlink(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from src.models.math_models import Step
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+async def synthesize_ahead(
+    steps: AsyncIterator[Step],
+    synthesize: Callable[[str], Awaitable[Optional[bytes]]],
+    lookahead: int = 2,
+    buffer_size: int = 4
+) -> AsyncIterator[Tuple[Step, Optional[bytes]]]:
+    """
+    Pair each step with its synthesized audio, in order, as soon as that
+    step's own audio is ready.
+
+    At most `lookahead` synthesis calls run concurrently, and at most
+    `buffer_size` steps are held between being received and being yielded,
+    which bounds the audio kept in memory per request. Steps without
+    natural text are yielded with no audio rather than skipped.
+    """
+    lookahead = max(1, lookahead)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size))
+    slots = asyncio.Semaphore(lookahead)
+    pending = set()
+
+    async def run_synthesis(text: str) -> Optional[bytes]:
+        async with slots:
+            return await synthesize(text)
+
+    async def produce():
+        try:
+            async for step in steps:
+                job = None
+                if step.natural:
+                    job = asyncio.ensure_future(run_synthesis(step.natural))
+                    pending.add(job)
+                    job.add_done_callback(pending.discard)
+                await queue.put((step, job))
+        except Exception as e:
+            await queue.put((_DONE, e))
+            return
+        finally:
+            if hasattr(steps, 'aclose'):
+                await steps.aclose()
+        await queue.put((_DONE, None))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            step, job = await queue.get()
+            if step is _DONE:
+                if job is not None:
+                    raise job
+                break
+            audio_data = await job if job is not None else None
+            yield step, audio_data
+    finally:
+        producer.cancel()
+        for job in list(pending):
+            job.cancel()
+        await asyncio.gather(producer, *pending, return_exceptions=True)
+
+
+async def stream_ahead(
+    steps: AsyncIterator[Step],
+    stream: Callable[[str], AsyncIterator[bytes]],
+    lookahead: int = 2,
+    buffer_size: int = 4,
+    chunk_buffer: int = 16
+) -> AsyncIterator[Tuple[Step, Optional[AsyncIterator[bytes]]]]:
+    """
+    Pair each step with an iterator over its audio chunks, in order, as
+    soon as the step's first chunk has arrived.
+
+    Like synthesize_ahead, but for streamed speech: each step's chunks are
+    read into a queue in the background, so a step yielded here can be
+    played while the rest of its audio (and that of up to `lookahead`
+    steps in total) is still being synthesized. At most `chunk_buffer`
+    chunks are queued per step, so a step that is not being played yet
+    stops reading its audio. The caller must exhaust a
+    step's chunk iterator before asking for the next step. Steps without
+    natural text, or whose audio produced no chunk, are yielded with None
+    instead of an iterator.
+    """
+    lookahead = max(1, lookahead)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size))
+    slots = asyncio.Semaphore(lookahead)
+    pending = set()
+
+    async def read_audio(text: str, chunks: asyncio.Queue) -> None:
+        try:
+            async with slots:
+                async for data in stream(text):
+                    await chunks.put(data)
+        except Exception:
+            await chunks.put(_DONE)
+            raise
+        # Not reached when cancelled: the pipeline is closing and nothing reads the chunks
+        await chunks.put(_DONE)
+
+    async def produce():
+        try:
+            async for step in steps:
+                chunks = None
+                if step.natural:
+                    chunks = asyncio.Queue(maxsize=max(1, chunk_buffer))
+                    job = asyncio.ensure_future(read_audio(step.natural, chunks))
+                    pending.add(job)
+                    job.add_done_callback(pending.discard)
+                await queue.put((step, chunks))
+        except Exception as e:
+            await queue.put((_DONE, e))
+            return
+        finally:
+            if hasattr(steps, 'aclose'):
+                await steps.aclose()
+        await queue.put((_DONE, None))
+
+    async def drain(first: Any, chunks: asyncio.Queue) -> AsyncIterator[bytes]:
+        data = first
+        while data is not _DONE:
+            yield data
+            data = await chunks.get()
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            step, chunks = await queue.get()
+            if step is _DONE:
+                if chunks is not None:
+                    raise chunks
+                break
+            if chunks is None:
+                yield step, None
+                continue
+            # Hold the step back until its audio starts, as synthesize_ahead does
+            first = await chunks.get()
+            # No audio at all (failed or past its deadline): the step goes out without it
+            yield step, None if first is _DONE else drain(first, chunks)
+    finally:
+        producer.cancel()
+        for job in list(pending):
+            job.cancel()
+        await asyncio.gather(producer, *pending, return_exceptions=True)
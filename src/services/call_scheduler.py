@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import aclosing, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+from src.config.settings import CALL_SCHEDULER_CONFIG
+from src.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Caller:
+    """Who the calls made in the current context are for, and how to tell them they are queued."""
+
+    def __init__(self, session: str, notify: Optional[Callable[[str, int], None]] = None):
+        self.session = session
+        # notify(pool, position): position 0 means the wait is over
+        self.notify = notify
+
+
+_caller: ContextVar[Optional[Caller]] = ContextVar('call_scheduler_caller', default=None)
+
+
+def set_caller(session: str, notify: Optional[Callable[[str, int], None]] = None) -> None:
+    """Attribute the calls of the current task (and the tasks it starts) to `session`."""
+    _caller.set(Caller(session, notify))
+
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """
+    For a provider rate-limit error (HTTP 429), the delay it asks for in
+    seconds, or 0.0 when it gives none; None for any other error.
+    """
+    if getattr(error, 'status_code', None) != 429 and type(error).__name__ != 'RateLimitError':
+        return None
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    for header, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        try:
+            return max(0.0, float(headers[header]) * scale)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute` per minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.rate = self.capacity / 60
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until `cost` can be taken (a cost above capacity waits for a full bucket)."""
+        return max(0.0, min(cost, self.capacity) - self.level) / self.rate
+
+
+class _Failure:
+    """An error raised by a buffered stream, queued behind the items read before it."""
+    __slots__ = ('error',)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class _Waiter:
+    __slots__ = ('caller', 'cost', 'future', 'queued_at')
+
+    def __init__(self, caller: Caller, cost: float, future: asyncio.Future):
+        self.caller = caller
+        self.cost = cost
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class _Pool:
+    """Admission state of one kind of call (LLM crew runs, TTS requests)."""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.max_concurrent = config['max_concurrent']
+        # Adaptive concurrency limit, lowered on rate limits and regrown on success
+        self.limit = float(self.max_concurrent)
+        self.in_flight = 0
+        self.tokens = _Bucket(config['tokens_per_minute']) if config.get('tokens_per_minute') else None
+        self.requests = _Bucket(config['requests_per_minute']) if config.get('requests_per_minute') else None
+        # Waiters per session, in round-robin order: the first session is served next
+        self.queues: 'OrderedDict[str, Deque[_Waiter]]' = OrderedDict()
+        # Queue position last sent to each waiting caller
+        self.positions: Dict[Caller, int] = {}
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self.last_decrease = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def blocked_for(self, cost: float, now: float) -> Optional[float]:
+        """None if a call costing `cost` can start now, else seconds to wait (0.0: until a release)."""
+        if self.in_flight >= max(1, int(self.limit)):
+            return 0.0
+        delay = self.paused_until - now
+        for bucket, amount in ((self.tokens, cost), (self.requests, 1)):
+            if bucket is not None:
+                bucket.refill(now)
+                delay = max(delay, bucket.wait_time(amount))
+        return delay if delay > 0 else None
+
+    def take(self, cost: float) -> None:
+        self.in_flight += 1
+        if self.tokens is not None:
+            self.tokens.level -= min(cost, self.tokens.capacity)
+        if self.requests is not None:
+            self.requests.level -= 1
+
+
+class CallScheduler:
+    """
+    Admission control for OpenAI calls, shared by every request.
+
+    Each pool (CALL_SCHEDULER_CONFIG['pools']) caps the calls in flight and
+    the tokens and requests started per minute. Calls that cannot start
+    wait in per-session queues served round robin, so one client's burst of
+    TTS chunks cannot starve another client's first call; waiting callers
+    are told their queue position as it changes. A rate-limit (429) answer
+    pauses the pool for the delay the provider asks for (or an exponential
+    backoff), halves its concurrency limit, and the limit grows back by
+    one for every limit successful calls, so throughput settles just under
+    the provider's limit instead of oscillating around it. Failed calls are
+    retried up to max_retries times when they were rate limited.
+
+    All methods must be called from one event loop (the shared runtime).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or CALL_SCHEDULER_CONFIG
+        self.enabled = config['enabled']
+        self.decrease_factor = config['decrease_factor']
+        self.backoff_seconds = config['backoff_seconds']
+        self.max_backoff_seconds = config['max_backoff_seconds']
+        self.max_retries = config['max_retries']
+        self.pools = {name: _Pool(name, pool) for name, pool in config['pools'].items()}
+
+    @asynccontextmanager
+    async def slot(self, pool_name: str, cost: float = 0) -> AsyncIterator[None]:
+        """Hold one call's admission in `pool_name` for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+        pool = self.pools[pool_name]
+        await self._acquire(pool, cost)
+        try:
+            yield
+        except Exception as e:
+            self._release(pool, rate_limited=rate_limit_delay(e))
+            raise
+        except BaseException:
+            # Cancelled or closed mid-call: says nothing about the provider's limits
+            self._release(pool, adjust=False)
+            raise
+        else:
+            self._release(pool)
+
+    async def call(self, pool_name: str, make_call: Callable[[], Awaitable[Any]], cost: float = 0) -> Any:
+        """Run `make_call()` in a slot, retrying it when it is rate limited."""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(pool_name, cost):
+                    return await make_call()
+            except Exception as e:
+                if not self._should_retry(pool_name, e, attempt):
+                    raise
+                attempt += 1
+
+    async def stream(self, pool_name: str, make_stream: Callable[[], AsyncIterator[Any]],
+                     cost: float = 0, buffered: bool = False) -> AsyncIterator[Any]:
+        """
+        Iterate `make_stream()` in a slot held until it is exhausted. A
+        stream rate limited before its first item is retried; once items
+        have been yielded, errors are passed on.
+
+        With `buffered`, the stream is read as fast as it arrives and its
+        items wait in memory for the consumer, so the slot is released when
+        the call ends rather than when a slow consumer catches up.
+        """
+        if buffered:
+            async with aclosing(self._buffered(pool_name, make_stream, cost)) as items:
+                async for item in items:
+                    yield item
+            return
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self.slot(pool_name, cost):
+                    async for item in make_stream():
+                        started = True
+                        yield item
+                return
+            except Exception as e:
+                if started or not self._should_retry(pool_name, e, attempt):
+                    raise
+                attempt += 1
+
+    async def _buffered(self, pool_name: str, make_stream: Callable[[], AsyncIterator[Any]],
+                        cost: float) -> AsyncIterator[Any]:
+        items: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def read():
+            try:
+                async for item in self.stream(pool_name, make_stream, cost):
+                    items.put_nowait(item)
+            except Exception as e:
+                items.put_nowait(_Failure(e))
+            else:
+                items.put_nowait(end)
+
+        # The reader task inherits this context, so its calls keep the caller's session
+        reader = asyncio.ensure_future(read())
+        try:
+            while True:
+                item = await items.get()
+                if item is end:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    def queued(self, pool_name: str) -> int:
+        """Calls waiting for admission to `pool_name`."""
+        return self.pools[pool_name].waiting if self.enabled else 0
+
+    def _should_retry(self, pool_name: str, error: Exception, attempt: int) -> bool:
+        if rate_limit_delay(error) is None or attempt >= self.max_retries:
+            return False
+        logger.warning(f"Rate limited in pool '{pool_name}', retrying (attempt {attempt + 2}/{self.max_retries + 1})")
+        return True
+
+    # Admission
+
+    async def _acquire(self, pool: _Pool, cost: float) -> None:
+        now = time.monotonic()
+        if not pool.queues and pool.blocked_for(cost, now) is None:
+            pool.take(cost)
+            self._observe(pool, 0.0)
+            return
+
+        caller = _caller.get() or Caller('anonymous')
+        waiter = _Waiter(caller, cost, asyncio.get_running_loop().create_future())
+        pool.queues.setdefault(caller.session, deque()).append(waiter)
+        self._dispatch(pool)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller was cancelled: give the slot back
+                self._release(pool, adjust=False)
+            else:
+                self._forget(pool, waiter)
+                self._dispatch(pool)
+            raise
+        self._observe(pool, time.perf_counter() - waiter.queued_at)
+
+    def _forget(self, pool: _Pool, waiter: _Waiter) -> None:
+        queue = pool.queues.get(waiter.caller.session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del pool.queues[waiter.caller.session]
+
+    def _dispatch(self, pool: _Pool) -> None:
+        """Start queued calls in round-robin session order while the pool has room."""
+        if pool.timer is not None:
+            pool.timer.cancel()
+            pool.timer = None
+        while pool.queues:
+            session, queue = next(iter(pool.queues.items()))
+            waiter = queue[0]
+            delay = pool.blocked_for(waiter.cost, time.monotonic())
+            if delay is not None:
+                if delay > 0:
+                    # Blocked on time (rate budget or backoff) rather than on a release
+                    pool.timer = asyncio.get_running_loop().call_later(delay, self._dispatch, pool)
+                break
+            queue.popleft()
+            # The session goes to the back of the rotation, or leaves it
+            del pool.queues[session]
+            if queue:
+                pool.queues[session] = queue
+            pool.take(waiter.cost)
+            waiter.future.set_result(None)
+        metrics.SCHEDULER_QUEUED.set(pool.waiting, pool=pool.name)
+        self._notify_positions(pool)
+
+    def _notify_positions(self, pool: _Pool) -> None:
+        """
+        Tell waiting callers whose place in line changed where they stand:
+        the rank of their session in the rotation, or 0 once nothing of
+        theirs is waiting any more.
+        """
+        positions: Dict[Caller, int] = {}
+        for rank, queue in enumerate(pool.queues.values(), 1):
+            positions.setdefault(queue[0].caller, rank)
+        for caller in [caller for caller in pool.positions if caller not in positions]:
+            del pool.positions[caller]
+            if caller.notify is not None:
+                caller.notify(pool.name, 0)
+        for caller, rank in positions.items():
+            if pool.positions.get(caller) != rank:
+                pool.positions[caller] = rank
+                if caller.notify is not None:
+                    caller.notify(pool.name, rank)
+
+    def _release(self, pool: _Pool, rate_limited: Optional[float] = None, adjust: bool = True) -> None:
+        """
+        Free a slot. A rate-limited call shrinks the concurrency limit and
+        any other call grows it, unless `adjust` is False (a cancelled call).
+        """
+        pool.in_flight -= 1
+        now = time.monotonic()
+        if rate_limited is not None:
+            metrics.RATE_LIMITED.inc(pool=pool.name)
+            pool.backoff = min(self.max_backoff_seconds, max(self.backoff_seconds, pool.backoff * 2))
+            delay = rate_limited or pool.backoff
+            pool.paused_until = max(pool.paused_until, now + delay)
+            # One decrease per backoff window, however many calls hit the limit in it
+            if now - pool.last_decrease > delay:
+                pool.limit = max(1.0, pool.limit * self.decrease_factor)
+                pool.last_decrease = now
+                logger.warning(f"Pool '{pool.name}' rate limited: pausing {delay:.1f}s, "
+                               f"concurrency limit now {int(pool.limit)}")
+        elif adjust:
+            pool.limit = min(pool.max_concurrent, pool.limit + 1 / pool.limit)
+            pool.backoff = 0.0
+        metrics.SCHEDULER_LIMIT.set(int(pool.limit), pool=pool.name)
+        metrics.SCHEDULER_IN_FLIGHT.set(pool.in_flight, pool=pool.name)
+        self._dispatch(pool)
+
+    def _observe(self, pool: _Pool, waited: float) -> None:
+        metrics.SCHEDULER_WAIT_SECONDS.observe(waited, pool=pool.name)
+        metrics.SCHEDULER_IN_FLIGHT.set(pool.in_flight, pool=pool.name)
+
+
+# Shared by the crew runs and TTS calls of every request
+scheduler = CallScheduler()
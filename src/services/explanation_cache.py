@@ -0,0 +1,210 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from src.models.math_models import MathExplanation
+
+logger = logging.getLogger(__name__)
+
+# Unicode math symbols students paste in, mapped to their ASCII form
+SYMBOL_REPLACEMENTS = {
+    '×': '*', '·': '*', '⋅': '*', '÷': '/', '−': '-', '–': '-',
+    '²': '^2', '³': '^3', '√': 'sqrt', '≤': '<=', '≥': '>=', '≠': '!='
+}
+_SYMBOLS = re.compile('|'.join(re.escape(symbol) for symbol in SYMBOL_REPLACEMENTS))
+_WHITESPACE = re.compile(r'\s+')
+_OPERATOR_SPACING = re.compile(r'\s*([-+*/=^<>!(),])\s*')
+_IMPLICIT_TIMES = re.compile(r'(?<=\d)\s*\*\s*(?=[a-z(])')
+# A '!' right after a number, letter or ')' is a factorial, not punctuation
+_TRAILING_PUNCTUATION = re.compile(r'(?:[\s?.]|(?<![a-z0-9)!])!)+$')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a prompt used as the cache key.
+
+    Lower-cases, folds unicode math symbols to ASCII, collapses whitespace,
+    drops spacing around operators, writes `2*x` as `2x` and strips
+    trailing punctuation, so "Solve 2x + 3 = 7?" and "solve 2x+3=7" match
+    while "what is 5!" and "what is 5" do not.
+    """
+    text = _SYMBOLS.sub(lambda m: SYMBOL_REPLACEMENTS[m.group(0)], prompt.lower())
+    text = _WHITESPACE.sub(' ', text).strip()
+    text = _OPERATOR_SPACING.sub(r'\1', text)
+    text = _IMPLICIT_TIMES.sub('', text)
+    return _TRAILING_PUNCTUATION.sub('', text)
+
+
+def prompt_cache_key(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+
+
+class CacheBackend:
+    """Storage interface for the explanation cache. Values are JSON strings."""
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (value, stored_at) or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU backend."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """On-disk backend that survives restarts and is shared by worker processes."""
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 10000):
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS explanations ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS explanations_accessed '
+                'ON explanations (accessed_at)'
+            )
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT value, stored_at FROM explanations WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    'UPDATE explanations SET accessed_at = ? WHERE key = ?',
+                    (time.time(), key)
+                )
+            return row
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?)',
+                (key, value, now, now)
+            )
+            self._conn.execute(
+                'DELETE FROM explanations WHERE key IN ('
+                'SELECT key FROM explanations ORDER BY accessed_at DESC '
+                'LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM explanations WHERE key = ?', (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM explanations')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM explanations').fetchone()[0]
+
+
+class ExplanationCache:
+    """Caches MathExplanation results by normalized prompt, with a TTL."""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: Optional[float] = None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'expired': 0}
+
+    def get(self, prompt: str) -> Optional[MathExplanation]:
+        key = prompt_cache_key(prompt)
+        entry = self.backend.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        value, stored_at = entry
+        if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+            self.backend.delete(key)
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        try:
+            explanation = MathExplanation.model_validate_json(value)
+        except ValueError as e:
+            logger.warning(f"Dropping unreadable cached explanation: {str(e)}")
+            self.backend.delete(key)
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return explanation
+
+    def set(self, prompt: str, explanation: MathExplanation) -> None:
+        if not explanation.steps:
+            return
+        self.backend.set(prompt_cache_key(prompt), explanation.model_dump_json())
+
+
+def create_explanation_cache(config: Dict) -> Optional[ExplanationCache]:
+    """Build the cache described by EXPLANATION_CACHE_CONFIG, or None if disabled."""
+    if not config.get('enabled'):
+        return None
+    if config['backend'] == 'sqlite':
+        backend = SQLiteBackend(config['path'], max_entries=config['max_entries'])
+    elif config['backend'] == 'memory':
+        backend = MemoryBackend(max_entries=config['max_entries'])
+    else:
+        raise ValueError(f"Unknown explanation cache backend: {config['backend']}")
+    return ExplanationCache(backend, ttl_seconds=config.get('ttl_seconds'))
@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, TypeVar
+
+from src.services import metrics
+
+T = TypeVar('T')
+
+
+class LatencyWindow:
+    """The most recent latencies of one kind of call, for quantile estimates."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile of the window, or None until it holds min_samples latencies."""
+        if len(self.samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _first_success(attempts: List[asyncio.Future]) -> asyncio.Future:
+    """The first attempt to finish without an error; raises the first error if all of them fail."""
+    pending = set(attempts)
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for attempt in sorted(done, key=attempts.index):
+            failure = attempt.exception()
+            # An exhausted stream is an answer too, just an empty one
+            if failure is None or isinstance(failure, StopAsyncIteration):
+                return attempt
+            error = error or failure
+    raise error
+
+
+async def _cancel(attempts: List[asyncio.Future]) -> None:
+    for attempt in attempts:
+        attempt.cancel()
+    await asyncio.gather(*attempts, return_exceptions=True)
+
+
+def _count(call: str, attempts: List[asyncio.Future], winner: asyncio.Future) -> None:
+    if len(attempts) > 1:
+        metrics.HEDGED_CALLS.inc(call=call, winner='primary' if winner is attempts[0] else 'hedge')
+
+
+async def hedged(make_call: Callable[[], Awaitable[T]], hedge_after: Optional[float], call: str,
+                 allow_hedge: Callable[[], bool] = lambda: True) -> T:
+    """
+    Await make_call(). If it has not finished after `hedge_after` seconds
+    (and allow_hedge() agrees at that point), start a duplicate call; the
+    first to succeed wins and the other is cancelled. With hedge_after
+    None, no duplicate is made.
+    """
+    attempts = [asyncio.ensure_future(make_call())]
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+            if not done and allow_hedge():
+                attempts.append(asyncio.ensure_future(make_call()))
+        winner = await _first_success(attempts)
+        _count(call, attempts, winner)
+        return winner.result()
+    finally:
+        await _cancel([attempt for attempt in attempts if not attempt.done()])
+
+
+async def _next(stream: AsyncIterator[T]) -> T:
+    return await stream.__anext__()
+
+
+async def hedged_stream(make_stream: Callable[[], AsyncIterator[T]], hedge_after: Optional[float], call: str,
+                        allow_hedge: Callable[[], bool] = lambda: True) -> AsyncIterator[T]:
+    """
+    Like hedged(), for streams: the race is to the first item, and the
+    stream that delivers it first is then read to the end.
+    """
+    streams: List[AsyncIterator[T]] = [make_stream()]
+    firsts = [asyncio.ensure_future(_next(streams[0]))]
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(firsts, timeout=hedge_after)
+            if not done and allow_hedge():
+                streams.append(make_stream())
+                firsts.append(asyncio.ensure_future(_next(streams[1])))
+        winner = await _first_success(firsts)
+        _count(call, firsts, winner)
+        await _cancel([first for first in firsts if first is not winner])
+        if winner.exception() is not None:
+            return
+        yield winner.result()
+        async for item in streams[firsts.index(winner)]:
+            yield item
+    finally:
+        await _cancel([first for first in firsts if not first.done()])
+        for stream in streams:
+            if hasattr(stream, 'aclose'):
+                await stream.aclose()
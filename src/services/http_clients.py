@@ -0,0 +1,133 @@
+import importlib.util
+import logging
+from typing import Any, Dict, List, Tuple
+
+from src.config.settings import HTTP_CLIENT_CONFIG
+from src.services import metrics
+from src.utils.lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+# httpx and openai are imported on first use to keep them out of server startup
+
+ASYNC, SYNC = 'async', 'sync'
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 is used when configured and the h2 package is installed."""
+    return HTTP_CLIENT_CONFIG['http2'] and importlib.util.find_spec('h2') is not None
+
+
+def _client_options() -> Dict[str, Any]:
+    import httpx
+    return {
+        'http2': http2_enabled(),
+        'limits': httpx.Limits(
+            max_connections=HTTP_CLIENT_CONFIG['max_connections'],
+            max_keepalive_connections=HTTP_CLIENT_CONFIG['max_keepalive_connections'],
+            keepalive_expiry=HTTP_CLIENT_CONFIG['keepalive_expiry_seconds']
+        ),
+        'timeout': httpx.Timeout(
+            connect=HTTP_CLIENT_CONFIG['connect_timeout_seconds'],
+            read=HTTP_CLIENT_CONFIG['read_timeout_seconds'],
+            write=HTTP_CLIENT_CONFIG['write_timeout_seconds'],
+            pool=HTTP_CLIENT_CONFIG['pool_timeout_seconds']
+        ),
+        'follow_redirects': True
+    }
+
+
+def _is_connect(event_name: str) -> bool:
+    return event_name == 'connection.connect_tcp.complete'
+
+
+def _build_async_http():
+    import httpx
+
+    # httpcore reports connection events to a per-request trace callback
+    async def trace(event_name, info):
+        if _is_connect(event_name):
+            metrics.HTTP_CONNECTIONS_OPENED.inc(client=ASYNC)
+
+    async def on_request(request):
+        metrics.HTTP_REQUESTS.inc(client=ASYNC)
+        request.extensions['trace'] = trace
+
+    return httpx.AsyncClient(event_hooks={'request': [on_request]}, **_client_options())
+
+
+def _build_sync_http():
+    import httpx
+
+    def trace(event_name, info):
+        if _is_connect(event_name):
+            metrics.HTTP_CONNECTIONS_OPENED.inc(client=SYNC)
+
+    def on_request(request):
+        metrics.HTTP_REQUESTS.inc(client=SYNC)
+        request.extensions['trace'] = trace
+
+    return httpx.Client(event_hooks={'request': [on_request]}, **_client_options())
+
+
+def _build_openai_client():
+    from openai import AsyncOpenAI
+    http = async_http.get()
+    logger.info(f"OpenAI client pooled over {'HTTP/2' if http2_enabled() else 'HTTP/1.1'} "
+                f"(max {HTTP_CLIENT_CONFIG['max_connections']} connections)")
+    return AsyncOpenAI(http_client=http)
+
+
+# Used from the shared event loop: TTS and the crew's streamed completions
+async_http = Lazy(_build_async_http, 'pooled async HTTP client')
+# Used from the crew's worker threads: LLM calls made by crewai through litellm
+sync_http = Lazy(_build_sync_http, 'pooled sync HTTP client')
+
+# One OpenAI client over the async pool, shared by every request
+openai_client = Lazy(_build_openai_client, 'OpenAI client')
+
+
+def install_litellm_session() -> None:
+    """Make litellm (and so every crewai LLM) send its OpenAI calls through the sync pool."""
+    import litellm
+    if litellm.client_session is None:
+        litellm.client_session = sync_http.get()
+
+
+def _connection_states(client) -> List[Tuple[str, str]]:
+    """(state, protocol) of every connection in a client's pool."""
+    # httpx does not expose its pool; the httpcore pool behind the default
+    # transport does
+    pool = getattr(getattr(client, '_transport', None), '_pool', None)
+    return [
+        ('idle' if connection.is_idle() else 'active', 'HTTP/2' if 'HTTP/2' in connection.info() else 'HTTP/1.1')
+        for connection in list(getattr(pool, 'connections', ()))
+    ]
+
+
+def _built_clients() -> List[Tuple[str, Any]]:
+    return [(name, lazy.get()) for name, lazy in ((ASYNC, async_http), (SYNC, sync_http)) if lazy.ready]
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connections of each client pool built so far, by state, how many use HTTP/2, and the pool limit."""
+    stats = {}
+    for name, client in _built_clients():
+        states = _connection_states(client)
+        stats[name] = {
+            'active': sum(1 for state, _ in states if state == 'active'),
+            'idle': sum(1 for state, _ in states if state == 'idle'),
+            'http2': sum(1 for _, protocol in states if protocol == 'HTTP/2'),
+            'max_connections': HTTP_CLIENT_CONFIG['max_connections']
+        }
+    return stats
+
+
+def update_pool_metrics() -> None:
+    """Refresh the pool gauges; called when metrics are scraped."""
+    for name, client in _built_clients():
+        states = _connection_states(client)
+        for state in ('active', 'idle'):
+            for protocol in ('HTTP/1.1', 'HTTP/2'):
+                metrics.HTTP_POOL_CONNECTIONS.set(states.count((state, protocol)), client=name, state=state,
+                                                  protocol=protocol)
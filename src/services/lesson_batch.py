@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.services.explanation_cache import prompt_cache_key
+from src.services.lesson_store import Lesson, LessonStore
+from src.services.local_solver import solve_locally
+from src.utils.latex_formatter import format_board_latex
+
+logger = logging.getLogger(__name__)
+
+# Per worker process state, set up once by _init_worker
+_worker: Dict[str, object] = {}
+
+
+def read_prompts(path: Union[str, Path]) -> List[str]:
+    """
+    Prompts from a text file, one per line.
+
+    Blank lines and lines starting with '#' are skipped, and prompts that
+    normalize to the same lesson are kept only once.
+    """
+    prompts, seen = [], set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            prompt = line.strip()
+            if not prompt or prompt.startswith('#'):
+                continue
+            key = prompt_cache_key(prompt)
+            if key not in seen:
+                seen.add(key)
+                prompts.append(prompt)
+    return prompts
+
+
+async def build_lesson(crew, prompt: str, synthesize, tts_slots: asyncio.Semaphore) -> Lesson:
+    """Explain `prompt` locally or with the crew and synthesize every step's audio."""
+    solution = solve_locally(prompt)
+    if solution is not None:
+        explanation = solution.explanation
+    else:
+        result = await crew.kickoff({'user_query': prompt})
+        explanation = result.pydantic
+    if explanation is None or not explanation.steps:
+        raise ValueError("The crew produced no explanation steps")
+
+    async def speak(text: str) -> Optional[bytes]:
+        if not text:
+            return None
+        async with tts_slots:
+            audio = await synthesize(text)
+        if audio is None:
+            raise RuntimeError(f"Speech synthesis failed for: {text[:60]}")
+        return audio
+
+    audio = await asyncio.gather(*(speak(step.natural) for step in explanation.steps))
+    formatted = [format_board_latex(step.math) for step in explanation.steps]
+    return Lesson(prompt, explanation.steps, formatted, list(audio))
+
+
+def _init_worker(store_path: str, tts_concurrency: int) -> None:
+    # Imported here so the parent process never needs the crew or an API key
+    from src.crews.crew import CrewFactory
+    from src.services.tts_service import generate_speech
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _worker.update(
+        # One loop per process, so async clients stay bound to a live loop across chunks
+        loop=loop,
+        crew=CrewFactory(),
+        # Offline: wait for slow audio rather than store a lesson without it
+        synthesize=partial(generate_speech, within_deadline=False),
+        store=LessonStore(store_path),
+        tts_slots=asyncio.Semaphore(tts_concurrency)
+    )
+
+
+async def _run_chunk(prompts: List[str], concurrency: int, retries: int,
+                     backoff: float) -> List[Tuple[str, Optional[str]]]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run_one(prompt: str) -> Tuple[str, Optional[str]]:
+        async with slots:
+            error = None
+            for attempt in range(retries + 1):
+                try:
+                    lesson = await build_lesson(_worker['crew'], prompt, _worker['synthesize'], _worker['tts_slots'])
+                    # Stored as soon as it is ready, so an interrupted batch resumes from here
+                    _worker['store'].put(lesson)
+                    return prompt, None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                    if attempt < retries:
+                        delay = backoff * 2 ** attempt
+                        logger.warning(f"Lesson '{prompt}' failed ({error}), retrying in {delay:.0f}s")
+                        await asyncio.sleep(delay)
+            return prompt, error
+
+    return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
+
+
+def _process_chunk(prompts: List[str], concurrency: int, retries: int,
+                   backoff: float) -> List[Tuple[str, Optional[str]]]:
+    return _worker['loop'].run_until_complete(_run_chunk(prompts, concurrency, retries, backoff))
+
+
+def run_batch(prompts_path: Union[str, Path], store_path: Union[str, Path], processes: int = 4,
+              concurrency: int = 4, retries: int = 2, backoff: float = 5.0, tts_concurrency: int = 8,
+              force: bool = False) -> Dict[str, object]:
+    """
+    Precompute lessons for every prompt in `prompts_path` into the lesson store.
+
+    Prompts are split into chunks spread over `processes` worker processes,
+    each running `concurrency` lessons at a time on its own event loop.
+    Lessons already in the store are skipped unless `force` is set, so an
+    interrupted or partially failed batch is resumed by running it again.
+    """
+    prompts = read_prompts(prompts_path)
+    store = LessonStore(store_path)
+    pending = prompts if force else [prompt for prompt in prompts if prompt not in store]
+    store.close()
+    logger.info(f"{len(prompts)} prompts, {len(prompts) - len(pending)} already stored, {len(pending)} to generate")
+
+    report: Dict[str, object] = {'total': len(prompts), 'skipped': len(prompts) - len(pending),
+                                 'generated': 0, 'failed': {}}
+    if not pending:
+        return report
+
+    chunk_size = concurrency
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)),
+        initializer=_init_worker,
+        initargs=(str(store_path), tts_concurrency)
+    ) as pool:
+        futures = [pool.submit(_process_chunk, chunk, concurrency, retries, backoff) for chunk in chunks]
+        for future in as_completed(futures):
+            for prompt, error in future.result():
+                if error is None:
+                    report['generated'] += 1
+                else:
+                    report['failed'][prompt] = error
+                    logger.error(f"Lesson '{prompt}' failed after {retries + 1} attempts: {error}")
+            done = report['generated'] + len(report['failed'])
+            logger.info(f"Progress: {done}/{len(pending)} lessons ({time.perf_counter() - start:.0f}s elapsed)")
+    return report
@@ -0,0 +1,408 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+from src.models.math_models import Step
+from src.services.explanation_cache import prompt_cache_key
+from src.services.lesson_store import Lesson
+
+logger = logging.getLogger(__name__)
+
+# File header: magic and the log's generation id, which the index must match
+_FILE_HEADER = struct.Struct('>4s16s')
+_FILE_MAGIC = b'MBLL'
+# Record header: magic, kind, key length, payload length, CRC32 of key and payload
+_RECORD_HEADER = struct.Struct('>2sBHII')
+_RECORD_MAGIC = b'LR'
+_LESSON = 1
+_AUDIO = 2
+
+
+class LoggedLesson(Lesson):
+    """A lesson read back from the log, with its id and how it was generated."""
+
+    def __init__(self, lesson_id: str, prompt: str, steps: List[Step], formatted: List[str],
+                 audio: List[Optional[bytes]], created_at: float, timings: Dict[str, Any]):
+        super().__init__(prompt, steps, formatted, audio)
+        self.lesson_id = lesson_id
+        self.created_at = created_at
+        self.timings = timings
+
+
+class _Entry:
+    """Where a record lives in the log, plus what compaction needs to know about it."""
+
+    __slots__ = ('kind', 'key', 'offset', 'size', 'prompt_key', 'created_at', 'audio')
+
+    def __init__(self, kind: int, key: str, offset: int, size: int, prompt_key: Optional[str] = None,
+                 created_at: float = 0.0, audio: Optional[List[str]] = None):
+        self.kind = kind
+        self.key = key
+        self.offset = offset
+        self.size = size
+        self.prompt_key = prompt_key
+        self.created_at = created_at
+        self.audio = audio or []
+
+    def as_dict(self) -> Dict[str, Any]:
+        entry = {'kind': self.kind, 'key': self.key, 'offset': self.offset, 'size': self.size}
+        if self.kind == _LESSON:
+            entry.update(prompt=self.prompt_key, created=self.created_at, audio=self.audio)
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> '_Entry':
+        return cls(entry['kind'], entry['key'], entry['offset'], entry['size'],
+                   entry.get('prompt'), entry.get('created', 0.0), entry.get('audio'))
+
+
+class LessonLog:
+    """
+    Append-only log of every lesson the app generated, replayable without
+    LLM or TTS calls.
+
+    Lessons are written as zlib-compressed JSON records (natural text, raw
+    and formatted math, generation timings) that refer to their audio by
+    content hash; each audio clip is written once, uncompressed since it
+    already is. Records are only ever appended, and an index file next to
+    the log maps lesson ids and prompts to record offsets so reads are a
+    single seek. Records that reached the log but not the index (a crash
+    between the two writes) are recovered on open, and a torn record at
+    the end is cut off.
+
+    compact() rewrites the log with only the lessons worth keeping: the
+    newest keep_per_prompt recordings of each prompt, no older than
+    max_age_seconds, and the audio they use. It runs on its own once dead
+    records make up compact_garbage_ratio of a log of at least
+    compact_min_bytes; live and dead bytes are counted as records are
+    added, so checking this costs nothing per append. Safe to use from
+    several threads.
+    """
+
+    def __init__(self, path: Union[str, Path], compression_level: int = 6, keep_per_prompt: int = 1,
+                 max_age_seconds: Optional[float] = None, compact_garbage_ratio: float = 0.5,
+                 compact_min_bytes: int = 0):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(self.path.suffix + '.idx')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.keep_per_prompt = keep_per_prompt
+        self.max_age_seconds = max_age_seconds
+        self.compact_garbage_ratio = compact_garbage_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._lock = threading.Lock()
+        self._open()
+
+    # Opening and recovery
+
+    def _open(self) -> None:
+        self._lessons: Dict[str, _Entry] = {}
+        self._audio: Dict[str, _Entry] = {}
+        # Lesson ids per prompt key, oldest first
+        self._by_prompt: Dict[str, List[str]] = {}
+        self._reset_live()
+
+        if not self.path.exists() or self.path.stat().st_size < _FILE_HEADER.size:
+            self.generation = uuid.uuid4().hex
+            with open(self.path, 'wb') as f:
+                f.write(_FILE_HEADER.pack(_FILE_MAGIC, bytes.fromhex(self.generation)))
+            self._write_index([])
+        else:
+            with open(self.path, 'rb') as f:
+                magic, generation = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+            if magic != _FILE_MAGIC:
+                raise ValueError(f"{self.path} is not a lesson log")
+            self.generation = generation.hex()
+
+        self._writer: BinaryIO = open(self.path, 'ab')
+        self._reader: BinaryIO = open(self.path, 'rb')
+        self._load()
+
+    def _load(self) -> None:
+        size = self.path.stat().st_size
+        end, index_ok = _FILE_HEADER.size, False
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                index_ok = header.get('generation') == self.generation
+                for line in f if index_ok else ():
+                    entry = _Entry.from_dict(json.loads(line))
+                    if entry.offset + entry.size > size:
+                        index_ok = False
+                        break
+                    self._add(entry)
+                    end = max(end, entry.offset + entry.size)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Lesson log index {self.index_path} is damaged, rebuilding it: {str(e)}")
+            index_ok = False
+        if not index_ok:
+            self._lessons.clear()
+            self._audio.clear()
+            self._by_prompt.clear()
+            self._reset_live()
+            end = _FILE_HEADER.size
+
+        recovered = []
+        while end < size:
+            entry = self._scan(end, size)
+            if entry is None:
+                logger.warning(f"Truncating lesson log {self.path} at byte {end} of {size} (incomplete record)")
+                self._writer.truncate(end)
+                self._writer.seek(0, os.SEEK_END)
+                break
+            self._add(entry)
+            recovered.append(entry)
+            end = entry.offset + entry.size
+
+        if not index_ok:
+            self._write_index(self._entries())
+        elif recovered:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry.as_dict()) + '\n' for entry in recovered)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unindexed records from lesson log {self.path}")
+
+    def _scan(self, offset: int, size: int) -> Optional[_Entry]:
+        """The record at `offset`, or None if it is incomplete or corrupt."""
+        if offset + _RECORD_HEADER.size > size:
+            return None
+        self._reader.seek(offset)
+        magic, kind, key_size, payload_size, checksum = _RECORD_HEADER.unpack(self._reader.read(_RECORD_HEADER.size))
+        record_size = _RECORD_HEADER.size + key_size + payload_size
+        if magic != _RECORD_MAGIC or kind not in (_LESSON, _AUDIO) or offset + record_size > size:
+            return None
+        body = self._reader.read(key_size + payload_size)
+        if zlib.crc32(body) != checksum:
+            return None
+        key = body[:key_size].decode('utf-8')
+        if kind == _AUDIO:
+            return _Entry(kind, key, offset, record_size)
+        data = json.loads(zlib.decompress(body[key_size:]))
+        return _Entry(kind, key, offset, record_size, prompt_cache_key(data['prompt']), data['created_at'],
+                      [step['audio'] for step in data['steps'] if step['audio']])
+
+    def _add(self, entry: _Entry) -> None:
+        if entry.kind == _AUDIO:
+            self._audio[entry.key] = entry
+            if self._audio_refs.get(entry.key):
+                self._live_bytes += entry.size
+            return
+        self._lessons[entry.key] = entry
+        ids = self._by_prompt.setdefault(entry.prompt_key, [])
+        ids.append(entry.key)
+        self._set_live(entry, True)
+        if 0 < self.keep_per_prompt < len(ids):
+            # The prompt's oldest kept recording falls out of the window
+            self._set_live(self._lessons[ids[-self.keep_per_prompt - 1]], False)
+
+    # Live bytes are what compaction would keep under keep_per_prompt,
+    # counted as records are added instead of by scanning the index on
+    # every append. Lessons past max_age_seconds still count as live until
+    # a compaction drops them
+
+    def _reset_live(self) -> None:
+        self._live_bytes = 0
+        # Live lessons referring to each audio clip
+        self._audio_refs: Dict[str, int] = {}
+
+    def _set_live(self, entry: _Entry, live: bool) -> None:
+        change = 1 if live else -1
+        self._live_bytes += change * entry.size
+        for digest in set(entry.audio):
+            refs = self._audio_refs.get(digest, 0) + change
+            self._audio_refs[digest] = refs
+            # A clip is live while any live lesson uses it
+            if refs == (1 if live else 0) and digest in self._audio:
+                self._live_bytes += change * self._audio[digest].size
+
+    def _entries(self) -> List[_Entry]:
+        return sorted(list(self._audio.values()) + list(self._lessons.values()), key=lambda e: e.offset)
+
+    def _write_index(self, entries: List[_Entry], path: Optional[Path] = None) -> None:
+        path = path or self.index_path
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'generation': self.generation}) + '\n')
+            f.writelines(json.dumps(entry.as_dict()) + '\n' for entry in entries)
+
+    # Writing
+
+    def record(self, lesson: Lesson, timings: Optional[Dict[str, Any]] = None) -> str:
+        """Append `lesson` and return its lesson id."""
+        lesson_id = uuid.uuid4().hex
+        created_at = time.time()
+        with self._lock:
+            entries, digests = [], []
+            for audio in lesson.audio:
+                digest = hashlib.sha256(audio).hexdigest()[:32] if audio else None
+                if digest is not None and digest not in self._audio and digest not in digests:
+                    entries.append(self._append(_AUDIO, digest, audio))
+                digests.append(digest)
+            data = {
+                'prompt': lesson.prompt,
+                'created_at': created_at,
+                'timings': timings or {},
+                'steps': [
+                    {'natural': step.natural, 'math': step.math, 'formatted': formatted, 'audio': digest}
+                    for step, formatted, digest in zip(lesson.steps, lesson.formatted, digests)
+                ]
+            }
+            payload = zlib.compress(json.dumps(data).encode('utf-8'), self.compression_level)
+            entry = self._append(_LESSON, lesson_id, payload)
+            entry.prompt_key, entry.created_at = prompt_cache_key(lesson.prompt), created_at
+            entry.audio = [digest for digest in digests if digest]
+            entries.append(entry)
+            # The log is written before the index, so a crash in between loses nothing
+            self._writer.flush()
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(e.as_dict()) + '\n' for e in entries)
+            for e in entries:
+                self._add(e)
+
+            garbage, size = self._garbage_bytes(), self._size()
+            if size >= self.compact_min_bytes and garbage > self.compact_garbage_ratio * size:
+                self._compact()
+        return lesson_id
+
+    def _append(self, kind: int, key: str, payload: bytes) -> _Entry:
+        key_bytes = key.encode('utf-8')
+        body = key_bytes + payload
+        offset = self._writer.tell()
+        self._writer.write(_RECORD_HEADER.pack(_RECORD_MAGIC, kind, len(key_bytes), len(payload), zlib.crc32(body)))
+        self._writer.write(body)
+        return _Entry(kind, key, offset, _RECORD_HEADER.size + len(body))
+
+    # Reading
+
+    def get(self, lesson_id: str) -> Optional[LoggedLesson]:
+        with self._lock:
+            entry = self._lessons.get(lesson_id)
+            return self._read_lesson(entry) if entry is not None else None
+
+    def latest(self, prompt: str) -> Optional[LoggedLesson]:
+        """The most recent recording of `prompt`, or of an equivalent prompt."""
+        with self._lock:
+            ids = self._by_prompt.get(prompt_cache_key(prompt))
+            return self._read_lesson(self._lessons[ids[-1]]) if ids else None
+
+    def _read(self, entry: _Entry) -> bytes:
+        self._reader.seek(entry.offset + _RECORD_HEADER.size)
+        key_size = len(entry.key.encode('utf-8'))
+        return self._reader.read(entry.size - _RECORD_HEADER.size)[key_size:]
+
+    def _read_lesson(self, entry: _Entry) -> Optional[LoggedLesson]:
+        try:
+            data = json.loads(zlib.decompress(self._read(entry)))
+            steps = [Step(natural=step['natural'], math=step['math']) for step in data['steps']]
+            audio = [self._read(self._audio[step['audio']]) if step['audio'] else None for step in data['steps']]
+            formatted = [step['formatted'] for step in data['steps']]
+        except (ValueError, KeyError, TypeError, zlib.error) as e:
+            logger.warning(f"Ignoring unreadable logged lesson {entry.key}: {str(e)}")
+            return None
+        return LoggedLesson(entry.key, data['prompt'], steps, formatted, audio, data['created_at'], data['timings'])
+
+    # Compaction
+
+    def _live(self) -> List[_Entry]:
+        """Records compaction keeps, in log order."""
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds is not None else None
+        lessons = []
+        for ids in self._by_prompt.values():
+            for lesson_id in ids[-self.keep_per_prompt:]:
+                entry = self._lessons[lesson_id]
+                if cutoff is None or entry.created_at >= cutoff:
+                    lessons.append(entry)
+        audio = {digest for entry in lessons for digest in entry.audio}
+        return sorted(lessons + [self._audio[digest] for digest in audio if digest in self._audio],
+                      key=lambda e: e.offset)
+
+    def _size(self) -> int:
+        return self._writer.tell()
+
+    def _garbage_bytes(self) -> int:
+        return self._size() - _FILE_HEADER.size - self._live_bytes
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'lessons': len(self._lessons),
+                'audio_clips': len(self._audio),
+                'bytes': self._size(),
+                'garbage_bytes': self._garbage_bytes()
+            }
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the log with only the records worth keeping; returns bytes before and after."""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self) -> Dict[str, int]:
+        start, before = time.perf_counter(), self._size()
+        live = self._live()
+        generation = uuid.uuid4().hex
+        log_tmp = self.path.with_suffix(self.path.suffix + '.compact')
+        index_tmp = self.index_path.with_suffix(self.index_path.suffix + '.compact')
+
+        self._writer.flush()
+        entries = []
+        with open(log_tmp, 'wb') as f:
+            f.write(_FILE_HEADER.pack(_FILE_MAGIC, bytes.fromhex(generation)))
+            for entry in live:
+                self._reader.seek(entry.offset)
+                offset = f.tell()
+                f.write(self._reader.read(entry.size))
+                entries.append(_Entry(entry.kind, entry.key, offset, entry.size,
+                                      entry.prompt_key, entry.created_at, entry.audio))
+            f.flush()
+            os.fsync(f.fileno())
+        self.generation = generation
+        self._write_index(entries, index_tmp)
+
+        # The index names the log generation it belongs to, so a crash between
+        # the two renames leaves a mismatch that the next open rebuilds from the log
+        self._writer.close()
+        self._reader.close()
+        os.replace(log_tmp, self.path)
+        os.replace(index_tmp, self.index_path)
+        self._open()
+
+        after = self._size()
+        logger.info(f"Compacted lesson log {self.path}: {before} -> {after} bytes, "
+                    f"{len(self._lessons)} lessons kept in {time.perf_counter() - start:.2f}s")
+        return {'before': before, 'after': after}
+
+    def __contains__(self, lesson_id: str) -> bool:
+        with self._lock:
+            return lesson_id in self._lessons
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lessons)
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+
+
+def create_lesson_log(config: Dict) -> Optional[LessonLog]:
+    """Open the log described by LESSON_LOG_CONFIG, or None if disabled."""
+    if not config.get('enabled'):
+        return None
+    return LessonLog(
+        config['path'],
+        compression_level=config['compression_level'],
+        keep_per_prompt=config['keep_per_prompt'],
+        max_age_seconds=config['max_age_seconds'],
+        compact_garbage_ratio=config['compact_garbage_ratio'],
+        compact_min_bytes=config['compact_min_bytes']
+    )
@@ -0,0 +1,131 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from src.models.math_models import MathExplanation, Step
+from src.services.explanation_cache import prompt_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class Lesson:
+    """A fully precomputed lesson: steps, their formatted boards and their audio."""
+
+    def __init__(self, prompt: str, steps: List[Step], formatted: List[str], audio: List[Optional[bytes]]):
+        if not len(steps) == len(formatted) == len(audio):
+            raise ValueError("A lesson needs exactly one formatted board and one audio entry per step")
+        self.prompt = prompt
+        self.steps = steps
+        self.formatted = formatted
+        self.audio = audio
+
+    @property
+    def explanation(self) -> MathExplanation:
+        return MathExplanation(problem=self.prompt, steps=self.steps)
+
+    def audio_for(self, text: str) -> Optional[bytes]:
+        """Stored audio of the step narrated with `text`."""
+        for step, audio in zip(self.steps, self.audio):
+            if step.natural == text:
+                return audio
+        return None
+
+
+class LessonStore:
+    """
+    Precomputed lessons on disk, keyed by normalized prompt.
+
+    Filled by the `batch` command of run_crew.py and read by the web app,
+    which serves a stored lesson (including its audio) without calling the
+    LLM or TTS. Unlike the explanation cache, entries never expire.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS lessons ('
+                'key TEXT PRIMARY KEY, prompt TEXT NOT NULL, '
+                'steps TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS lesson_audio ('
+                'key TEXT NOT NULL, step INTEGER NOT NULL, audio BLOB, '
+                'PRIMARY KEY (key, step))'
+            )
+
+    def get(self, prompt: str) -> Optional[Lesson]:
+        key = prompt_cache_key(prompt)
+        with self._lock:
+            row = self._conn.execute('SELECT prompt, steps FROM lessons WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            audio_rows = self._conn.execute(
+                'SELECT step, audio FROM lesson_audio WHERE key = ? ORDER BY step', (key,)
+            ).fetchall()
+
+        stored_prompt, steps_json = row
+        try:
+            entries = json.loads(steps_json)
+            steps = [Step(natural=entry['natural'], math=entry['math']) for entry in entries]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable stored lesson for '{stored_prompt}': {str(e)}")
+            return None
+        audio: List[Optional[bytes]] = [None] * len(steps)
+        for step, data in audio_rows:
+            if step < len(audio):
+                audio[step] = data
+        return Lesson(stored_prompt, steps, [entry.get('formatted', '') for entry in entries], audio)
+
+    def put(self, lesson: Lesson) -> None:
+        """Store (or replace) a lesson atomically."""
+        key = prompt_cache_key(lesson.prompt)
+        steps_json = json.dumps([
+            {'natural': step.natural, 'math': step.math, 'formatted': formatted}
+            for step, formatted in zip(lesson.steps, lesson.formatted)
+        ])
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM lesson_audio WHERE key = ?', (key,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO lessons VALUES (?, ?, ?, ?)',
+                (key, lesson.prompt, steps_json, time.time())
+            )
+            self._conn.executemany(
+                'INSERT INTO lesson_audio VALUES (?, ?, ?)',
+                [(key, index, data) for index, data in enumerate(lesson.audio) if data is not None]
+            )
+
+    def delete(self, prompt: str) -> None:
+        key = prompt_cache_key(prompt)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM lesson_audio WHERE key = ?', (key,))
+            self._conn.execute('DELETE FROM lessons WHERE key = ?', (key,))
+
+    def __contains__(self, prompt: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM lessons WHERE key = ?', (prompt_cache_key(prompt),)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM lessons').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_lesson_store(config: Dict) -> Optional[LessonStore]:
+    """Open the store described by LESSON_STORE_CONFIG, or None if disabled."""
+    if not config.get('enabled'):
+        return None
+    return LessonStore(config['path'])
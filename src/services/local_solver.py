@@ -0,0 +1,586 @@
+import logging
+import math
+from fractions import Fraction
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.config.settings import LOCAL_SOLVER_CONFIG
+from src.models.math_models import MathExplanation, Step
+from src.utils.math_expression import (
+    BinOp, Equation, ExpressionError, Neg, Node, Num, Percent, Polynomial, apply_operation, has_decimals,
+    number_latex, parse_problem, polynomial_node, substitute, to_latex, to_polynomial, to_words, transform,
+    variables
+)
+from src.utils.number_words import number_words
+from src.utils.query_classifier import extract_expression
+
+logger = logging.getLogger(__name__)
+
+ARITHMETIC = 'arithmetic'
+LINEAR = 'linear'
+QUADRATIC = 'quadratic'
+
+_BRIDGES = ['First', 'Next', 'Then', 'After that']
+_BREAK = ' \\quad \\text{or} \\quad '
+
+
+class _Board:
+    """
+    Builds the steps of a lesson: each step adds lines to the whiteboard
+    and shows the full board so far. Highlighting (\\color{blue}) only
+    shows in the step that adds a line; later steps show it plain.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.steps: List[Step] = []
+
+    def step(self, natural: str, *lines: str) -> None:
+        shown = self.lines + list(lines)
+        self.steps.append(Step(natural=natural, math=' \\\\ '.join(f'& {line}' for line in shown)))
+        self.lines.extend(_plain(line) for line in lines)
+
+
+_HIGHLIGHT = '\\color{blue}{'
+
+
+def _blue(latex: str) -> str:
+    return f'{_HIGHLIGHT}{latex}}}'
+
+
+def _plain(latex: str) -> str:
+    """`latex` with every _blue() highlight removed."""
+    start = latex.find(_HIGHLIGHT)
+    while start != -1:
+        depth, end = 1, start + len(_HIGHLIGHT)
+        while depth:
+            depth += {'{': 1, '}': -1}.get(latex[end], 0)
+            end += 1
+        latex = latex[:start] + latex[start + len(_HIGHLIGHT):end - 1] + latex[end:]
+        start = latex.find(_HIGHLIGHT)
+    return latex
+
+
+class LocalSolution:
+    """A lesson produced without the crew, and the problem class that produced it."""
+
+    def __init__(self, problem_class: str, explanation: MathExplanation):
+        self.problem_class = problem_class
+        self.explanation = explanation
+
+
+class LocalSolver:
+    """
+    Deterministic step generator for the most common problem classes:
+    arithmetic, linear equations and quadratic equations in one variable.
+
+    The prompt's expression is parsed exactly (fractions, no floats) and a
+    lesson is written from templates: the spoken text follows the TTS rules
+    of tasks.yaml (numbers spelled out, no symbols) and every step shows
+    the full board. solve() returns None for anything outside these
+    classes, or too large to present, so the caller falls back to the crew.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or LOCAL_SOLVER_CONFIG
+        self.enabled = config['enabled']
+        self.max_steps = config['max_steps']
+        self.max_magnitude = config['max_magnitude']
+        self.max_exponent = config['max_exponent']
+        builders: Dict[str, Callable[[Union[Node, Equation], bool], Optional[List[Step]]]] = {
+            ARITHMETIC: self._arithmetic,
+            LINEAR: self._linear,
+            QUADRATIC: self._quadratic
+        }
+        self.builders = [(name, builders[name]) for name in config['problem_classes']]
+
+    def solve(self, prompt: str) -> Optional[LocalSolution]:
+        if not self.enabled:
+            return None
+        try:
+            problem = parse_problem(extract_expression(prompt))
+        except ExpressionError:
+            return None
+        decimal = has_decimals(problem)
+        for problem_class, build in self.builders:
+            try:
+                steps = build(problem, decimal)
+            except (ExpressionError, ArithmeticError) as e:
+                logger.debug(f"Local {problem_class} solver gave up on '{prompt}': {str(e)}")
+                return None
+            if steps is not None:
+                if len(steps) > self.max_steps:
+                    return None
+                return LocalSolution(problem_class, MathExplanation(problem=prompt, steps=steps))
+        return None
+
+    def _check_size(self, value: Fraction) -> Fraction:
+        if abs(value.numerator) > self.max_magnitude or value.denominator > self.max_magnitude:
+            raise ExpressionError(f"{value} is too large to present")
+        return value
+
+    # Arithmetic
+
+    def _arithmetic(self, problem: Union[Node, Equation], decimal: bool) -> Optional[List[Step]]:
+        if isinstance(problem, Equation) or variables(problem) or isinstance(problem, Num):
+            return None
+
+        # Fractions written in lowest terms inside a larger expression are numbers, not divisions
+        if self._fraction_literal(problem) is None:
+            problem = transform(problem, self._fraction_literal)
+        if isinstance(problem, Num):
+            return None
+        board = _Board()
+        board.step(f"Let's work out {to_words(problem, decimal)}, step by step.", to_latex(problem, decimal))
+        expression, count = problem, 0
+        while not isinstance(expression, Num):
+            expression, result, description = self._reduce_once(expression, decimal)
+            is_last = isinstance(expression, Num)
+            if is_last:
+                natural = f"Finally, we {description}." if count else f"We {description}."
+            else:
+                natural = f"{_BRIDGES[min(count, len(_BRIDGES) - 1)]}, we {description}."
+            line = f'= {to_latex(expression, decimal, highlight=result)}'
+            if is_last:
+                natural += f" So the answer is {self._value_words(result.value, decimal)}."
+                line = f'= \\boxed{{{self._value_latex(result.value, decimal)}}}'
+            board.step(natural, line)
+            count += 1
+        return board.steps
+
+    @staticmethod
+    def _fraction_literal(node: Node) -> Optional[Node]:
+        if not (isinstance(node, BinOp) and node.op == '/' and isinstance(node.left, Num)
+                and isinstance(node.right, Num)):
+            return None
+        a, b = node.left.value, node.right.value
+        if a.denominator != 1 or b.denominator != 1 or b <= 0 or math.gcd(int(a), int(b)) != 1 or b == 1:
+            return None
+        return Num(a / b)
+
+    def _reduce_once(self, expression: Node, decimal: bool) -> Tuple[Node, Num, str]:
+        """Evaluate the first operation whose operands are numbers (order of operations)."""
+        found: Dict[str, Any] = {}
+
+        def visit(node: Node) -> Optional[Node]:
+            if found:
+                return None
+            if isinstance(node, Neg) and isinstance(node.operand, Num):
+                # Literal negatives parse as numbers; this negates a value just worked out
+                value = node.operand.value
+                found['result'] = Num(-value)
+                found['description'] = (f"take the negative of {number_words(value, decimal)}, which gives "
+                                        f"{number_words(-value, decimal)}")
+                return found['result']
+            if isinstance(node, Percent) and isinstance(node.operand, Num):
+                value = self._check_size(node.operand.value / 100)
+                found['result'] = Num(value)
+                found['description'] = (f"write {number_words(node.operand.value, decimal)} percent as the "
+                                        f"decimal {number_words(value, True)}")
+                return found['result']
+            if isinstance(node, BinOp) and isinstance(node.left, Num) and isinstance(node.right, Num):
+                a, b = node.left.value, node.right.value
+                value = self._check_size(apply_operation(node.op, a, b, self.max_exponent))
+                found['result'] = Num(value)
+                found['description'] = (f"{self._operation_words(node.op, a, b, decimal)}, which gives "
+                                        f"{number_words(value, decimal)}")
+                return found['result']
+            return None
+
+        reduced = transform(expression, visit)
+        if not found:
+            raise ExpressionError("Nothing left to evaluate")
+        return reduced, found['result'], found['description']
+
+    @staticmethod
+    def _operation_words(op: str, a: Fraction, b: Fraction, decimal: bool) -> str:
+        first, second = number_words(a, decimal), number_words(b, decimal)
+        if op == '+':
+            return f"add {first} and {second}"
+        if op == '-':
+            return f"subtract {second} from {first}"
+        if op == '*':
+            return f"multiply {first} by {second}"
+        if op == '/':
+            return f"divide {first} by {second}"
+        if b == 2:
+            return f"square {first}"
+        if b == 3:
+            return f"cube {first}"
+        return f"raise {first} to the power of {second}"
+
+    @staticmethod
+    def _value_latex(value: Fraction, decimal: bool) -> str:
+        latex = number_latex(value, decimal)
+        decimal_form = number_latex(value, True)
+        # Fractions that terminate are also shown as a decimal
+        if latex != decimal_form and len(decimal_form) <= 8:
+            return f'{latex} = {decimal_form}'
+        return latex
+
+    @staticmethod
+    def _value_words(value: Fraction, decimal: bool) -> str:
+        words, decimal_words = number_words(value, decimal), number_words(value, True)
+        if words != decimal_words and len(number_latex(value, True)) <= 8:
+            return f"{words}, or {decimal_words}"
+        return words
+
+    # Equations
+
+    def _polynomial(self, problem: Union[Node, Equation], max_degree: int) -> Optional[Tuple[str, Polynomial, Polynomial]]:
+        """(variable, left, right) for an equation in one variable of at most `max_degree`."""
+        if not isinstance(problem, Equation):
+            return None
+        names = variables(problem)
+        if len(names) != 1:
+            return None
+        variable = names.pop()
+        try:
+            left = to_polynomial(problem.left, variable, max_degree)
+            right = to_polynomial(problem.right, variable, max_degree)
+        except ExpressionError:
+            return None
+        for value in list(left.values()) + list(right.values()):
+            self._check_size(value)
+        return variable, left, right
+
+    def _linear(self, problem: Union[Node, Equation], decimal: bool) -> Optional[List[Step]]:
+        parsed = self._polynomial(problem, 1)
+        if parsed is None:
+            return None
+        x, left, right = parsed
+        if not (left.get(1) or right.get(1)):
+            return None
+
+        def words(value: Fraction) -> str:
+            return number_words(value, decimal)
+
+        def latex(value: Fraction) -> str:
+            return number_latex(value, decimal)
+
+        def equation(l: Polynomial, r: Polynomial) -> Equation:
+            return Equation(polynomial_node(l, x), polynomial_node(r, x))
+
+        board = _Board()
+        board.step(f"Let's solve {to_words(problem, decimal)}, step by step. "
+                   f"Our goal is to get {x} by itself on one side.", to_latex(problem, decimal))
+        count = 0
+
+        def bridge() -> str:
+            nonlocal count
+            count += 1
+            return _BRIDGES[min(count - 1, len(_BRIDGES) - 1)]
+
+        simplified = equation(left, right)
+        if to_latex(simplified, decimal) != to_latex(problem, decimal):
+            board.step(f"{bridge()}, we simplify each side by expanding and combining like terms. "
+                       f"That gives {to_words(simplified, decimal)}.", _blue(to_latex(simplified, decimal)))
+
+        if right.get(1):
+            term = polynomial_node({1: abs(right[1])}, x)
+            verb, sign = ('subtract', '-') if right[1] > 0 else ('add', '+')
+            moved = f'{sign} {to_latex(term, decimal)}'
+            left = {d: c for d, c in {1: left.get(1, Fraction(0)) - right[1], 0: left.get(0, Fraction(0))}.items() if c}
+            right = {d: c for d, c in right.items() if d != 1}
+            operation = (f'{to_latex(simplified.left, decimal)} {_blue(moved)} = '
+                         f'{to_latex(simplified.right, decimal)} {_blue(moved)}')
+            target = 'to' if verb == 'add' else 'from'
+            board.step(f"{bridge()}, we {verb} {to_words(term, decimal)} {target} both sides, "
+                       f"so that all the {x} terms are on the left.",
+                       operation, to_latex(equation(left, right), decimal))
+
+        if not left.get(1):
+            # The variable cancelled out
+            constant, other = left.get(0, Fraction(0)), right.get(0, Fraction(0))
+            if constant == other:
+                board.step(f"The {x} terms cancel, and we are left with {words(constant)} equals {words(other)}, "
+                           f"which is always true. So every value of {x} is a solution.",
+                           '\\boxed{\\text{All real numbers}}')
+            else:
+                board.step(f"The {x} terms cancel, and we are left with {words(constant)} equals {words(other)}, "
+                           f"which is never true. So this equation has no solution.",
+                           '\\boxed{\\text{No solution}}')
+            return board.steps
+
+        a, b, c = left[1], left.get(0, Fraction(0)), right.get(0, Fraction(0))
+        if b:
+            current = equation(left, right)
+            verb, sign = ('subtract', '-') if b > 0 else ('add', '+')
+            moved = f'{sign} {latex(abs(b))}'
+            target = 'to' if verb == 'add' else 'from'
+            board.step(f"{bridge()}, we {verb} {words(abs(b))} {target} both sides to move the constant "
+                       f"to the right side.",
+                       f'{to_latex(current.left, decimal)} {_blue(moved)} = {to_latex(current.right, decimal)} '
+                       f'{_blue(moved)}',
+                       to_latex(equation({1: a}, {0: c - b} if c - b else {}), decimal))
+            c -= b
+
+        solution = self._check_size(c / a)
+        if a != 1:
+            ax = to_latex(polynomial_node({1: a}, x), decimal)
+            if a.denominator == 1 or decimal:
+                board.step(f"{bridge()}, we divide both sides by {words(a)}.",
+                           f'\\frac{{{ax}}}{{{_blue(latex(a))}}} = \\frac{{{latex(c)}}}{{{_blue(latex(a))}}}',
+                           f'{x} = {latex(solution)}')
+            else:
+                reciprocal = 1 / a
+                board.step(f"{bridge()}, we multiply both sides by {words(reciprocal)}.",
+                           f'{_blue(latex(reciprocal))} \\cdot {ax} = {_blue(latex(reciprocal))} \\cdot '
+                           f'{latex(c) if c >= 0 else f"({latex(c)})"}',
+                           f'{x} = {latex(solution)}')
+        if count == 0:
+            # Already solved as written (x = c)
+            return None
+
+        left_check = substitute(problem.left, x, solution)
+        right_check = substitute(problem.right, x, solution)
+        value = self._evaluate(problem.left, x, solution)
+        check = f'{to_latex(left_check, decimal)} = {latex(value)}'
+        if not isinstance(problem.right, Num):
+            check += f' \\quad \\text{{and}} \\quad {to_latex(right_check, decimal)} = {latex(value)}'
+        board.step(f"Let's check by putting {words(solution)} back into the original equation. "
+                   f"Both sides come out to {words(value)}, so the answer is correct.",
+                   f'\\text{{Check: }} {check}')
+        board.step(f"So the solution is {x} equals {words(solution)}.",
+                   f'\\boxed{{{x} = {latex(solution)}}}')
+        return board.steps
+
+    def _evaluate(self, node: Node, variable: str, value: Fraction) -> Fraction:
+        polynomial = to_polynomial(node, variable, 2)
+        return self._check_size(sum((c * value ** d for d, c in polynomial.items()), Fraction(0)))
+
+    def _quadratic(self, problem: Union[Node, Equation], decimal: bool) -> Optional[List[Step]]:
+        parsed = self._polynomial(problem, 2)
+        if parsed is None:
+            return None
+        x, left, right = parsed
+        polynomial = {d: c for d, c in ((d, left.get(d, Fraction(0)) - right.get(d, Fraction(0)))
+                                         for d in (0, 1, 2)) if c}
+        if 2 not in polynomial:
+            return None
+
+        board = _Board()
+        board.step(f"Let's solve {to_words(problem, decimal)}, step by step.", to_latex(problem, decimal))
+        count = 0
+
+        def bridge() -> str:
+            nonlocal count
+            count += 1
+            return _BRIDGES[min(count - 1, len(_BRIDGES) - 1)]
+
+        def standard(poly: Polynomial) -> Equation:
+            return Equation(polynomial_node(poly, x), Num(Fraction(0)))
+
+        if 1 not in polynomial:
+            # No x term: isolate x squared (on the side it was written on) and take square roots
+            if not left.get(2):
+                polynomial = {d: -c for d, c in polynomial.items()}
+                left = right
+            roots = self._solve_by_square_root(board, bridge, x, polynomial[2], polynomial.get(0, Fraction(0)),
+                                               bool(left.get(0)), to_latex(problem, decimal), decimal)
+            return self._conclude(board, x, roots)
+
+        if to_latex(standard(polynomial)) != to_latex(problem):
+            board.step(f"{bridge()}, we move every term to the left side and combine like terms, "
+                       f"so the equation equals zero.", _blue(to_latex(standard(polynomial))))
+
+        # Whole-number coefficients with no common factor and a positive leading term
+        denominators = math.lcm(*(c.denominator for c in polynomial.values()))
+        numerators = [int(c * denominators) for c in polynomial.values()]
+        factor = Fraction(denominators, math.gcd(*numerators))
+        if polynomial[2] < 0:
+            factor = -factor
+        if factor != 1:
+            polynomial = {d: c * factor for d, c in polynomial.items()}
+            if factor.denominator == 1:
+                how = f"multiply both sides by {number_words(factor)}"
+            else:
+                how = f"divide both sides by {number_words(1 / factor)}"
+            board.step(f"{bridge()}, we {how} to make the coefficients simple whole numbers.",
+                       _blue(to_latex(standard(polynomial))))
+
+        a, b, c = (int(polynomial.get(d, 0)) for d in (2, 1, 0))
+        if c == 0:
+            roots = self._solve_by_common_factor(board, bridge, x, a, b)
+        elif a == 1 and self._integer_sqrt(b * b - 4 * c) is not None:
+            roots = self._solve_by_factoring(board, bridge, x, b, c)
+        else:
+            roots = self._solve_by_formula(board, bridge, x, a, b, c)
+        return self._conclude(board, x, roots)
+
+    @staticmethod
+    def _conclude(board: _Board, x: str, roots: Optional[List[Tuple[str, str]]]) -> List[Step]:
+        if roots is None:
+            return board.steps
+        if len(roots) == 1:
+            board.step(f"So the only solution is {x} equals {roots[0][1]}.", f'\\boxed{{{x} = {roots[0][0]}}}')
+        else:
+            board.step(f"So the solutions are {x} equals {roots[0][1]}, and {x} equals {roots[1][1]}.",
+                       f'\\boxed{{{x} = {roots[0][0]} \\text{{ or }} {x} = {roots[1][0]}}}')
+        return board.steps
+
+    @staticmethod
+    def _integer_sqrt(n: int) -> Optional[int]:
+        if n < 0:
+            return None
+        root = math.isqrt(n)
+        return root if root * root == n else None
+
+    @staticmethod
+    def _root(value: Fraction) -> Tuple[str, str]:
+        return number_latex(value), number_words(value)
+
+    def _solve_by_common_factor(self, board: _Board, bridge, x: str, a: int, b: int) -> List[Tuple[str, str]]:
+        inner = polynomial_node({1: Fraction(a), 0: Fraction(b)}, x)
+        factored = f'{x}({to_latex(inner)}) = 0'
+        board.step(f"{bridge()}, every term has an {x} in it, so we factor out {x}.", _blue(factored))
+        root = Fraction(-b, a)
+        board.step(f"A product is zero only when one of its factors is zero. So either {x} equals zero, "
+                   f"or {to_words(inner)} equals zero, which gives {x} equals {number_words(root)}.",
+                   f'{x} = 0{_BREAK}{to_latex(inner)} = 0', _blue(f'{x} = 0{_BREAK}{x} = {number_latex(root)}'))
+        return sorted([self._root(Fraction(0)), self._root(root)], key=lambda r: r[0] != '0')
+
+    def _solve_by_square_root(self, board: _Board, bridge, x: str, a: Fraction, c: Fraction, constant_moved: bool,
+                              original: str, decimal: bool) -> Optional[List[Tuple[str, str]]]:
+        square = self._check_size(-c / a)
+        isolated = f'{x}^{{2}} = {number_latex(square, decimal)}'
+        if isolated != original:
+            moves = []
+            if constant_moved:
+                moves.append("move the constant to the right side")
+            if a.denominator != 1 and not decimal:
+                moves.append(f"multiply both sides by {number_words(1 / a)}")
+            elif a != 1:
+                moves.append(f"divide both sides by {number_words(a, decimal)}")
+            if not moves:
+                moves.append("swap the two sides")
+            board.step(f"{bridge()}, we {' and '.join(moves)}, so that {x} squared is by itself.", _blue(isolated))
+        if square < 0:
+            board.step(f"No real number squared is negative, so this equation has no real solutions.",
+                       '\\boxed{\\text{No real solutions}}')
+            return None
+        if square == 0:
+            board.step(f"Only zero squared is zero, so {x} equals zero.", _blue(f'{x} = 0'))
+            return [self._root(Fraction(0))]
+        numerator = self._integer_sqrt(square.numerator)
+        denominator = self._integer_sqrt(square.denominator)
+        if numerator is not None and denominator is not None:
+            root = Fraction(numerator, denominator)
+            board.step(f"{bridge()}, we take the square root of both sides, remembering that a number and its "
+                       f"negative have the same square. So {x} is plus or minus {number_words(root, decimal)}.",
+                       _blue(f'{x} = \\pm {number_latex(root, decimal)}'))
+            return [(number_latex(root, decimal), number_words(root, decimal)),
+                    (number_latex(-root, decimal), number_words(-root, decimal))]
+        surd_latex, surd_words = self._surd(square.numerator * square.denominator, square.denominator)
+        board.step(f"{bridge()}, we take the square root of both sides, remembering the plus or minus. "
+                   f"So {x} is plus or minus {surd_words}.", _blue(f'{x} = \\pm {surd_latex}'))
+        return [(surd_latex, surd_words), (f'-{surd_latex}', f'minus {surd_words}')]
+
+    def _solve_by_factoring(self, board: _Board, bridge, x: str, b: int, c: int) -> List[Tuple[str, str]]:
+        root = self._integer_sqrt(b * b - 4 * c)
+        p, q = (b - root) // 2, (b + root) // 2
+        factor_p = polynomial_node({1: Fraction(1), 0: Fraction(p)}, x)
+        factor_q = polynomial_node({1: Fraction(1), 0: Fraction(q)}, x)
+        board.step(f"{bridge()}, we factor. We need two numbers that multiply to {number_words(Fraction(c))} "
+                   f"and add to {number_words(Fraction(b))}. Those are {number_words(Fraction(p))} and "
+                   f"{number_words(Fraction(q))}.",
+                   _blue(f'({to_latex(factor_p)})({to_latex(factor_q)}) = 0'))
+        if p == q:
+            board.step(f"Both factors are the same, so {to_words(factor_p)} equals zero, "
+                       f"which gives {x} equals {number_words(Fraction(-p))}.",
+                       _blue(f'{x} = {-p}'))
+            return [self._root(Fraction(-p))]
+        board.step(f"A product is zero only when one of its factors is zero, so we set each factor equal to zero. "
+                   f"That gives {x} equals {number_words(Fraction(-p))}, or {x} equals {number_words(Fraction(-q))}.",
+                   f'{to_latex(factor_p)} = 0{_BREAK}{to_latex(factor_q)} = 0',
+                   _blue(f'{x} = {-p}{_BREAK}{x} = {-q}'))
+        return [self._root(Fraction(-p)), self._root(Fraction(-q))]
+
+    def _solve_by_formula(self, board: _Board, bridge, x: str, a: int, b: int,
+                          c: int) -> Optional[List[Tuple[str, str]]]:
+        board.step(f"{bridge()}, we use the quadratic formula, with a equal to {number_words(Fraction(a))}, "
+                   f"b equal to {number_words(Fraction(b))}, and c equal to {number_words(Fraction(c))}.",
+                   _blue(f'{x} = \\frac{{-b \\pm \\sqrt{{b^{{2}} - 4ac}}}}{{2a}}'))
+        discriminant = b * b - 4 * a * c
+        board.step(f"Substituting these values, the part under the square root, called the discriminant, "
+                   f"works out to {number_words(Fraction(discriminant))}.",
+                   f'{x} = \\frac{{-({b}) \\pm \\sqrt{{({b})^{{2}} - 4({a})({c})}}}}{{2({a})}}',
+                   _blue(f'{x} = \\frac{{{-b} \\pm \\sqrt{{{discriminant}}}}}{{{2 * a}}}'))
+        if discriminant < 0:
+            board.step("The discriminant is negative, and no real number has a negative square. "
+                       "So this equation has no real solutions.", '\\boxed{\\text{No real solutions}}')
+            return None
+
+        root = self._integer_sqrt(discriminant)
+        if root is not None:
+            first, second = Fraction(-b + root, 2 * a), Fraction(-b - root, 2 * a)
+            if root == 0:
+                board.step(f"The discriminant is zero, so there is just one solution: {x} equals "
+                           f"{number_words(first)}.", _blue(f'{x} = {number_latex(first)}'))
+                return [self._root(first)]
+            board.step(f"The square root of {number_words(Fraction(discriminant))} is {number_words(Fraction(root))}. "
+                       f"Taking the plus sign gives {number_words(first)}, and taking the minus sign gives "
+                       f"{number_words(second)}.",
+                       _blue(f'{x} = \\frac{{{-b} + {root}}}{{{2 * a}}} = {number_latex(first)}{_BREAK}'
+                             f'{x} = \\frac{{{-b} - {root}}}{{{2 * a}}} = {number_latex(second)}'))
+            return [self._root(first), self._root(second)]
+
+        # Irrational roots: simplify the square root and reduce the fraction
+        outside, inside = self._split_square(discriminant)
+        divisor = math.gcd(b, outside, 2 * a)
+        b_part, root_part, denominator = -b // divisor, outside // divisor, 2 * a // divisor
+        surd = f'{root_part if root_part != 1 else ""}\\sqrt{{{inside}}}'
+        surd_words = (f"{number_words(Fraction(root_part))} times " if root_part != 1 else '') + \
+            f"the square root of {number_words(Fraction(inside))}"
+        numerator = f'{b_part} \\pm {surd}' if b_part else f'\\pm {surd}'
+        numerator_words = f"{number_words(Fraction(b_part))} plus or minus {surd_words}" if b_part \
+            else f"plus or minus {surd_words}"
+        result = f'\\frac{{{numerator}}}{{{denominator}}}' if denominator != 1 else numerator
+        result_words = f"{numerator_words}, all over {number_words(Fraction(denominator))}" if denominator != 1 \
+            else numerator_words
+        board.step(f"{number_words(Fraction(discriminant)).capitalize()} is not a perfect square, so we simplify "
+                   f"and leave the square root in the answer: {x} equals {result_words}.",
+                   _blue(f'{x} = {result}'))
+
+        def one(sign: str) -> Tuple[str, str]:
+            top = f'{b_part} {sign} {surd}' if b_part else f'{"-" if sign == "-" else ""}{surd}'
+            spoken = (f"{number_words(Fraction(b_part))} {'plus' if sign == '+' else 'minus'} {surd_words}"
+                      if b_part else f"{'negative ' if sign == '-' else ''}{surd_words}")
+            if denominator == 1:
+                return top, spoken
+            return f'\\frac{{{top}}}{{{denominator}}}', f"{spoken}, all over {number_words(Fraction(denominator))}"
+        return [one('+'), one('-')]
+
+    @staticmethod
+    def _split_square(n: int) -> Tuple[int, int]:
+        """n = outside^2 * inside with inside square-free."""
+        outside, inside, factor = 1, n, 2
+        while factor * factor <= inside:
+            while inside % (factor * factor) == 0:
+                inside //= factor * factor
+                outside *= factor
+            factor += 1
+        return outside, inside
+
+    def _surd(self, n: int, denominator: int) -> Tuple[str, str]:
+        """LaTeX and words for sqrt(n) / denominator, simplified."""
+        outside, inside = self._split_square(n)
+        common = math.gcd(outside, denominator)
+        outside, denominator = outside // common, denominator // common
+        latex = f'{outside if outside != 1 else ""}\\sqrt{{{inside}}}'
+        words = (f"{number_words(Fraction(outside))} times " if outside != 1 else '') + \
+            f"the square root of {number_words(Fraction(inside))}"
+        if denominator != 1:
+            latex = f'\\frac{{{latex}}}{{{denominator}}}'
+            words += f", over {number_words(Fraction(denominator))}"
+        return latex, words
+
+
+_default_solver: Optional[LocalSolver] = None
+
+
+def solve_locally(prompt: str) -> Optional[LocalSolution]:
+    """Solve with the LOCAL_SOLVER_CONFIG settings, or None to use the crew."""
+    global _default_solver
+    if _default_solver is None:
+        _default_solver = LocalSolver()
+    return _default_solver.solve(prompt)
@@ -0,0 +1,366 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.config.settings import METRICS_CONFIG
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}' for key, v in values]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = sorted(buckets) + [float('inf')]
+        # Per label set: per-bucket (non-cumulative) counts, sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def mean(self, **labels: str) -> Optional[float]:
+        """Mean observed value, or None before the first observation."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if not series or not sum(series[0]):
+                return None
+            return series[1][0] / sum(series[0])
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets or METRICS_CONFIG['latency_buckets']))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'mathboard_stage_duration_seconds',
+    'Time spent in each stage of a math request.',
+    labels=('stage',)
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'mathboard_requests_in_flight',
+    'Math requests currently being processed.'
+)
+RUNTIME_ACTIVE = registry.gauge(
+    'mathboard_runtime_active_tasks',
+    'Coroutines holding a concurrency slot on the async runtime.'
+)
+REQUESTS = registry.counter(
+    'mathboard_requests_total',
+    'Finished math requests by outcome.',
+    labels=('outcome',)
+)
+CACHE_LOOKUPS = registry.counter(
+    'mathboard_cache_lookups_total',
+    'Cache lookups by cache and result.',
+    labels=('cache', 'result')
+)
+ERRORS = registry.counter(
+    'mathboard_errors_total',
+    'Errors by the stage they occurred in.',
+    labels=('stage',)
+)
+LLM_TOKENS = registry.counter(
+    'mathboard_llm_tokens_total',
+    'LLM tokens used, by kind.',
+    labels=('kind',)
+)
+
+QUERY_ROUTES = registry.counter(
+    'mathboard_query_routes_total',
+    'Generated explanations by the pipeline the query classifier chose.',
+    labels=('route',)
+)
+GENERATION_SECONDS = registry.histogram(
+    'mathboard_generation_seconds',
+    'Time to generate a full explanation, by route.',
+    labels=('route',),
+    buckets=METRICS_CONFIG['latency_buckets']
+)
+FAST_PATH_SAVED = registry.counter(
+    'mathboard_fast_path_saved_seconds_total',
+    'Estimated generation seconds saved by the single-task route, against the mean complex route.'
+)
+
+LOCAL_SOLVER = registry.counter(
+    'mathboard_local_solver_total',
+    'Prompts seen by the local solver, by the problem class it solved or "fallback" when the crew took over.',
+    labels=('result',)
+)
+LOCAL_SOLVE_SECONDS = registry.histogram(
+    'mathboard_local_solve_seconds',
+    'Time to build an explanation in the local solver, by problem class.',
+    labels=('problem_class',),
+    buckets=METRICS_CONFIG['latency_buckets']
+)
+
+LESSON_REPLAYS = registry.counter(
+    'mathboard_lesson_replays_total',
+    'Lesson log replays requested by clients, by whether the lesson was found.',
+    labels=('result',)
+)
+
+MODEL_SELECTIONS = registry.counter(
+    'mathboard_model_selections_total',
+    'Model tier chosen per crew task, with the reason (task, query, saturated, unhealthy).',
+    labels=('task', 'tier', 'reason')
+)
+MODEL_IN_FLIGHT = registry.gauge(
+    'mathboard_model_calls_in_flight',
+    'LLM calls currently running, by model tier.',
+    labels=('tier',)
+)
+
+SCHEDULER_IN_FLIGHT = registry.gauge(
+    'mathboard_scheduler_in_flight',
+    'OpenAI calls admitted by the call scheduler and still running, by pool.',
+    labels=('pool',)
+)
+SCHEDULER_QUEUED = registry.gauge(
+    'mathboard_scheduler_queued',
+    'Calls waiting for admission, by pool.',
+    labels=('pool',)
+)
+SCHEDULER_LIMIT = registry.gauge(
+    'mathboard_scheduler_concurrency_limit',
+    'Current adaptive concurrency limit, by pool.',
+    labels=('pool',)
+)
+SCHEDULER_WAIT_SECONDS = registry.histogram(
+    'mathboard_scheduler_wait_seconds',
+    'Time calls waited for admission, by pool.',
+    labels=('pool',),
+    buckets=METRICS_CONFIG['latency_buckets']
+)
+RATE_LIMITED = registry.counter(
+    'mathboard_rate_limited_total',
+    'Calls answered with a provider rate limit (HTTP 429), by pool.',
+    labels=('pool',)
+)
+
+HEDGED_CALLS = registry.counter(
+    'mathboard_hedged_calls_total',
+    'Calls that were slow enough to get a duplicate (hedge) request, by call and which request answered first.',
+    labels=('call', 'winner')
+)
+TTS_DEADLINE_MISSED = registry.counter(
+    'mathboard_tts_deadline_missed_total',
+    'TTS calls that missed their deadline, by the policy applied (skip: audio dropped, wait: kept waiting).',
+    labels=('policy',)
+)
+
+HTTP_REQUESTS = registry.counter(
+    'mathboard_http_requests_total',
+    'HTTP requests sent through the shared OpenAI clients, by client (async, sync).',
+    labels=('client',)
+)
+HTTP_CONNECTIONS_OPENED = registry.counter(
+    'mathboard_http_connections_opened_total',
+    'New connections (TCP connect and TLS handshake) opened by the shared clients; '
+    'the rest of the requests reused a pooled connection.',
+    labels=('client',)
+)
+HTTP_POOL_CONNECTIONS = registry.gauge(
+    'mathboard_http_pool_connections',
+    'Connections held by each shared client pool, by state (active, idle) and protocol (HTTP/1.1, HTTP/2).',
+    labels=('client', 'state', 'protocol')
+)
+
+
+class Span:
+    """One timed stage of a request."""
+
+    __slots__ = ('stage', 'start', 'duration')
+
+    def __init__(self, stage: str, start: float, duration: float):
+        self.stage = stage
+        self.start = start
+        self.duration = duration
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'stage': self.stage, 'start': round(self.start, 4), 'duration': round(self.duration, 4)}
+
+
+class RequestTimer:
+    """
+    Collects the timing spans of a single request.
+
+    Every span is also observed in STAGE_SECONDS, so the per-request trace
+    and the aggregated histograms always agree.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def record(self, stage: str, start: float, end: Optional[float] = None) -> Span:
+        end = time.perf_counter() if end is None else end
+        span = Span(stage, start - self.origin, end - start)
+        self.spans.append(span)
+        STAGE_SECONDS.observe(span.duration, stage=stage)
+        return span
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start)
+
+    def summary(self) -> Dict[str, float]:
+        """Total seconds per stage."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.stage] = totals.get(span.stage, 0.0) + span.duration
+        return {stage: round(total, 4) for stage, total in totals.items()}
+
+
+def record_token_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, kind='prompt')
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, kind='completion')
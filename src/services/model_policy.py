@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from src.config.settings import MODEL_TIERS_CONFIG
+from src.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ModelChoice:
+    """The model a task runs on, the tier it belongs to and why it was picked."""
+
+    def __init__(self, task: str, tier: str, model: str, reason: str):
+        self.task = task
+        self.tier = tier
+        self.model = model
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f'ModelChoice({self.task!r}, {self.tier!r}, {self.model!r}, {self.reason!r})'
+
+
+class _TierState:
+    """Load and health of one tier."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.bypassed_until = 0.0
+
+
+class ModelPolicy:
+    """
+    Picks the model for each crew task from MODEL_TIERS_CONFIG.
+
+    A task gets the tier its query class maps to (query_tiers), else the
+    tier configured for the task (task_tiers), else the default tier. A
+    tier with a fallback is bypassed while it is saturated (max_in_flight
+    calls running) or unhealthy: its smoothed latency went over
+    slow_after_seconds or a call failed, which sends new work to the
+    fallback tier for cooldown_seconds before the tier is tried again.
+    Callers wrap each model call in track() so the policy sees the load.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or MODEL_TIERS_CONFIG
+        self.enabled = config['enabled']
+        self.tiers = config['tiers']
+        self.default_tier = config['default_tier']
+        self.task_tiers = config['task_tiers']
+        self.query_tiers = config['query_tiers']
+        self.smoothing = config['latency_smoothing']
+        self.cooldown = config['cooldown_seconds']
+        self._state = {tier: _TierState() for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    def select(self, task: str, route: Optional[str] = None) -> ModelChoice:
+        """The model `task` should run on for a query of class `route`."""
+        if route in self.query_tiers:
+            tier, cause, reason = self.query_tiers[route], 'query', f'{route} query'
+        else:
+            tier, cause, reason = self.task_tiers.get(task, self.default_tier), 'task', 'task tier'
+
+        with self._lock:
+            seen = {tier}
+            while True:
+                unavailable = self._unavailable(tier)
+                fallback = self.tiers[tier]['fallback']
+                if unavailable is None or fallback is None or fallback in seen:
+                    break
+                cause, reason = unavailable, f'{tier} tier {unavailable}'
+                tier = fallback
+                seen.add(tier)
+
+        metrics.MODEL_SELECTIONS.inc(task=task, tier=tier, reason=cause)
+        return ModelChoice(task, tier, self.tiers[tier]['model'], reason)
+
+    def _unavailable(self, tier: str) -> Optional[str]:
+        """Why `tier` should not take new work right now, or None."""
+        state, limits = self._state[tier], self.tiers[tier]
+        if limits['max_in_flight'] is not None and state.in_flight >= limits['max_in_flight']:
+            return 'saturated'
+        if time.monotonic() < state.bypassed_until:
+            return 'unhealthy'
+        return None
+
+    @contextmanager
+    def track(self, choice: ModelChoice) -> Iterator[None]:
+        """Count a call on `choice` as in flight and feed its outcome into the tier's health."""
+        state = self._state[choice.tier]
+        with self._lock:
+            state.in_flight += 1
+        metrics.MODEL_IN_FLIGHT.inc(tier=choice.tier)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            # Cancellation says nothing about the model's health
+            if isinstance(e, Exception):
+                self._bypass(choice.tier, f"{choice.task} failed: {type(e).__name__}")
+            raise
+        else:
+            self._observe(choice, time.perf_counter() - start)
+        finally:
+            with self._lock:
+                state.in_flight -= 1
+            metrics.MODEL_IN_FLIGHT.dec(tier=choice.tier)
+
+    def _observe(self, choice: ModelChoice, seconds: float) -> None:
+        state, slow_after = self._state[choice.tier], self.tiers[choice.tier]['slow_after_seconds']
+        with self._lock:
+            if state.latency is None:
+                state.latency = seconds
+            else:
+                state.latency += self.smoothing * (seconds - state.latency)
+            latency = state.latency
+        if slow_after is not None and latency > slow_after:
+            self._bypass(choice.tier, f"smoothed latency {latency:.1f}s over {slow_after:.1f}s")
+
+    def _bypass(self, tier: str, why: str) -> None:
+        if self.tiers[tier]['fallback'] is None:
+            return
+        with self._lock:
+            state = self._state[tier]
+            state.bypassed_until = time.monotonic() + self.cooldown
+            # Relearn the latency from scratch once the tier is tried again
+            state.latency = None
+        logger.warning(f"Model tier '{tier}' bypassed for {self.cooldown}s ({why}), "
+                       f"using '{self.tiers[tier]['fallback']}'")
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.services.metrics import RequestTimer
+
+logger = logging.getLogger(__name__)
+
+
+class ActiveRequest:
+    """State of one in-flight math request, owned by a Socket.IO session."""
+
+    def __init__(self, sid: str, request_id: str, prompt: str, task: Optional[asyncio.Task] = None):
+        self.sid = sid
+        self.request_id = request_id
+        self.prompt = prompt
+        self.task = task
+        # The runtime future of a request registered before it got a slot
+        self.future: Optional[Future] = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self.start_time = datetime.now()
+        self.step_count = 0
+        self.total_steps: Optional[int] = None
+        # Per-stage timing spans of this request
+        self.timer = RequestTimer()
+        # BoardDiffer when the client accepts board patches
+        self.board = None
+
+    def attach(self, future: Future) -> None:
+        """
+        Tie the request to the future runtime.submit() returned for it.
+        Cancelling that future cancels the coroutine whether it is running
+        or still waiting for a slot; a request cancelled before this call
+        is cancelled here.
+        """
+        with self._lock:
+            self.future = future
+            cancelled = self.cancelled
+        if cancelled:
+            future.cancel()
+
+    def cancel(self) -> None:
+        """Cancel the request's task (or runtime future) from any thread."""
+        with self._lock:
+            self.cancelled = True
+            task, future = self.task, self.future
+        if future is not None:
+            future.cancel()
+        elif task is not None and not task.done():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    def elapsed(self) -> float:
+        return (datetime.now() - self.start_time).total_seconds()
+
+
+class RequestRegistry:
+    """
+    Tracks the in-flight request of each Socket.IO session.
+
+    A session has at most one active request: starting a new one cancels
+    the previous one, and a disconnect cancels whatever is running. Since
+    cancellation is delivered to the request's asyncio task, it propagates
+    into the crew stream and any pending TTS calls rather than only being
+    noticed between emits. Socket handlers register a request before it
+    waits for a runtime slot (see ActiveRequest.attach), so queued requests
+    are superseded and cancelled the same way. Safe to use from socket and
+    runtime threads.
+    """
+
+    def __init__(self):
+        self._requests: Dict[str, ActiveRequest] = {}
+        self._lock = threading.Lock()
+
+    def start(self, sid: str, request_id: str, prompt: str, task: Optional[asyncio.Task] = None) -> ActiveRequest:
+        """Register a new request for `sid`, cancelling the one it supersedes."""
+        active = ActiveRequest(sid, request_id, prompt, task)
+        with self._lock:
+            previous = self._requests.get(sid)
+            self._requests[sid] = active
+        if previous is not None:
+            logger.info(f"[Request {request_id}] Cancelling superseded request: {previous.request_id}")
+            previous.cancel()
+        return active
+
+    def finish(self, active: ActiveRequest) -> None:
+        """Forget `active` if it is still the session's current request."""
+        with self._lock:
+            if self._requests.get(active.sid) is active:
+                del self._requests[active.sid]
+
+    def cancel_session(self, sid: str) -> Optional[ActiveRequest]:
+        """Cancel and forget the session's request, if any."""
+        with self._lock:
+            active = self._requests.pop(sid, None)
+        if active is not None:
+            logger.info(f"[Request {active.request_id}] Cancelling request for session {sid}")
+            active.cancel()
+        return active
+
+    def get(self, sid: str) -> Optional[ActiveRequest]:
+        """The session's current request, if any."""
+        with self._lock:
+            return self._requests.get(sid)
+
+    def is_current(self, active: ActiveRequest) -> bool:
+        with self._lock:
+            return self._requests.get(active.sid) is active
+
+    def snapshot(self) -> List[ActiveRequest]:
+        with self._lock:
+            return list(self._requests.values())
+
+    def __len__(self) -> int:
+        return len(self._requests)
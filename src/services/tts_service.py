@@ -1,8 +1,17 @@
 import os
 import asyncio
-from openai import AsyncOpenAI
-import base64
+import time
+from contextlib import aclosing
+from functools import partial
+from typing import AsyncIterator, Awaitable, Optional, TypeVar
 import logging
+from src.config.settings import TTS_CONFIG, AUDIO_CACHE_CONFIG
+from src.services.audio_cache import AudioCache, audio_cache_key
+from src.services.call_scheduler import scheduler
+from src.services.hedging import LatencyWindow, hedged, hedged_stream
+from src.services.http_clients import openai_client
+from src.services.metrics import CACHE_LOOKUPS, ERRORS, TTS_DEADLINE_MISSED, RequestTimer
+from src.utils.speech_chunks import split_speech
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,33 +22,246 @@ api_key = os.getenv('OPENAI_API_KEY')
 if not api_key:
     raise ValueError("OPENAI_API_KEY environment variable is not set")
 
-client = AsyncOpenAI(api_key=api_key)
+# Pooled connections shared with the crew's streamed completions
+client = openai_client
 
-async def generate_speech(text: str) -> str:
+audio_cache = AudioCache(
+    directory=AUDIO_CACHE_CONFIG['directory'],
+    memory_max_bytes=AUDIO_CACHE_CONFIG['memory_max_bytes'],
+    disk_max_bytes=AUDIO_CACHE_CONFIG['disk_max_bytes']
+) if AUDIO_CACHE_CONFIG['enabled'] else None
+
+# Recent TTS latencies once admitted by the scheduler: whole responses, and
+# the first bytes of streamed ones. Their upper quantile sets when to hedge
+speech_latency = LatencyWindow(TTS_CONFIG['latency_window'], TTS_CONFIG['hedge_min_samples'])
+first_byte_latency = LatencyWindow(TTS_CONFIG['latency_window'], TTS_CONFIG['hedge_min_samples'])
+
+T = TypeVar('T')
+
+async def generate_speech(text: str, within_deadline: bool = True) -> Optional[bytes]:
     """
     Generate speech from text using OpenAI's TTS API.
-    Returns base64 encoded audio data.
+    Returns the raw audio bytes, sent to the client as a binary attachment.
+    Previously synthesized text is served from the audio cache.
+
+    A slow call is hedged with a duplicate request, and with
+    `within_deadline` it is bounded by TTS_CONFIG['deadline_seconds'].
     """
     try:
         if not text or not isinstance(text, str):
             logger.error("Invalid input text")
             return None
-            
-        response = await client.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=text,
-            response_format="mp3"
-        )
         
-        audio_data = response.content
-        if not audio_data:
-            logger.error("No audio data received from OpenAI")
-            return None
+        model = TTS_CONFIG['model']
+        voice = TTS_CONFIG['voice']
+        response_format = TTS_CONFIG['response_format']
+        cache_key = audio_cache_key(text, model, voice, response_format)
+        
+        audio_data = await _cached_audio(cache_key)
+        if audio_data is None:
+            tts_client = await client.aget()
+            create = partial(
+                _create_speech,
+                tts_client,
+                model=model,
+                voice=voice,
+                input=text,
+                response_format=response_format
+            )
+            call = hedged(partial(scheduler.call, 'tts', create), _hedge_delay(speech_latency), 'tts', _may_hedge)
+            audio_data = await (_within_deadline(call) if within_deadline else call)
+            if audio_data is None:
+                # Given up at the deadline
+                return None
+            if not audio_data:
+                logger.error("No audio data received from OpenAI")
+                return None
             
-        base64_audio = base64.b64encode(audio_data).decode('utf-8')
-        return base64_audio
+            await _cache_audio(cache_key, audio_data)
+            
+        return audio_data
             
     except Exception as e:
+        ERRORS.inc(stage='tts')
         logger.error(f"Error in generate_speech: {str(e)}")
         return None
+
+async def _cached_audio(cache_key: str) -> Optional[bytes]:
+    """Cached audio for `cache_key`: the memory tier inline, the disk tier on the executor."""
+    if not audio_cache:
+        return None
+    audio_data = audio_cache.get_memory(cache_key)
+    if audio_data is None:
+        audio_data = await asyncio.get_running_loop().run_in_executor(None, audio_cache.get_disk, cache_key)
+    CACHE_LOOKUPS.inc(cache='audio', result='miss' if audio_data is None else 'hit')
+    return audio_data
+
+async def _cache_audio(cache_key: str, audio_data: bytes) -> None:
+    """Store synthesized audio: the memory tier inline, the disk tier on the executor."""
+    if not audio_cache:
+        return
+    audio_cache.put_memory(cache_key, audio_data)
+    await asyncio.get_running_loop().run_in_executor(None, audio_cache.put_disk, cache_key, audio_data)
+
+async def _create_speech(tts_client, **params) -> bytes:
+    """One TTS API call, its latency added to the hedging window."""
+    start = time.perf_counter()
+    try:
+        response = await tts_client.audio.speech.create(**params)
+    except asyncio.CancelledError:
+        # A call cancelled by its hedge took at least this long
+        speech_latency.add(time.perf_counter() - start)
+        raise
+    speech_latency.add(time.perf_counter() - start)
+    return response.content
+
+def _hedge_delay(window: LatencyWindow) -> Optional[float]:
+    """Seconds after which a call gets a duplicate, or None while hedging is off or still calibrating."""
+    if not TTS_CONFIG['hedge']:
+        return None
+    latency = window.quantile(TTS_CONFIG['hedge_quantile'])
+    return None if latency is None else max(latency, TTS_CONFIG['hedge_min_delay_seconds'])
+
+def _may_hedge() -> bool:
+    # When calls are already waiting for a slot, a duplicate would only lengthen the queue
+    return scheduler.queued('tts') == 0
+
+async def _within_deadline(call: Awaitable[T]) -> Optional[T]:
+    """
+    Await a TTS call for up to TTS_CONFIG['deadline_seconds']. Past the
+    deadline, the 'skip' policy cancels it and returns None, and 'wait'
+    keeps waiting for it.
+    """
+    deadline = TTS_CONFIG['deadline_seconds']
+    task = asyncio.ensure_future(call)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=deadline)
+        if not done:
+            policy = TTS_CONFIG['on_deadline']
+            TTS_DEADLINE_MISSED.inc(policy=policy)
+            if policy == 'skip':
+                logger.warning(f"TTS call missed its {deadline:.1f}s deadline, continuing without its audio")
+                return None
+            logger.warning(f"TTS call missed its {deadline:.1f}s deadline, still waiting")
+        return await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+async def stream_speech(text: str, timer: Optional[RequestTimer] = None) -> AsyncIterator[bytes]:
+    """
+    Stream speech for text in chunks, yielding audio bytes as they arrive.
+
+    The text is split at sentence boundaries and each chunk is synthesized
+    with a streaming request whose body is read incrementally. The first
+    chunk goes alone; the others start once its audio is flowing, at most
+    `chunk_concurrency` at a time, and are yielded in order. A chunk that
+    fails, or misses its deadline for the first bytes, is skipped, so the
+    rest of the step is still spoken.
+
+    At most `chunk_buffer` pieces of each chunk's audio are held until they
+    are yielded. With `timer`, each chunk's synthesis is recorded as a 'tts'
+    span, leaving out the time spent waiting for the consumer.
+    """
+    if not text or not isinstance(text, str):
+        logger.error("Invalid input text")
+        return
+
+    chunks = split_speech(text, TTS_CONFIG['first_chunk_max_chars'], TTS_CONFIG['max_chunk_chars'])
+    queues = [asyncio.Queue(maxsize=max(1, TTS_CONFIG['chunk_buffer'])) for _ in chunks]
+    # Set once the first chunk's audio starts arriving (or it gave up)
+    first_audio = asyncio.Event()
+    slots = asyncio.Semaphore(TTS_CONFIG['chunk_concurrency'])
+
+    async def fill(index: int, chunk: str) -> None:
+        try:
+            if index:
+                await first_audio.wait()
+            async with slots:
+                start = time.perf_counter()
+                synthesizing = 0.0
+                try:
+                    async with aclosing(_stream_chunk(chunk)) as audio:
+                        while True:
+                            waited = time.perf_counter()
+                            data = await anext(audio, None)
+                            synthesizing += time.perf_counter() - waited
+                            if data is None:
+                                break
+                            first_audio.set()
+                            await queues[index].put(data)
+                finally:
+                    if timer is not None:
+                        timer.record('tts', start, start + synthesizing)
+        except Exception as e:
+            ERRORS.inc(stage='tts')
+            logger.error(f"Error in stream_speech (chunk {index + 1}/{len(chunks)}): {str(e)}")
+        finally:
+            first_audio.set()
+        # Not reached when cancelled: the stream is closing and nothing reads the queue
+        await queues[index].put(None)
+
+    tasks = [asyncio.ensure_future(fill(index, chunk)) for index, chunk in enumerate(chunks)]
+    try:
+        for queue in queues:
+            while True:
+                data = await queue.get()
+                if data is None:
+                    break
+                yield data
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _stream_chunk(text: str) -> AsyncIterator[bytes]:
+    """Audio of one text chunk, from the audio cache or streamed from the TTS API."""
+    model = TTS_CONFIG['model']
+    voice = TTS_CONFIG['voice']
+    response_format = TTS_CONFIG['response_format']
+    cache_key = audio_cache_key(text, model, voice, response_format)
+
+    audio_data = await _cached_audio(cache_key)
+    if audio_data is not None:
+        yield audio_data
+        return
+
+    tts_client = await client.aget()
+
+    async def receive():
+        start = time.perf_counter()
+        async with tts_client.audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format=response_format
+        ) as response:
+            # Passed on as received, so playback can start before the body is complete
+            first = True
+            try:
+                async for data in response.iter_bytes():
+                    if first:
+                        first_byte_latency.add(time.perf_counter() - start)
+                        first = False
+                    yield data
+            except asyncio.CancelledError:
+                if first:
+                    # A stream cancelled by its hedge waited at least this long
+                    first_byte_latency.add(time.perf_counter() - start)
+                raise
+
+    parts = []
+    stream = hedged_stream(partial(scheduler.stream, 'tts', receive), _hedge_delay(first_byte_latency),
+                           'tts_stream', _may_hedge)
+    async with aclosing(stream) as received:
+        # The deadline covers the wait for the first bytes; after that the
+        # client's read timeout applies
+        data = await _within_deadline(anext(received, None))
+        while data is not None:
+            parts.append(data)
+            yield data
+            data = await anext(received, None)
+
+    if parts:
+        await _cache_audio(cache_key, b''.join(parts))
@@ -0,0 +1,80 @@
+import json
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+# Shape of a board produced by format_board_latex
+BOARD_PREFIX = '\\[\\begin{align*} '
+BOARD_SUFFIX = ' \\end{align*}\\]'
+LINE_SEPARATOR = ' \\\\ '
+
+
+def split_board(formatted: str) -> Optional[List[str]]:
+    """Split a formatted board into its lines, or None if it is not a board."""
+    if not formatted or not formatted.startswith(BOARD_PREFIX) or not formatted.endswith(BOARD_SUFFIX):
+        return None
+    return formatted[len(BOARD_PREFIX):len(formatted) - len(BOARD_SUFFIX)].split(LINE_SEPARATOR)
+
+
+def join_board(lines: List[str]) -> str:
+    """Inverse of split_board."""
+    return BOARD_PREFIX + LINE_SEPARATOR.join(lines) + BOARD_SUFFIX
+
+
+def diff_board(old_lines: List[str], new_lines: List[str]) -> List[Dict[str, Any]]:
+    """
+    Line-level patch turning old_lines into new_lines.
+
+    Each operation replaces `remove` lines starting at index `at` of the
+    old board with the lines in `insert`. Indices refer to the old board,
+    so operations are applied from last to first.
+    """
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        {'at': i1, 'remove': i2 - i1, 'insert': new_lines[j1:j2]}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_board_diff(lines: List[str], patch: List[Dict[str, Any]]) -> List[str]:
+    """Apply a patch produced by diff_board."""
+    lines = list(lines)
+    for op in reversed(patch):
+        lines[op['at']:op['at'] + op['remove']] = op['insert']
+    return lines
+
+
+class BoardDiffer:
+    """
+    Encodes the successive boards of one request as patches.
+
+    Each board gets a version number. A board is sent as a patch against
+    the previous version when that is smaller than the full board;
+    otherwise, for the first board and after reset(), the full LaTeX is
+    sent.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.lines: Optional[List[str]] = None
+
+    def reset(self) -> None:
+        """Send the next board in full, e.g. when the client lost track of the patches."""
+        self.lines = None
+
+    def encode(self, formatted: str) -> Dict[str, Any]:
+        """Fields to merge into a display_step payload for this board."""
+        lines = split_board(formatted)
+        base_version, base_lines = self.version, self.lines
+        self.version += 1
+        self.lines = lines
+
+        if lines is not None and base_lines is not None:
+            patch = diff_board(base_lines, lines)
+            if len(json.dumps(patch)) < len(formatted):
+                return {
+                    'boardVersion': self.version,
+                    'baseVersion': base_version,
+                    'boardPatch': patch
+                }
+        return {'boardVersion': self.version, 'math': formatted}
@@ -0,0 +1,78 @@
+import hashlib
+import re
+from functools import lru_cache
+
+from src.config.settings import LATEX_CONFIG
+
+# One scan over the board: LaTeX commands (with their brace arguments) are
+# copied through untouched, and any other run of two or more backslashes is
+# normalized to a single "\\ " line break. A backslash that starts a command
+# is never part of a line-break run.
+_TOKENS = re.compile(r'(?P<command>\\[a-zA-Z]+(?:\{[^}]*\})*)|\\{2,}(?![a-zA-Z])')
+
+_BARE_TEXT = re.compile(r'(^|\\\\|\s|[^\\])text{')
+_DOLLAR_DELIMITERS = re.compile(r'(^|[^\\])\$\$')
+_BRACKET_DELIMITERS = re.compile(r'^\\\[|\\\]$')
+_UNBRACED_COLOR = re.compile(r'\\color{([^}]+)}([^{])')
+_TEXT_SPACING = re.compile(r'([^{\\])\\text{')
+
+_LINE_BREAK = '\\\\'
+
+
+def _normalize_token(match: re.Match) -> str:
+    return match.group('command') or '\\\\ '
+
+
+def _format_board(latex: str) -> str:
+    latex = _TOKENS.sub(_normalize_token, latex.strip())
+
+    # Give bare text{...} its backslash, then drop any math delimiters
+    latex = _BARE_TEXT.sub(r'\1\\text{', latex)
+    latex = _DOLLAR_DELIMITERS.sub('', latex)
+    latex = _BRACKET_DELIMITERS.sub('', latex).strip()
+
+    # Every line after the first is aligned on its leading "&"
+    processed_lines = []
+    for i, line in enumerate(latex.split(_LINE_BREAK)):
+        line = line.strip()
+        if line:
+            if i > 0 and not line.startswith('&'):
+                line = '& ' + line
+            processed_lines.append(line)
+
+    latex = '\\begin{align*} ' + ' \\\\ '.join(processed_lines) + ' \\end{align*}'
+
+    latex = _UNBRACED_COLOR.sub(r'\\color{\1}{\2}', latex)
+    latex = _TEXT_SPACING.sub(r'\1 \\text{', latex)
+    return f'\\[{latex}\\]'
+
+
+_format_board_cached = lru_cache(maxsize=LATEX_CONFIG['format_cache_size'])(_format_board)
+
+
+def format_board_latex(latex: str) -> str:
+    r"""
+    Format a whiteboard's LaTeX for display in MathJax.
+
+    Strips existing math delimiters, normalizes line breaks, aligns the
+    lines in an align* environment and wraps the result in \[...\].
+    Results are memoized, since every step repeats most of the board.
+    """
+    if not latex:
+        return latex
+    return _format_board_cached(latex)
+
+
+def format_cache_info():
+    """Hit/miss statistics of the board formatting memo cache."""
+    return _format_board_cached.cache_info()
+
+
+def board_hash(formatted: str) -> str:
+    """
+    Stable content hash of a formatted board.
+
+    Clients key their cache of typeset output on it, so identical boards
+    (within or across lessons) are only typeset once.
+    """
+    return hashlib.sha256(formatted.encode('utf-8')).hexdigest()[:LATEX_CONFIG['board_hash_length']]
@@ -0,0 +1,189 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Union
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+# A numeric backreference inside a pattern, which combining rules would renumber
+_BACKREFERENCE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+# Largest character range worth spelling out in a stage's first-character gate
+_MAX_GATE_RANGE = 256
+# Backslash escapes understood in replacement templates, besides group refs
+_TEMPLATE_ESCAPES = {'\\': '\\', 'n': '\n', 't': '\t'}
+_TEMPLATE_TOKEN = re.compile(r'\\(?:g<(\d+)>|(\d+)|(.))', re.DOTALL)
+
+
+class Rule:
+    """A single pattern -> replacement rewrite, applied in a given stage."""
+
+    def __init__(self, name: str, pattern: str, replacement: str, stage: int = 0, flags: int = 0):
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.stage = stage
+        self.regex = re.compile(pattern, flags)
+        if self.regex.groupindex or _BACKREFERENCE.search(pattern):
+            raise ValueError(f"Rule '{name}' uses named groups or backreferences, which are not supported")
+        # The replacement as a str.format template, so expansion runs in C
+        self.template = ''.join(
+            part.replace('{', '{{').replace('}', '}}') if isinstance(part, str) else f'{{{part - 1}}}'
+            for part in _compile_template(name, replacement, self.regex.groups)
+        )
+
+    def expand(self, groups: Sequence[str]) -> str:
+        """Fill the replacement with this rule's groups (unmatched groups as '')."""
+        return self.template.format(*groups)
+
+
+def _compile_template(name: str, replacement: str, group_count: int) -> List[Union[str, int]]:
+    """Split a re-style replacement into literal strings and group numbers."""
+    parts: List[Union[str, int]] = []
+    position = 0
+    for match in _TEMPLATE_TOKEN.finditer(replacement):
+        parts.append(replacement[position:match.start()])
+        position = match.end()
+        group = match.group(1) or match.group(2)
+        if group is not None:
+            if not 0 < int(group) <= group_count:
+                raise ValueError(f"Rule '{name}' references group {group}, but its pattern has {group_count}")
+            parts.append(int(group))
+        elif match.group(3) in _TEMPLATE_ESCAPES:
+            parts.append(_TEMPLATE_ESCAPES[match.group(3)])
+        else:
+            raise ValueError(f"Rule '{name}' has a bad escape in its replacement: \\{match.group(3)}")
+    parts.append(replacement[position:])
+    return [part for part in parts if part != '']
+
+
+def _first_chars(pattern: str, flags: int) -> Optional[Set[str]]:
+    """
+    The characters a match of `pattern` can start with, or None when that
+    is not known (the pattern can match the empty string, or starts with a
+    construct not handled here). Case folding is left to the caller's regex.
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    # Without re.ASCII, \d, \w and \s also match non-ASCII characters
+    return _first_of(list(parsed), bool(parsed.state.flags & re.ASCII))
+
+
+def _first_of(items: List[Any], ascii_only: bool) -> Optional[Set[str]]:
+    for op, av in items:
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT, sre_constants.AT):
+            # Zero width: the first character comes from what follows
+            continue
+        if op is sre_constants.LITERAL:
+            return {chr(av)}
+        if op is sre_constants.SUBPATTERN:
+            return _first_of(list(av[-1]), ascii_only)
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            return _first_of(list(av[2]), ascii_only) if av[0] >= 1 else None
+        if op is sre_constants.BRANCH:
+            firsts = [_first_of(list(branch), ascii_only) for branch in av[1]]
+            return None if None in firsts else set().union(*firsts)
+        if op is sre_constants.IN:
+            return _class_chars(av, ascii_only)
+        return None
+    return None
+
+
+def _class_chars(items: List[Any], ascii_only: bool) -> Optional[Set[str]]:
+    chars: Set[str] = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            chars.add(chr(av))
+        elif op is sre_constants.RANGE and av[1] - av[0] < _MAX_GATE_RANGE:
+            chars.update(chr(code) for code in range(av[0], av[1] + 1))
+        elif op is sre_constants.CATEGORY and av is sre_constants.CATEGORY_DIGIT and ascii_only:
+            chars.update('0123456789')
+        else:
+            return None
+    return chars
+
+
+class RuleSet:
+    """
+    An ordered collection of rewrite rules compiled into one regex per stage.
+
+    All rules of a stage are combined into a single alternation, so a stage
+    rewrites the text in one scan; at any position the earliest registered
+    rule that matches wins. Stages run in ascending order, each seeing the
+    output of the previous one. With `recursive=True` the captured groups
+    of a match are rewritten by the same stage before being substituted,
+    so phrases nested inside another rule's capture are still converted.
+
+    Where every rule's possible first characters can be read from its
+    pattern, a stage's alternation is guarded by a lookahead on them, so
+    positions no rule can start at are skipped without trying each rule.
+    This matters most for recursive rule sets, which rescan every capture.
+    """
+
+    def __init__(self, name: str, rules: Iterable[Rule] = (), flags: int = 0, recursive: bool = False):
+        self.name = name
+        self.flags = flags
+        self.recursive = recursive
+        self.rules: List[Rule] = []
+        self._stages: Optional[List[_Stage]] = None
+        for rule in rules:
+            self.add(rule)
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> 'RuleSet':
+        """Build a rule set from a LATEX_RULES entry."""
+        flags = re.IGNORECASE if config.get('ignore_case') else 0
+        rule_set = cls(name, flags=flags, recursive=config.get('recursive', False))
+        for rule in config['rules']:
+            rule_set.register(rule['name'], rule['pattern'], rule['replacement'], rule.get('stage', 0))
+        return rule_set
+
+    def register(self, name: str, pattern: str, replacement: str, stage: int = 0) -> Rule:
+        """Add a rule, validating its pattern and replacement up front."""
+        return self.add(Rule(name, pattern, replacement, stage, self.flags))
+
+    def add(self, rule: Rule) -> Rule:
+        self.rules.append(rule)
+        self._stages = None
+        return rule
+
+    def apply(self, text: str) -> str:
+        """Rewrite `text` with every stage in order."""
+        if self._stages is None:
+            self._stages = [
+                _Stage(stage, [rule for rule in self.rules if rule.stage == stage], self.flags, self.recursive)
+                for stage in sorted({rule.stage for rule in self.rules})
+            ]
+        for stage in self._stages:
+            text = stage.apply(text)
+        return text
+
+
+class _Stage:
+    """The rules of one stage, compiled into a single alternation."""
+
+    def __init__(self, number: int, rules: List[Rule], flags: int, recursive: bool):
+        self.number = number
+        self.recursive = recursive
+        # Each rule is wrapped in a group; its own groups follow that group
+        self.rules_by_group: Dict[int, Rule] = {}
+        alternatives = []
+        group = 1
+        for rule in rules:
+            alternatives.append(f'({rule.pattern})')
+            self.rules_by_group[group] = rule
+            group += 1 + rule.regex.groups
+        firsts = [_first_chars(rule.pattern, flags) for rule in rules]
+        gate = '' if None in firsts else f"(?=[{''.join(re.escape(char) for char in sorted(set().union(*firsts)))}])"
+        self.regex = re.compile(f"{gate}(?:{'|'.join(alternatives)})", flags)
+
+    def apply(self, text: str) -> str:
+        return self.regex.sub(self._replace, text)
+
+    def _replace(self, match: re.Match) -> str:
+        offset = match.lastindex
+        rule = self.rules_by_group[offset]
+        groups = match.groups('')[offset:offset + rule.regex.groups]
+        if self.recursive:
+            groups = [self.apply(group) if group else group for group in groups]
+        return rule.expand(groups)
@@ -1,32 +1,110 @@
 import re
-from typing import Optional, List, Dict, Tuple
+from typing import Any, Optional, List, Dict, Iterable, Tuple
+from src.config.settings import LATEX_RULES
+from src.utils.latex_rules import RuleSet
+
+# Compiled rule sets; more rules can be added at runtime with .register()
+FIX_RULES = RuleSet.from_config('fixes', LATEX_RULES['fixes'])
+NATURAL_TEXT_RULES = RuleSet.from_config('natural_text', LATEX_RULES['natural_text'])
+
+# Tokens that matter for structure; everything else is skipped by the scan
+_STRUCTURE_TOKENS = re.compile(
+    r'\\(?P<env>begin|end)\s*\{(?P<env_name>[^{}]*)\}'
+    r'|\\(?P<sizing>left|right)(?![a-zA-Z])\s*(?P<delimiter>\\[a-zA-Z]+|\\.|.)?'
+    r'|\\[a-zA-Z]+|\\.'
+    r'|(?P<open>[{\[(])|(?P<close>[}\])])',
+    re.DOTALL
+)
+_CLOSERS = {'{': '}', '[': ']', '(': ')'}
+
+def find_latex_errors(expression: str) -> List[Dict[str, Any]]:
+    """
+    Check the structure of a LaTeX expression in a single linear scan.
+
+    Braces, brackets and parentheses, \\left/\\right pairs and
+    \\begin/\\end environments must all be balanced and properly nested
+    within each other. Escaped characters such as \\{ are not treated as
+    grouping, and the delimiter after \\left or \\right may be anything.
+    Returns one dict per problem with 'type', 'message' and 'position'
+    (the character offset); an empty list means the expression is valid.
+    """
+    errors: List[Dict[str, Any]] = []
+    # Entries are (kind, opener, position); kind is 'group', 'left' or 'env'
+    stack: List[Tuple[str, str, int]] = []
+    # Open entries per (kind, opener), so a closer with nothing to match
+    # is reported without searching the stack
+    open_counts: Dict[Tuple[str, str], int] = {}
+
+    def push(kind: str, opener: str, position: int) -> None:
+        stack.append((kind, opener, position))
+        open_counts[kind, opener] = open_counts.get((kind, opener), 0) + 1
+
+    def close(kind: str, opener: str, token: str, position: int) -> None:
+        if not open_counts.get((kind, opener)):
+            errors.append({
+                'type': 'unmatched_closing',
+                'message': f"'{token}' has no matching opening",
+                'position': position
+            })
+            return
+        # The matching opener is on the stack: anything above it was never
+        # closed. Each entry is popped once, so the scan stays linear
+        while True:
+            open_kind, open_token, open_position = stack.pop()
+            open_counts[open_kind, open_token] -= 1
+            if open_kind == kind and open_token == opener:
+                return
+            errors.append({
+                'type': 'unclosed',
+                'message': f"'{_describe(open_kind, open_token)}' is not closed before '{token}'",
+                'position': open_position
+            })
+
+    for match in _STRUCTURE_TOKENS.finditer(expression):
+        position = match.start()
+        if match.group('open'):
+            push('group', match.group('open'), position)
+        elif match.group('close'):
+            closer = match.group('close')
+            opener = next(o for o, c in _CLOSERS.items() if c == closer)
+            close('group', opener, closer, position)
+        elif match.group('env'):
+            name = match.group('env_name').strip()
+            if match.group('env') == 'begin':
+                push('env', name, position)
+            else:
+                close('env', name, f'\\end{{{name}}}', position)
+        elif match.group('sizing'):
+            if match.group('delimiter') is None:
+                errors.append({
+                    'type': 'missing_delimiter',
+                    'message': f"'\\{match.group('sizing')}' is not followed by a delimiter",
+                    'position': position
+                })
+            elif match.group('sizing') == 'left':
+                push('left', '\\left', position)
+            else:
+                close('left', '\\left', '\\right', position)
+
+    for kind, token, position in stack:
+        errors.append({
+            'type': 'unclosed',
+            'message': f"'{_describe(kind, token)}' is never closed",
+            'position': position
+        })
+    errors.sort(key=lambda error: error['position'])
+    return errors
+
+def _describe(kind: str, token: str) -> str:
+    return f'\\begin{{{token}}}' if kind == 'env' else token
 
 def validate_latex(expression: str) -> bool:
     """Validate LaTeX expression for basic syntax."""
-    delimiters = {
-        '{': '}',
-        '[': ']',
-        '(': ')',
-        r'\left': r'\right'
-    }
-    
-    # Check all delimiter pairs
-    for opening, closing in delimiters.items():
-        if expression.count(opening) != expression.count(closing):
-            return False
-            
-    # Check proper nesting with stack
-    stack = []
-    simple_delimiters = {'{': '}', '[': ']', '(': ')'}
-    
-    for char in expression:
-        if char in simple_delimiters:
-            stack.append(char)
-        elif char in simple_delimiters.values():
-            if not stack or char != simple_delimiters[stack.pop()]:
-                return False
-    
-    return len(stack) == 0
+    return not find_latex_errors(expression)
+
+def validate_latex_batch(expressions: Iterable[str]) -> List[List[Dict[str, Any]]]:
+    """Run find_latex_errors over many expressions, returning errors in input order."""
+    return [find_latex_errors(expression) for expression in expressions]
 
 def sanitize_latex(expression: str) -> str:
     """Sanitize LaTeX expression for safety."""
@@ -49,42 +127,11 @@ def format_latex(expression: str) -> str:
 
 def fix_common_latex_issues(latex: str) -> str:
     """Fix common LaTeX syntax issues."""
-    fixes = [
-        (r'([0-9]) *([a-zA-Z])', r'\1\cdot\2'),  # Add multiplication dot
-        (r'\\frac([^{])', r'\\frac{\1}'),        # Fix fractions without braces
-        (r'([^\\])(sqrt)', r'\1\\sqrt'),         # Fix sqrt without backslash
-        (r'([^_\^])\d+', r'\1{\2}'),            # Add braces to numbers
-        (r'([^\\])(sum|int|prod)', r'\1\\\2'),   # Fix missing backslashes
-        (r'\\([a-zA-Z]+)([^{])', r'\\\1{\2}')    # Add missing braces to commands
-    ]
-    
-    result = latex
-    for pattern, replacement in fixes:
-        result = re.sub(pattern, replacement, result)
-    
-    return result
+    return FIX_RULES.apply(latex)
 
 def natural_text_to_latex(text: str) -> str:
     """Convert natural language math expressions to LaTeX."""
-    math_patterns: Dict[str, str] = {
-        r'square root of ([^:]+)': r'\\sqrt{\1}',
-        r'fraction (\w+)/(\w+)': r'\\frac{\1}{\2}',
-        r'sum from ([^:]+) to ([^:]+)': r'\\sum_{\1}^{\2}',
-        r'integral from ([^:]+) to ([^:]+)': r'\\int_{\1}^{\2}',
-        r'infinity': r'\\infty',
-        r'alpha': r'\\alpha',
-        r'beta': r'\\beta',
-        r'pi': r'\\pi',
-        r'theta': r'\\theta',
-        r'([0-9]+)th power': r'^{\1}',
-        r'subscript ([0-9]+)': r'_{\1}'
-    }
-    
-    result = text
-    for pattern, replacement in math_patterns.items():
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-    
-    return result
+    return NATURAL_TEXT_RULES.apply(text)
 
 def parse_latex_errors(error_log: str) -> List[Dict[str, str]]:
     """Parse LaTeX compilation errors into structured format."""
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """
+    A heavyweight object built on first use instead of at import time.
+
+    The builder runs at most once, even with concurrent callers. Call warm()
+    to build it in a background thread ahead of the first request, and
+    aget() from coroutines so a cold build runs in the executor instead of
+    blocking the event loop.
+    """
+
+    def __init__(self, builder: Callable[[], T], name: str):
+        self.builder = builder
+        self.name = name
+        self._value: Optional[T] = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self) -> T:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                self._value = self.builder()
+                self._ready = True
+                logger.info(f"Initialized {self.name} in {time.perf_counter() - start:.2f}s")
+        return self._value
+
+    async def aget(self) -> T:
+        if self._ready:
+            return self._value
+        return await asyncio.get_running_loop().run_in_executor(None, self.get)
+
+    def warm(self) -> threading.Thread:
+        """Build the object in a daemon thread; failures are logged and retried on first use."""
+        def run():
+            try:
+                self.get()
+            except Exception as e:
+                logger.warning(f"Background initialization of {self.name} failed: {str(e)}")
+        thread = threading.Thread(target=run, name=f'warm-{self.name}', daemon=True)
+        thread.start()
+        return thread
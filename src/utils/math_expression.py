@@ -0,0 +1,444 @@
+import re
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from src.utils.number_words import decimal_text, number_words
+
+# Precedence used for parenthesization, in LaTeX and in speech
+_SUM, _PRODUCT, _NEGATION, _POWER, _ATOM = 1, 2, 3, 4, 5
+
+_TOKEN = re.compile(r'\s*(?:(?P<number>\d+(?:\.\d+)?|\.\d+)|(?P<word>[a-z]+)|(?P<op>\*\*|[-+*/^()=%]))')
+
+Polynomial = Dict[int, Fraction]
+
+
+class ExpressionError(ValueError):
+    """The text is not an expression the local solver can work with."""
+
+
+class Node:
+    """A node of a parsed expression."""
+
+    precedence = _ATOM
+
+    def children(self) -> List['Node']:
+        return []
+
+
+class Num(Node):
+    """A number. `text` keeps the input spelling of decimals, e.g. "0.50"."""
+
+    def __init__(self, value: Fraction, text: Optional[str] = None):
+        self.value = value
+        self.text = text
+
+    @property
+    def precedence(self) -> int:
+        return _NEGATION if self.value < 0 else _ATOM
+
+
+class Var(Node):
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Neg(Node):
+    precedence = _NEGATION
+
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def children(self) -> List[Node]:
+        return [self.operand]
+
+
+class Percent(Node):
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def children(self) -> List[Node]:
+        return [self.operand]
+
+
+class BinOp(Node):
+    """A binary operation; `implicit` marks multiplication written as juxtaposition (2x)."""
+
+    def __init__(self, op: str, left: Node, right: Node, implicit: bool = False):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.implicit = implicit
+
+    @property
+    def precedence(self) -> int:
+        return {'+': _SUM, '-': _SUM, '*': _PRODUCT, '/': _POWER, '^': _POWER}[self.op]
+
+    def children(self) -> List[Node]:
+        return [self.left, self.right]
+
+
+class Equation:
+    def __init__(self, left: Node, right: Node):
+        self.left = left
+        self.right = right
+
+
+class _Parser:
+    """
+    Recursive descent parser for one-line school algebra.
+
+        equation := expr ('=' expr)?
+        expr     := term (('+' | '-') term)*
+        term     := unary (('*' | '/') unary | implicit unary)*
+        unary    := ('-' | '+') unary | power
+        power    := postfix ('^' unary)?
+        postfix  := atom '%'?
+        atom     := number | variable | '(' expr ')'
+
+    Variables are single letters; "of" reads as multiplication, so that
+    "15% of 80" parses. Any other word is an error.
+    """
+
+    def __init__(self, text: str):
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    @staticmethod
+    def _tokenize(text: str) -> List[tuple]:
+        tokens, position = [], 0
+        text = text.strip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match:
+                raise ExpressionError(f"Unexpected character {text[position]!r}")
+            position = match.end()
+            if match.group('number'):
+                tokens.append(('number', match.group('number')))
+            elif match.group('word'):
+                word = match.group('word')
+                if word == 'of':
+                    tokens.append(('op', '*'))
+                elif len(word) == 1:
+                    tokens.append(('var', word))
+                else:
+                    raise ExpressionError(f"Unknown word {word!r}")
+            else:
+                op = match.group('op')
+                tokens.append(('op', '^' if op == '**' else op))
+        return tokens
+
+    def peek(self) -> Optional[tuple]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def accept(self, op: str) -> bool:
+        if self.peek() == ('op', op):
+            self.position += 1
+            return True
+        return False
+
+    def parse(self) -> Union[Node, Equation]:
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        left = self.expression()
+        result = Equation(left, self.expression()) if self.accept('=') else left
+        if self.peek() is not None:
+            raise ExpressionError(f"Unexpected {self.peek()[1]!r}")
+        return result
+
+    def expression(self) -> Node:
+        node = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = self.peek()[1]
+            self.position += 1
+            node = BinOp(op, node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while True:
+            token = self.peek()
+            if token in (('op', '*'), ('op', '/')):
+                self.position += 1
+                node = BinOp(token[1], node, self.unary())
+            elif token is not None and (token[0] == 'var' or token == ('op', '(')):
+                node = BinOp('*', node, self.power(), implicit=True)
+            else:
+                return node
+
+    def unary(self) -> Node:
+        if self.accept('-'):
+            operand = self.unary()
+            if isinstance(operand, Num) and operand.value > 0:
+                return Num(-operand.value, f'-{operand.text}' if operand.text else None)
+            return Neg(operand)
+        if self.accept('+'):
+            return self.unary()
+        return self.power()
+
+    def power(self) -> Node:
+        base = self.postfix()
+        if self.accept('^'):
+            return BinOp('^', base, self.unary())
+        return base
+
+    def postfix(self) -> Node:
+        node = self.atom()
+        return Percent(node) if self.accept('%') else node
+
+    def atom(self) -> Node:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Unexpected end of expression")
+        self.position += 1
+        kind, value = token
+        if kind == 'number':
+            return Num(Fraction(value), value if '.' in value else None)
+        if kind == 'var':
+            return Var(value)
+        if value == '(':
+            node = self.expression()
+            if not self.accept(')'):
+                raise ExpressionError("Unbalanced parentheses")
+            return node
+        raise ExpressionError(f"Unexpected {value!r}")
+
+
+def parse_problem(text: str) -> Union[Node, Equation]:
+    """Parse an expression or an equation, e.g. "2x+3=7" or "15%of80"."""
+    return _Parser(text).parse()
+
+
+def variables(node: Union[Node, Equation]) -> Set[str]:
+    if isinstance(node, Equation):
+        return variables(node.left) | variables(node.right)
+    if isinstance(node, Var):
+        return {node.name}
+    return set().union(*(variables(child) for child in node.children()))
+
+
+def has_decimals(node: Union[Node, Equation]) -> bool:
+    """Whether the input used decimals or percentages, so results read best as decimals."""
+    if isinstance(node, Equation):
+        return has_decimals(node.left) or has_decimals(node.right)
+    if isinstance(node, Percent) or (isinstance(node, Num) and node.text):
+        return True
+    return any(has_decimals(child) for child in node.children())
+
+
+def apply_operation(op: str, left: Fraction, right: Fraction, max_exponent: int) -> Fraction:
+    """Exact result of `left op right`; powers must have small integer exponents."""
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if right == 0:
+            raise ExpressionError("Division by zero")
+        return left / right
+    if right.denominator != 1 or abs(right) > max_exponent:
+        raise ExpressionError(f"Unsupported exponent {right}")
+    if left == 0 and right < 0:
+        raise ExpressionError("Division by zero")
+    return left ** int(right)
+
+
+def to_polynomial(node: Node, variable: str, max_degree: int) -> Polynomial:
+    """Expand `node` into {degree: coefficient}, dropping zero terms."""
+    def combine(a: Polynomial, b: Polynomial, sign: int) -> Polynomial:
+        result = dict(a)
+        for degree, coefficient in b.items():
+            result[degree] = result.get(degree, Fraction(0)) + sign * coefficient
+        return {d: c for d, c in result.items() if c != 0}
+
+    def multiply(a: Polynomial, b: Polynomial) -> Polynomial:
+        result: Polynomial = {}
+        for da, ca in a.items():
+            for db, cb in b.items():
+                if da + db > max_degree:
+                    raise ExpressionError(f"Degree above {max_degree}")
+                result[da + db] = result.get(da + db, Fraction(0)) + ca * cb
+        return {d: c for d, c in result.items() if c != 0}
+
+    if isinstance(node, Num):
+        return {0: node.value} if node.value != 0 else {}
+    if isinstance(node, Var):
+        if node.name != variable:
+            raise ExpressionError(f"Unexpected variable {node.name!r}")
+        return {1: Fraction(1)}
+    if isinstance(node, Neg):
+        return {d: -c for d, c in to_polynomial(node.operand, variable, max_degree).items()}
+    if isinstance(node, Percent):
+        return {d: c / 100 for d, c in to_polynomial(node.operand, variable, max_degree).items()}
+
+    left = to_polynomial(node.left, variable, max_degree)
+    right = to_polynomial(node.right, variable, max_degree)
+    if node.op in '+-':
+        return combine(left, right, 1 if node.op == '+' else -1)
+    if node.op == '*':
+        return multiply(left, right)
+    if node.op == '/':
+        if set(right) - {0} or not right:
+            raise ExpressionError("Division by a variable or by zero")
+        return {d: c / right[0] for d, c in left.items()}
+    if set(right) - {0} or right.get(0, Fraction(0)).denominator != 1 or right.get(0, 0) < 0:
+        raise ExpressionError("Unsupported exponent")
+    result: Polynomial = {0: Fraction(1)}
+    for _ in range(int(right.get(0, 0))):
+        result = multiply(result, left)
+    return result
+
+
+def polynomial_node(polynomial: Polynomial, variable: str) -> Node:
+    """An expression tree for a polynomial, highest degree first: 2x^2 - x + 3."""
+    node: Optional[Node] = None
+    for degree in sorted(polynomial, reverse=True):
+        coefficient = polynomial[degree]
+        magnitude = abs(coefficient) if node is not None else coefficient
+        term: Node = Var(variable) if degree == 1 else BinOp('^', Var(variable), Num(Fraction(degree)))
+        if degree == 0:
+            term = Num(magnitude)
+        elif magnitude == -1:
+            term = Neg(term)
+        elif magnitude != 1:
+            term = BinOp('*', Num(magnitude), term, implicit=True)
+        if node is None:
+            node = term
+        else:
+            node = BinOp('+' if coefficient > 0 else '-', node, term)
+    return node if node is not None else Num(Fraction(0))
+
+
+def substitute(node: Node, variable: str, value: Fraction) -> Node:
+    """`node` with every occurrence of `variable` replaced by `value`."""
+    if isinstance(node, Var):
+        return Num(value) if node.name == variable else node
+    if isinstance(node, Neg):
+        return Neg(substitute(node.operand, variable, value))
+    if isinstance(node, Percent):
+        return Percent(substitute(node.operand, variable, value))
+    if isinstance(node, BinOp):
+        return BinOp(node.op, substitute(node.left, variable, value),
+                     substitute(node.right, variable, value), node.implicit)
+    return node
+
+
+def number_latex(value: Fraction, decimal: bool = False) -> str:
+    if value.denominator == 1:
+        return str(value.numerator)
+    text = decimal_text(value) if decimal else None
+    if text is not None:
+        return text
+    sign = '-' if value < 0 else ''
+    return f'{sign}\\frac{{{abs(value.numerator)}}}{{{value.denominator}}}'
+
+
+def _needs_parentheses(parent: BinOp, child: Node, is_right: bool) -> bool:
+    if parent.op == '/':
+        return False
+    if parent.op == '^':
+        return not is_right and child.precedence <= _POWER
+    if child.precedence == _NEGATION:
+        # A leading minus only reads correctly at the very start
+        return is_right
+    if is_right:
+        # The parser builds left-associative trees, so an equal-precedence
+        # right operand can only come from explicit parentheses
+        return child.precedence <= parent.precedence
+    return child.precedence < parent.precedence
+
+
+def to_latex(node: Union[Node, Equation], decimal: bool = False,
+             highlight: Optional[Node] = None, color: str = 'blue') -> str:
+    """LaTeX for an expression; the `highlight` node is wrapped in \\color."""
+    def render(node: Node) -> str:
+        text = _render(node)
+        return f'\\color{{{color}}}{{{text}}}' if node is highlight else text
+
+    def wrap(parent: BinOp, child: Node, is_right: bool) -> str:
+        text = render(child)
+        return f'({text})' if _needs_parentheses(parent, child, is_right) else text
+
+    def _render(node: Node) -> str:
+        if isinstance(node, Num):
+            return node.text if node.text else number_latex(node.value, decimal)
+        if isinstance(node, Var):
+            return node.name
+        if isinstance(node, Neg):
+            inner = render(node.operand)
+            return f'-({inner})' if node.operand.precedence <= _NEGATION else f'-{inner}'
+        if isinstance(node, Percent):
+            return f'{render(node.operand)}\\%'
+        if node.op == '/':
+            return f'\\frac{{{render(node.left)}}}{{{render(node.right)}}}'
+        if node.op == '^':
+            return f'{wrap(node, node.left, False)}^{{{render(node.right)}}}'
+        left, right = wrap(node, node.left, False), wrap(node, node.right, True)
+        if node.op == '*' and node.implicit:
+            # 2x, 2(x + 1); a number on the right needs parentheses: 2(3)
+            if isinstance(node.right, Num) and not right.startswith('('):
+                return f'{left}({right})'
+            return f'{left}{right}'
+        symbol = {'+': '+', '-': '-', '*': '\\times'}[node.op]
+        return f'{left} {symbol} {right}'
+
+    if isinstance(node, Equation):
+        return f'{render(node.left)} = {render(node.right)}'
+    return render(node)
+
+
+def to_words(node: Union[Node, Equation], decimal: bool = False) -> str:
+    """Spoken form of an expression, e.g. 2x^2 - 3 -> "two x squared minus three"."""
+    def grouped(parent: BinOp, child: Node, is_right: bool) -> bool:
+        if not _needs_parentheses(parent, child, is_right):
+            return False
+        # A lone negative number reads fine without "the quantity", except as a base
+        return parent.op == '^' or not isinstance(child, (Num, Neg))
+
+    def operand(parent: BinOp, child: Node, is_right: bool) -> str:
+        return f'the quantity {words(child)}' if grouped(parent, child, is_right) else words(child)
+
+    def words(node: Node) -> str:
+        if isinstance(node, Num):
+            return number_words(node.value, decimal or bool(node.text))
+        if isinstance(node, Var):
+            return node.name
+        if isinstance(node, Neg):
+            inner = words(node.operand)
+            return f'negative the quantity {inner}' if node.operand.precedence <= _NEGATION else f'negative {inner}'
+        if isinstance(node, Percent):
+            return f'{words(node.operand)} percent'
+        left = operand(node, node.left, False)
+        if grouped(node, node.left, False):
+            # Pause after a spoken group so it does not run into the operator
+            left += ','
+        if node.op == '^':
+            exponent = node.right.value if isinstance(node.right, Num) else None
+            if exponent == 2:
+                return f'{left} squared'
+            if exponent == 3:
+                return f'{left} cubed'
+            return f'{left} to the power of {words(node.right)}'
+        right = operand(node, node.right, True)
+        if node.op == '*' and node.implicit and isinstance(node.right, (Var, BinOp)) and not grouped(node, node.right, True):
+            return f'{left} {right}'
+        operator = {'+': 'plus', '-': 'minus', '*': 'times', '/': 'divided by'}[node.op]
+        return f'{left} {operator} {right}'
+
+    if isinstance(node, Equation):
+        left = words(node.left)
+        return f'{left}{"," if left.count("the quantity") else ""} equals {words(node.right)}'
+    return words(node)
+
+
+def transform(node: Node, visit: Callable[[Node], Optional[Node]]) -> Node:
+    """Rebuild `node` bottom-up, replacing each node for which `visit` returns a node."""
+    if isinstance(node, Neg):
+        node = Neg(transform(node.operand, visit))
+    elif isinstance(node, Percent):
+        node = Percent(transform(node.operand, visit))
+    elif isinstance(node, BinOp):
+        node = BinOp(node.op, transform(node.left, visit), transform(node.right, visit), node.implicit)
+    replacement = visit(node)
+    return node if replacement is None else replacement
@@ -0,0 +1,90 @@
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from typing import Optional
+
+_ONES = [
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+    'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen'
+]
+_TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+_SCALES = [(10 ** 12, 'trillion'), (10 ** 9, 'billion'), (10 ** 6, 'million'), (1000, 'thousand')]
+_ORDINAL_ENDINGS = {'one': 'first', 'two': 'second', 'three': 'third', 'five': 'fifth',
+                    'eight': 'eighth', 'nine': 'ninth', 'twelve': 'twelfth'}
+
+
+def integer_words(n: int) -> str:
+    """Spoken form of an integer, e.g. -42 -> "negative forty-two"."""
+    if n < 0:
+        return 'negative ' + integer_words(-n)
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _TENS[tens] + (f'-{_ONES[ones]}' if ones else '')
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return f'{_ONES[hundreds]} hundred' + (f' {integer_words(rest)}' if rest else '')
+    for scale, name in _SCALES:
+        if n >= scale:
+            high, rest = divmod(n, scale)
+            return f'{integer_words(high)} {name}' + (f' {integer_words(rest)}' if rest else '')
+    raise AssertionError('unreachable')
+
+
+def ordinal_words(n: int) -> str:
+    """Ordinal of a positive integer, e.g. 3 -> "third", 21 -> "twenty-first"."""
+    words = integer_words(n)
+    head, sep, last = words.rpartition('-') if '-' in words.split(' ')[-1] else words.rpartition(' ')
+    if last in _ORDINAL_ENDINGS:
+        last = _ORDINAL_ENDINGS[last]
+    elif last.endswith('y'):
+        last = last[:-1] + 'ieth'
+    else:
+        last += 'th'
+    return head + sep + last
+
+
+def decimal_text(value: Fraction) -> Optional[str]:
+    """`value` as a plain decimal string, or None if it does not terminate."""
+    denominator, digits = value.denominator, 0
+    for prime in (2, 5):
+        count = 0
+        while denominator % prime == 0:
+            denominator //= prime
+            count += 1
+        digits = max(digits, count)
+    if denominator != 1:
+        return None
+    with localcontext() as context:
+        context.prec = len(str(abs(value.numerator))) + digits + 2
+        text = format(Decimal(value.numerator) / Decimal(value.denominator), 'f')
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+def fraction_words(value: Fraction) -> str:
+    """Spoken fraction, e.g. 3/4 -> "three fourths", -7/2 -> "negative seven halves"."""
+    if value < 0:
+        return 'negative ' + fraction_words(-value)
+    numerator, denominator = value.numerator, value.denominator
+    if denominator == 1:
+        return integer_words(numerator)
+    if denominator == 2:
+        name = 'half' if numerator == 1 else 'halves'
+    else:
+        name = ordinal_words(denominator) + ('' if numerator == 1 else 's')
+    return f'{integer_words(numerator)} {name}'
+
+
+def number_words(value: Fraction, decimal: bool = False) -> str:
+    """
+    Spoken form of an exact number: an integer, a decimal when `decimal`
+    is set and the value terminates ("two point five"), else a fraction.
+    """
+    if value.denominator == 1:
+        return integer_words(value.numerator)
+    text = decimal_text(value) if decimal else None
+    if text is None:
+        return fraction_words(value)
+    whole, _, digits = text.lstrip('-').partition('.')
+    spoken = f"{integer_words(int(whole))} point {' '.join(_ONES[int(d)] for d in digits)}"
+    return f'negative {spoken}' if value < 0 else spoken
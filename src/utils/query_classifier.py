@@ -0,0 +1,116 @@
+import re
+from typing import Any, Dict, Optional
+
+from src.config.settings import QUERY_ROUTING_CONFIG
+from src.services.explanation_cache import normalize_prompt
+
+SIMPLE = 'simple'
+COMPLEX = 'complex'
+
+# Operators counted in the expression part of a prompt
+_OPERATORS = re.compile(r'[-+*/^=]')
+_DIGITS = re.compile(r'\d')
+# "solve for x: ...", "... for x"
+_TARGET_VARIABLE = re.compile(r'\bfor [a-z]\b:?')
+_VARIABLES = re.compile(r'(?<![a-z])[a-z](?![a-z])')
+
+
+class QueryRoute:
+    """Routing decision for a prompt: which crew pipeline explains it, and why."""
+
+    def __init__(self, complexity: str, reason: str):
+        self.complexity = complexity
+        self.reason = reason
+
+    @property
+    def is_simple(self) -> bool:
+        return self.complexity == SIMPLE
+
+    def __repr__(self) -> str:
+        return f'QueryRoute({self.complexity!r}, {self.reason!r})'
+
+
+class QueryClassifier:
+    """
+    Cheap rule-based complexity check run in front of the crew.
+
+    A prompt is simple when, after spelling out operator words ("times")
+    and dropping filler words such as "what is" or "solve", what remains
+    is a short numeric expression with few operators and at most one
+    variable, and no keyword points at a topic that benefits
+    from the two-stage explanation (calculus, proofs, word problems...).
+    Everything else stays on the two-stage pipeline.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or QUERY_ROUTING_CONFIG
+        self.enabled = config['enabled']
+        self.max_words = config['max_simple_words']
+        self.max_operators = config['max_simple_operators']
+        self.max_variables = config['max_simple_variables']
+        self._complex = re.compile(
+            r'\b(?:' + '|'.join(re.escape(k) for k in config['complex_keywords']) + r')', re.IGNORECASE
+        )
+        self._operator_words = config['operator_words']
+        self._operator_word = re.compile(
+            r'\b(?:' + '|'.join(re.escape(w) for w in self._operator_words) + r')\b', re.IGNORECASE
+        )
+        self._fillers = re.compile(
+            r'\b(?:' + '|'.join(re.escape(f) for f in config['filler_phrases']) + r')\b', re.IGNORECASE
+        )
+        self._expression = re.compile(config['simple_expression_pattern'])
+
+    def expression(self, prompt: str) -> str:
+        """The math in a prompt: operator words spelled as symbols, filler words and spaces removed."""
+        return self._strip(normalize_prompt(prompt))
+
+    def _strip(self, text: str) -> str:
+        expression = self._operator_word.sub(lambda m: self._operator_words[m.group(0).lower()], text)
+        expression = _TARGET_VARIABLE.sub(' ', expression)
+        return self._fillers.sub(' ', expression).replace(' ', '')
+
+    def classify(self, prompt: str) -> QueryRoute:
+        if not self.enabled:
+            return QueryRoute(COMPLEX, 'routing disabled')
+
+        text = normalize_prompt(prompt)
+        if len(text.split()) > self.max_words:
+            return QueryRoute(COMPLEX, f'more than {self.max_words} words')
+        keyword = self._complex.search(text)
+        if keyword:
+            return QueryRoute(COMPLEX, f"keyword '{keyword.group(0)}'")
+
+        expression = self._strip(text)
+        if not expression or not self._expression.fullmatch(expression):
+            return QueryRoute(COMPLEX, 'not a plain expression')
+        if not _DIGITS.search(expression):
+            return QueryRoute(COMPLEX, 'no numbers')
+        operators = len(_OPERATORS.findall(expression))
+        if operators > self.max_operators:
+            return QueryRoute(COMPLEX, f'{operators} operators')
+        variables = len(set(_VARIABLES.findall(expression)))
+        if variables > self.max_variables:
+            return QueryRoute(COMPLEX, f'{variables} variables')
+        if expression.count('=') > 1:
+            return QueryRoute(COMPLEX, 'several equations')
+        return QueryRoute(SIMPLE, f'short expression with {operators} operators')
+
+
+_default_classifier: Optional[QueryClassifier] = None
+
+
+def _classifier() -> QueryClassifier:
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = QueryClassifier()
+    return _default_classifier
+
+
+def classify_query(prompt: str) -> QueryRoute:
+    """Classify with the QUERY_ROUTING_CONFIG rules."""
+    return _classifier().classify(prompt)
+
+
+def extract_expression(prompt: str) -> str:
+    """The expression part of a prompt, as seen by the QUERY_ROUTING_CONFIG rules."""
+    return _classifier().expression(prompt)
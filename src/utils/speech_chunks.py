@@ -0,0 +1,46 @@
+import re
+from typing import List
+
+# Sentence ends: terminal punctuation followed by whitespace, so decimals
+# such as 2.5 stay whole
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+
+def split_speech(text: str, first_max_chars: int = 120, max_chars: int = 400) -> List[str]:
+    """
+    Split narration into chunks to synthesize separately, at sentence
+    boundaries.
+
+    The first chunk is the first sentence, cut at a clause boundary if it
+    is longer than `first_max_chars`, so its audio is ready quickly. The
+    following sentences are grouped into chunks of up to `max_chars`, which
+    keeps the number of synthesis calls (and the prosody breaks between
+    them) low. A sentence longer than `max_chars` is kept whole.
+    """
+    sentences = [s for s in _SENTENCE_END.split(text.strip()) if s]
+    if not sentences:
+        return []
+
+    first, rest = sentences[0], sentences[1:]
+    if len(first) > first_max_chars:
+        clauses = _CLAUSE_END.split(first)
+        head = clauses[0]
+        for i, clause in enumerate(clauses[1:], 1):
+            if len(head) + 1 + len(clause) > first_max_chars:
+                rest.insert(0, ' '.join(clauses[i:]))
+                break
+            head = f'{head} {clause}'
+        first = head
+
+    chunks = [first]
+    current = ''
+    for sentence in rest:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f'{current} {sentence}' if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
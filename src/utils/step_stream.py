@@ -0,0 +1,109 @@
+import json
+import logging
+from typing import List, Optional
+
+from src.models.math_models import MathExplanation, Step
+
+logger = logging.getLogger(__name__)
+
+
+class StepStreamParser:
+    """
+    Incrementally parse a streamed MathExplanation JSON document.
+
+    Text chunks are fed as they arrive from the LLM. Each entry of the
+    top-level "steps" array is returned as a Step as soon as its closing
+    brace has been seen, so callers can act on it before the rest of the
+    document has been generated. Braces inside JSON strings (LaTeX is full
+    of them) are ignored. `steps_complete` is set once the array has been
+    closed, so the number of steps is known before the document ends.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.problem: Optional[str] = None
+        self.steps: List[Step] = []
+        self.steps_complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._in_steps = False
+        self._step_start = -1
+
+    def feed(self, chunk: str) -> List[Step]:
+        """Add a chunk of text and return any steps completed by it."""
+        if not chunk:
+            return []
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._finish_string(buffer[self._string_start:i + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ':':
+                if self._depth == 1:
+                    self._pending_key = self._last_string
+            elif char == ',':
+                if self._depth == 1:
+                    self._pending_key = None
+            elif char in '{[':
+                self._depth += 1
+                if char == '[' and self._depth == 2 and self._pending_key == 'steps':
+                    self._in_steps = True
+                elif char == '{' and self._depth == 3 and self._in_steps:
+                    self._step_start = i
+            elif char in '}]':
+                if char == '}' and self._depth == 3 and self._step_start >= 0:
+                    step = self._parse_step(buffer[self._step_start:i + 1])
+                    if step is not None:
+                        self.steps.append(step)
+                        completed.append(step)
+                    self._step_start = -1
+                elif char == ']' and self._depth == 2 and self._in_steps:
+                    self._in_steps = False
+                    self.steps_complete = True
+                self._depth = max(self._depth - 1, 0)
+
+        self._pos = len(buffer)
+        return completed
+
+    def result(self) -> MathExplanation:
+        """Return the explanation assembled from everything fed so far."""
+        return MathExplanation(
+            problem=self.problem or '',
+            steps=list(self.steps)
+        )
+
+    def _finish_string(self, literal: str) -> None:
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            value = literal[1:-1]
+        self._last_string = value
+        if self._depth == 1 and self._pending_key == 'problem':
+            self.problem = value
+
+    def _parse_step(self, text: str) -> Optional[Step]:
+        try:
+            return Step(**json.loads(text))
+        except Exception as e:
+            logger.warning(f"Skipping malformed streamed step: {str(e)}")
+            return None
@@ -0,0 +1,101 @@
+// Audio of one step that arrives in chunks (audio_chunk events) and can
+// start playing before the last chunk is in
+
+export default class AudioStream {
+    constructor() {
+        this.chunks = [];
+        this.ended = false;
+        this.waiters = [];
+    }
+
+    static get supported() {
+        return !!window.MediaSource && MediaSource.isTypeSupported('audio/mpeg');
+    }
+
+    push(chunk) {
+        this.chunks.push(new Uint8Array(chunk));
+        this.wake();
+    }
+
+    end() {
+        this.ended = true;
+        this.wake();
+    }
+
+    wake() {
+        const waiters = this.waiters;
+        this.waiters = [];
+        waiters.forEach((resolve) => resolve());
+    }
+
+    nextEvent() {
+        return new Promise((resolve) => this.waiters.push(resolve));
+    }
+
+    async complete() {
+        while (!this.ended) {
+            await this.nextEvent();
+        }
+        return this.bytes;
+    }
+
+    // All chunks received so far as one MP3
+    get bytes() {
+        const total = this.chunks.reduce((size, chunk) => size + chunk.byteLength, 0);
+        const bytes = new Uint8Array(total);
+        let offset = 0;
+        for (const chunk of this.chunks) {
+            bytes.set(chunk, offset);
+            offset += chunk.byteLength;
+        }
+        return bytes.buffer;
+    }
+
+    // Play through MediaSource, appending chunks as they arrive; a single
+    // SourceBuffer in sequence mode plays them back to back without gaps.
+    // Resolves when playback ends.
+    async play() {
+        const mediaSource = new MediaSource();
+        const audio = new Audio();
+        audio.src = URL.createObjectURL(mediaSource);
+        await new Promise((resolve) => mediaSource.addEventListener('sourceopen', resolve, { once: true }));
+        const sourceBuffer = mediaSource.addSourceBuffer('audio/mpeg');
+        sourceBuffer.mode = 'sequence';
+
+        const finished = new Promise((resolve) => {
+            audio.onended = resolve;
+            audio.onerror = (error) => {
+                console.error('[AudioStream] Playback error:', error);
+                resolve();
+            };
+        });
+
+        let appended = 0;
+        let started = false;
+        try {
+            while (true) {
+                if (appended < this.chunks.length) {
+                    sourceBuffer.appendBuffer(this.chunks[appended++]);
+                    await new Promise((resolve) => sourceBuffer.addEventListener('updateend', resolve, { once: true }));
+                    if (!started) {
+                        started = true;
+                        audio.play().catch((error) => {
+                            console.error('[AudioStream] Error playing audio:', error);
+                            audio.onerror(error);
+                        });
+                    }
+                } else if (this.ended) {
+                    mediaSource.endOfStream();
+                    break;
+                } else {
+                    await this.nextEvent();
+                }
+            }
+            if (started) {
+                await finished;
+            }
+        } finally {
+            URL.revokeObjectURL(audio.src);
+        }
+    }
+}
@@ -10,6 +10,32 @@ export function formatLatex(latex) {
     return `\\[${latex}\\]`;
 }
 
+// Boards from the server are "\\[\\begin{align*} " + lines joined by " \\\\ " + " \\end{align*}\\]"
+const BOARD_PREFIX = '\\[\\begin{align*} ';
+const BOARD_SUFFIX = ' \\end{align*}\\]';
+const LINE_SEPARATOR = ' \\\\ ';
+
+export function splitBoard(board) {
+    if (!board || !board.startsWith(BOARD_PREFIX) || !board.endsWith(BOARD_SUFFIX)) {
+        return null;
+    }
+    return board.slice(BOARD_PREFIX.length, board.length - BOARD_SUFFIX.length).split(LINE_SEPARATOR);
+}
+
+export function joinBoard(lines) {
+    return BOARD_PREFIX + lines.join(LINE_SEPARATOR) + BOARD_SUFFIX;
+}
+
+export function applyBoardPatch(lines, patch) {
+    // Operations index into the base board, so apply them last to first
+    const patched = lines.slice();
+    for (let i = patch.length - 1; i >= 0; i--) {
+        const op = patch[i];
+        patched.splice(op.at, op.remove, ...op.insert);
+    }
+    return patched;
+}
+
 export function validateLatex(latex) {
     // Basic validation of LaTeX syntax
     const delimiters = {
@@ -1,3 +1,10 @@
+import { splitBoard, joinBoard, applyBoardPatch } from './latex-helpers.js';
+import TypesetCache from './typeset-cache.js';
+import AudioStream from './audio-stream.js';
+
+// Session storage key of the last lesson shown, which the Replay Lesson button replays
+const LAST_LESSON_KEY = 'mathboard.lastLessonId';
+
 class MathboardSocket {
     constructor(elements) {
         this.socket = io();
@@ -5,11 +12,38 @@ class MathboardSocket {
         this.stepHistory = [];
         this.currentStepIndex = -1;
         this.currentRequestId = null;
+        this.replayRequestId = null;
         this.elements = elements;
         this.currentAudioData = null;
         this.isPlayingAudio = false;
+        // Audio still arriving for steps of the current request, by step number
+        this.audioStreams = new Map();
+        // Place in line of the current request's waiting OpenAI calls, by pool
+        this.queuePositions = new Map();
+        // Last board received for the current request, kept to apply patches to
+        this.board = { version: 0, lines: null };
+        // Typeset boards survive across requests, since lessons repeat boards too
+        this.typesetCache = new TypesetCache();
         this.setupSocketListeners();
         console.log('[Socket] Initialized MathboardSocket');
+        // Replays only on request: the button replays the last lesson from the server's lesson log
+        const replayLessonButton = document.getElementById('replayLessonButton');
+        if (replayLessonButton) {
+            replayLessonButton.onclick = () => {
+                const lessonId = sessionStorage.getItem(LAST_LESSON_KEY);
+                if (lessonId) {
+                    this.replayLesson(lessonId);
+                }
+            };
+        }
+        this.updateReplayLessonButton();
+    }
+
+    updateReplayLessonButton() {
+        const replayLessonButton = document.getElementById('replayLessonButton');
+        if (replayLessonButton) {
+            replayLessonButton.disabled = !sessionStorage.getItem(LAST_LESSON_KEY);
+        }
     }
 
     setupSocketListeners() {
@@ -28,23 +62,119 @@ class MathboardSocket {
                 hasAudio: data.hasAudio,
                 audioLength: data.audioLength,
                 audioDataPresent: !!data.audio,
-                audioDataLength: data.audio ? data.audio.length : 0
+                audioDataLength: data.audio ? data.audio.byteLength : 0
             });
             
+            // A lesson that can no longer be replayed is forgotten quietly
+            if (data.error && data.requestId === this.replayRequestId) {
+                console.log('[Replay] Lesson is no longer available:', data.natural);
+                sessionStorage.removeItem(LAST_LESSON_KEY);
+                this.updateReplayLessonButton();
+                const loadingSpinner = document.querySelector('.loading-spinner');
+                if (loadingSpinner) {
+                    loadingSpinner.style.display = 'none';
+                }
+                return;
+            }
+
             // Only process steps for current request
             if (data.requestId === this.currentRequestId) {
+                if (!this.resolveBoard(data)) {
+                    // Nothing to draw; the server sends the next board in full
+                    return;
+                }
+                if (data.audioStream) {
+                    // The step's audio follows in audio_chunk events
+                    data.audioStream = new AudioStream();
+                    this.audioStreams.set(data.stepNumber, data.audioStream);
+                }
                 this.addStepToQueue(data);
             } else {
                 console.log(`[Socket] Ignoring step from old request ${data.requestId}`);
             }
         });
 
+        // Streamed audio of a step already received, in order
+        this.socket.on('audio_chunk', (data) => {
+            const stream = data.requestId === this.currentRequestId && this.audioStreams.get(data.stepNumber);
+            if (!stream) {
+                return;
+            }
+            if (data.last) {
+                this.audioStreams.delete(data.stepNumber);
+                stream.end();
+            } else {
+                stream.push(data.audio);
+            }
+        });
+
+        // The server is at capacity and the current request is waiting its turn
+        this.socket.on('queue_position', (data) => {
+            if (data.requestId !== this.currentRequestId) {
+                return;
+            }
+            if (data.position > 0) {
+                this.queuePositions.set(data.pool, data.position);
+            } else {
+                this.queuePositions.delete(data.pool);
+            }
+            this.updateQueueStatus();
+        });
+
+        // The server logged the current lesson; remember it for replays
+        this.socket.on('lesson_recorded', (data) => {
+            if (data.requestId === this.currentRequestId) {
+                console.log(`[Socket] Lesson recorded as ${data.lessonId}`);
+                sessionStorage.setItem(LAST_LESSON_KEY, data.lessonId);
+                this.updateReplayLessonButton();
+            }
+        });
+
         this.socket.on('error', (error) => {
             console.error('[Socket] Error:', error);
             this.showError('An error occurred. Please try again.');
         });
     }
 
+    updateQueueStatus() {
+        const queueStatus = document.getElementById('queueStatus');
+        if (!queueStatus) {
+            return;
+        }
+        // The longest of the waits is the one the user notices
+        const position = Math.max(0, ...this.queuePositions.values());
+        if (position > 0) {
+            queueStatus.textContent = `You're number ${position} in line`;
+            queueStatus.style.display = 'block';
+        } else {
+            queueStatus.style.display = 'none';
+        }
+    }
+
+    resolveBoard(data) {
+        // Steps may carry a line patch against the previous board instead of the
+        // full board. Returns false when the step's board cannot be rebuilt
+        if (data.boardPatch) {
+            if (data.baseVersion !== this.board.version || !this.board.lines) {
+                console.error('[Board] Patch base mismatch, asking for a full board:', {
+                    baseVersion: data.baseVersion,
+                    boardVersion: this.board.version
+                });
+                this.board = { version: 0, lines: null };
+                this.socket.emit('board_resync', { requestId: data.requestId });
+                return false;
+            }
+            this.board = {
+                version: data.boardVersion,
+                lines: applyBoardPatch(this.board.lines, data.boardPatch)
+            };
+            data.math = joinBoard(this.board.lines);
+        } else if (data.boardVersion !== undefined) {
+            this.board = { version: data.boardVersion, lines: splitBoard(data.math) };
+        }
+        return true;
+    }
+
     addStepToQueue(data) {
         console.log('[Queue] Adding step to queue:', {
             queueLengthBefore: this.stepQueue.length,
@@ -72,39 +202,21 @@ class MathboardSocket {
         });
     }
 
-    async playAudio(base64Audio) {
+    async playAudio(audioData) {
         return new Promise((resolve, reject) => {
-            if (!base64Audio) {
+            if (!audioData) {
                 console.log('No audio data provided');
                 resolve();
                 return;
             }
 
             try {
-                console.log('Starting audio playback, base64 length:', base64Audio.length);
+                console.log('Starting audio playback, byte length:', audioData.byteLength);
                 this.isPlayingAudio = true;
                 this.updateNavigationButtons();
                 
-                // Validate base64 string
-                try {
-                    atob(base64Audio.slice(0, 100));
-                    console.log('Validated base64 encoding');
-                } catch (e) {
-                    console.error('Invalid base64 encoding:', e);
-                    this.isPlayingAudio = false;
-                    this.updateNavigationButtons();
-                    resolve();
-                    return;
-                }
-                
-                // Convert base64 to blob
-                const byteCharacters = atob(base64Audio);
-                const byteNumbers = new Array(byteCharacters.length);
-                for (let i = 0; i < byteCharacters.length; i++) {
-                    byteNumbers[i] = byteCharacters.charCodeAt(i);
-                }
-                const byteArray = new Uint8Array(byteNumbers);
-                const blob = new Blob([byteArray], { type: 'audio/mp3' });
+                // Audio arrives as a binary attachment (ArrayBuffer), so it can go straight into a Blob
+                const blob = new Blob([audioData], { type: 'audio/mpeg' });
                 console.log('Created audio blob of size:', blob.size);
                 
                 // Create audio element
@@ -146,6 +258,23 @@ class MathboardSocket {
         });
     }
 
+    async playAudioStream(stream) {
+        if (!AudioStream.supported) {
+            // Without MediaSource, wait for the whole step and play it in one go
+            return this.playAudio(await stream.complete());
+        }
+        this.isPlayingAudio = true;
+        this.updateNavigationButtons();
+        try {
+            console.log('[Audio] Playing streamed audio');
+            await stream.play();
+        } catch (error) {
+            console.error('Error in streamed audio playback:', error);
+        }
+        this.isPlayingAudio = false;
+        this.updateNavigationButtons();
+    }
+
     async displayCurrentStep() {
         if (this.stepHistory.length === 0 || this.currentStepIndex < 0) {
             console.log('[Display] No steps to display');
@@ -169,15 +298,21 @@ class MathboardSocket {
             console.log('[Display] Updating math content');
             try {
                 mathWhiteboard.innerHTML = '';
-                const mathElement = document.createElement('div');
-                mathElement.textContent = data.math;
-                mathWhiteboard.appendChild(mathElement);
-                
-                // Trigger MathJax processing
-                if (window.MathJax) {
+                const cached = this.typesetCache.get(data.boardHash);
+                if (cached) {
+                    // Same board as one typeset before: reuse its SVG instead of retypesetting
+                    console.log('[MathJax] Reusing typeset board', data.boardHash);
+                    mathWhiteboard.appendChild(cached);
+                } else if (window.MathJax) {
+                    const mathElement = document.createElement('div');
+                    mathElement.textContent = data.math;
+                    mathWhiteboard.appendChild(mathElement);
+
+                    // Trigger MathJax processing
                     console.log('[MathJax] Starting typeset');
-                    await window.MathJax.typesetPromise([mathWhiteboard]);
+                    await window.MathJax.typesetPromise([mathElement]);
                     console.log('[MathJax] Completed typeset');
+                    this.typesetCache.set(data.boardHash, mathElement);
                 } else {
                     console.error('[MathJax] Not loaded');
                     this.showError('Error displaying mathematical content');
@@ -196,7 +331,22 @@ class MathboardSocket {
         }
 
         // Play audio if available
-        if (data.hasAudio && data.audio) {
+        if (data.audioStream) {
+            // Replays use the whole audio once it has arrived
+            data.audioStream.complete().then((audio) => {
+                data.audio = audio;
+                if (this.stepHistory[this.currentStepIndex] === data) {
+                    this.currentAudioData = audio;
+                    this.updateNavigationButtons();
+                }
+            });
+            try {
+                await this.playAudioStream(data.audioStream);
+            } catch (error) {
+                console.error('Error during audio playback:', error);
+            }
+            data.audioStream = null;
+        } else if (data.hasAudio && data.audio) {
             console.log('Attempting to play audio');
             try {
                 await this.playAudio(data.audio);
@@ -328,7 +478,33 @@ class MathboardSocket {
         }
 
         console.log('[Query] Sending new math query:', query);
+        this.startRequest();
+
+        // Emit the question to the server
+        console.log('[Query] Emitting request_math event', {
+            requestId: this.currentRequestId,
+            prompt: query
+        });
+        this.socket.emit('request_math', { 
+            prompt: query,
+            requestId: this.currentRequestId,
+            boardDiffs: true
+        });
+    }
+
+    replayLesson(lessonId) {
+        // Steps come straight from the server's lesson log, with no LLM or TTS calls
+        console.log('[Replay] Replaying lesson:', lessonId);
+        this.startRequest();
+        this.replayRequestId = this.currentRequestId;
+        this.socket.emit('replay_lesson', {
+            lessonId: lessonId,
+            requestId: this.currentRequestId,
+            boardDiffs: true
+        });
+    }
 
+    startRequest() {
         const { mathWhiteboard } = this.elements;
         const loadingSpinner = document.querySelector('.loading-spinner');
         const replayButton = document.getElementById('replayAudioButton');
@@ -351,21 +527,15 @@ class MathboardSocket {
         this.currentStepIndex = -1;
         this.currentAudioData = null;
         this.isPlayingAudio = false;
+        this.audioStreams = new Map();
+        this.queuePositions = new Map();
+        this.updateQueueStatus();
+        this.board = { version: 0, lines: null };
         this.updateNavigationButtons();
         
         if (replayButton) {
             replayButton.disabled = true;
         }
-
-        // Emit the question to the server
-        console.log('[Query] Emitting request_math event', {
-            requestId: this.currentRequestId,
-            prompt: query
-        });
-        this.socket.emit('request_math', { 
-            prompt: query,
-            requestId: this.currentRequestId
-        });
     }
 }
 
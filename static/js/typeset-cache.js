@@ -0,0 +1,44 @@
+// Bounded LRU of typeset whiteboard nodes, keyed by the server's board hash
+
+export const DEFAULT_TYPESET_CACHE_SIZE = 64;
+
+export default class TypesetCache {
+    constructor(maxEntries = DEFAULT_TYPESET_CACHE_SIZE) {
+        this.maxEntries = maxEntries;
+        this.entries = new Map();
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    get(hash) {
+        if (!hash || !this.entries.has(hash)) {
+            this.misses++;
+            return null;
+        }
+        // Re-insert so the Map's iteration order stays least-recently-used first
+        const node = this.entries.get(hash);
+        this.entries.delete(hash);
+        this.entries.set(hash, node);
+        this.hits++;
+        return node.cloneNode(true);
+    }
+
+    set(hash, node) {
+        if (!hash || this.maxEntries <= 0) {
+            return;
+        }
+        this.entries.delete(hash);
+        this.entries.set(hash, node.cloneNode(true));
+        while (this.entries.size > this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+
+    clear() {
+        this.entries.clear();
+    }
+
+    get size() {
+        return this.entries.size;
+    }
+}
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services.async_runtime import AsyncRuntime
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(max_concurrent=2, executor_workers=2, name='test-runtime')
+    yield runtime
+    runtime.shutdown()
+
+
+def test_coroutines_share_one_loop_thread(runtime):
+    async def where():
+        return threading.current_thread().name, asyncio.get_running_loop()
+    first = runtime.submit(where()).result(1)
+    second = runtime.submit(where()).result(1)
+    assert first == second
+    assert first[0] == 'test-runtime'
+
+
+def test_at_most_max_concurrent_coroutines_run(runtime):
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, runtime.active)
+        await asyncio.sleep(0.02)
+    futures = [runtime.submit(work()) for _ in range(6)]
+    for future in futures:
+        future.result(1)
+    assert peak == 2
+    assert runtime.active == 0
+
+
+def test_cancelled_while_waiting_for_a_slot_never_starts(runtime):
+    release = threading.Event()
+    started = []
+
+    async def block():
+        await asyncio.get_running_loop().run_in_executor(None, release.wait)
+
+    async def late():
+        started.append(True)
+    blockers = [runtime.submit(block()) for _ in range(2)]
+    waiting = runtime.submit(late())
+    assert waiting.cancel()
+    release.set()
+    for blocker in blockers:
+        blocker.result(1)
+    runtime.submit(asyncio.sleep(0)).result(1)
+    assert started == []
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+pytest.importorskip('flask_socketio')
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    import app
+
+    async def generate_speech(text):
+        return b'ID3' + text.encode()
+
+    async def stream_speech(text, timer=None):
+        for part in (b'ID3', text.encode()):
+            yield part
+    monkeypatch.setattr(app, 'generate_speech', generate_speech)
+    monkeypatch.setattr(app, 'stream_speech', stream_speech)
+    for store in ('explanation_cache', 'lesson_store', 'lesson_log'):
+        monkeypatch.setattr(app, store, None)
+    return app
+
+
+def finished(received, chunked):
+    steps = [m['args'][0] for m in received if m['name'] == 'display_step']
+    if not steps or steps[-1]['stepNumber'] != steps[-1]['totalSteps']:
+        return False
+    last_chunks = [m for m in received if m['name'] == 'audio_chunk' and m['args'][0]['last']]
+    return not chunked or len(last_chunks) == len(steps)
+
+
+def lesson(app, chunked, monkeypatch):
+    monkeypatch.setitem(app.TTS_CONFIG, 'chunked', chunked)
+    client = app.socketio.test_client(app.app)
+    # Solved locally, so no crew is involved
+    client.emit('request_math', {'prompt': 'what is 7 times 8', 'requestId': 'r1', 'useCache': False})
+    deadline = time.monotonic() + 5
+    received = []
+    while time.monotonic() < deadline and not finished(received, chunked):
+        received += client.get_received()
+        time.sleep(0.05)
+    client.disconnect()
+    assert finished(received, chunked)
+    return received
+
+
+def test_whole_step_audio_is_sent_as_bytes(app, monkeypatch):
+    steps = [m['args'][0] for m in lesson(app, False, monkeypatch) if m['name'] == 'display_step']
+    assert steps
+    for step in steps:
+        assert isinstance(step['audio'], bytes)
+        assert step['audioLength'] == len(step['audio'])
+
+
+def test_streamed_audio_chunks_are_sent_as_bytes(app, monkeypatch):
+    chunks = [m['args'][0] for m in lesson(app, True, monkeypatch) if m['name'] == 'audio_chunk']
+    assert chunks
+    assert all(isinstance(chunk['audio'], bytes) for chunk in chunks if not chunk['last'])
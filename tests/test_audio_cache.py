@@ -0,0 +1,50 @@
+from src.services.audio_cache import AudioCache
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    AudioCache(tmp_path).put('k1', b'audio')
+    cache = AudioCache(tmp_path)
+
+    assert cache.get_memory('k1') is None
+    assert cache.get_disk('k1') == b'audio'
+    assert cache.get_memory('k1') == b'audio'
+    stats = cache.get_stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 0)
+
+
+def test_memory_tier_never_touches_disk(tmp_path):
+    cache = AudioCache(tmp_path)
+    cache.put_memory('k1', b'audio')
+
+    assert cache.get('k1') == b'audio'
+    assert AudioCache(tmp_path).get('k1') is None
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(tmp_path, memory_max_bytes=0, disk_max_bytes=10)
+    cache.put_disk('old', b'12345')
+    cache.put_disk('new', b'67890')
+    cache.get_disk('old')
+    cache.put_disk('third', b'abcde')
+
+    assert cache.get_disk('new') is None
+    assert cache.get_disk('old') == b'12345'
+    assert sorted(path.name for path in tmp_path.glob('*/*')) == ['old', 'third']
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = AudioCache(tmp_path)
+    cache.put_disk('k1', b'audio')
+    next(tmp_path.glob('*/k1')).unlink()
+
+    assert cache.get_disk('k1') is None
+    assert cache.get_stats()['disk_entries'] == 0
+
+
+def test_clear_removes_files(tmp_path):
+    cache = AudioCache(tmp_path)
+    cache.put('k1', b'audio')
+    cache.clear()
+
+    assert cache.get('k1') is None
+    assert list(tmp_path.glob('*/*')) == []
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from src.models.math_models import Step
+from src.services.audio_pipeline import stream_ahead, synthesize_ahead
+
+
+async def lesson(*texts):
+    for text in texts:
+        yield Step(natural=text, math='x')
+
+
+def test_stream_ahead_stops_reading_audio_of_a_step_not_being_played():
+    async def run():
+        read = []
+
+        async def stream(text):
+            for index in range(10):
+                read.append(index)
+                yield f'{text}{index}'.encode()
+        pipeline = stream_ahead(lesson('a'), stream, chunk_buffer=2)
+        step, chunks = await pipeline.__anext__()
+        await asyncio.sleep(0.01)
+        # The chunk handed over with the step, two queued and one waiting to be
+        assert len(read) == 4
+        assert [data async for data in chunks] == [f'a{index}'.encode() for index in range(10)]
+        await pipeline.aclose()
+    asyncio.run(run())
+
+
+def test_synthesize_ahead_keeps_step_order_when_audio_finishes_out_of_order():
+    async def run():
+        delays = {'slow': 0.05, 'fast': 0.0, '': 0.0}
+
+        async def synthesize(text):
+            await asyncio.sleep(delays[text])
+            return text.encode()
+        steps = lesson('slow', 'fast', '')
+        received = [(step.natural, audio) async for step, audio in synthesize_ahead(steps, synthesize)]
+        assert received == [('slow', b'slow'), ('fast', b'fast'), ('', None)]
+    asyncio.run(run())
+
+
+def test_synthesize_ahead_caps_concurrent_synthesis():
+    async def run():
+        running, peak = 0, 0
+
+        async def synthesize(text):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return b'x'
+        async for _ in synthesize_ahead(lesson(*'abcdef'), synthesize, lookahead=2):
+            pass
+        assert peak == 2
+    asyncio.run(run())
+
+
+def test_closing_synthesize_ahead_cancels_synthesis_and_closes_the_steps():
+    async def run():
+        cancelled, closed = [], []
+
+        async def steps():
+            try:
+                for text in 'abc':
+                    yield Step(natural=text, math='x')
+            finally:
+                closed.append(True)
+
+        async def synthesize(text):
+            try:
+                await asyncio.sleep(0 if text == 'a' else 60)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+            return text.encode()
+        pipeline = synthesize_ahead(steps(), synthesize)
+        step, audio = await pipeline.__anext__()
+        assert audio == b'a'
+        await asyncio.sleep(0.01)
+        await pipeline.aclose()
+        assert sorted(cancelled) == ['b', 'c']
+        assert closed == [True]
+    asyncio.run(run())
+
+
+def test_stream_ahead_keeps_step_order_and_skips_silent_steps():
+    async def run():
+        async def stream(text):
+            if text == 'mute':
+                return
+            await asyncio.sleep(0.03 if text == 'a' else 0)
+            yield text.encode()
+            yield b'.'
+        received = []
+        async for step, chunks in stream_ahead(lesson('a', 'mute', 'b'), stream):
+            received.append((step.natural, None if chunks is None else [data async for data in chunks]))
+        assert received == [('a', [b'a', b'.']), ('mute', None), ('b', [b'b', b'.'])]
+    asyncio.run(run())
+
+
+def test_stream_ahead_passes_on_a_failed_step_source():
+    async def run():
+        async def steps():
+            yield Step(natural='', math='x')
+            raise RuntimeError('generation failed')
+
+        async def stream(text):
+            yield b'x'
+        pipeline = stream_ahead(steps(), stream)
+        step, chunks = await pipeline.__anext__()
+        assert chunks is None
+        with pytest.raises(RuntimeError):
+            await pipeline.__anext__()
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+import pytest
+
+from src.utils.board_diff import BoardDiffer, apply_board_diff, diff_board, join_board, split_board
+
+BOARDS = [
+    [],
+    [''],
+    ['x + 1 = 2'],
+    ['x + 1 = 2', 'x = 1'],
+    ['x = 1', 'x + 1 = 2'],
+    ['a', 'b', 'c', 'd'],
+    ['a', 'x', 'c', 'y', 'd', 'e'],
+    [r'\frac{1}{2}', r'\text{a \\ b}'],
+]
+
+
+def test_reset_sends_the_next_board_in_full():
+    differ = BoardDiffer()
+    differ.encode(join_board(['x + 1 = 2']))
+    assert 'boardPatch' in differ.encode(join_board(['x + 1 = 2', 'x = 1']))
+
+    differ.reset()
+    resent = differ.encode(join_board(['x + 1 = 2', 'x = 1', 'x = 1']))
+    assert resent == {'boardVersion': 3, 'math': join_board(['x + 1 = 2', 'x = 1', 'x = 1'])}
+    assert 'boardPatch' in differ.encode(join_board(['x + 1 = 2', 'x = 1', 'x = 1', 'done']))
+
+
+@pytest.mark.parametrize('old', BOARDS)
+@pytest.mark.parametrize('new', BOARDS)
+def test_diff_then_apply_round_trips(old, new):
+    assert apply_board_diff(old, diff_board(old, new)) == new
+
+
+@pytest.mark.parametrize('lines', BOARDS)
+def test_identical_boards_need_no_operations(lines):
+    assert diff_board(lines, lines) == []
+
+
+def test_split_board_inverts_join_board():
+    assert split_board(join_board(['x + 1 = 2', 'x = 1'])) == ['x + 1 = 2', 'x = 1']
+    assert split_board(join_board([])) == ['']
+    assert split_board('') is None
+    assert split_board('x = 1') is None
+
+
+def test_encoder_patches_rebuild_every_board():
+    differ = BoardDiffer()
+    client = None
+    boards = [['x + 1 = 2'], ['x + 1 = 2', 'x = 1'], ['x + 1 = 2', 'x = 1'], [''], ['y = ' + 'z' * 80, 'x = 1']]
+    for lines in boards * 2:
+        payload = differ.encode(join_board(lines))
+        if 'boardPatch' in payload:
+            client = join_board(apply_board_diff(split_board(client), payload['boardPatch']))
+        else:
+            client = payload['math']
+        assert client == join_board(lines)
+
+
+def test_a_board_that_is_not_a_board_is_sent_in_full():
+    differ = BoardDiffer()
+    differ.encode(join_board(['x = 1']))
+    assert differ.encode('plain text') == {'boardVersion': 2, 'math': 'plain text'}
+    assert 'math' in differ.encode(join_board(['x = 1', 'y = 2']))
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+
+from src.services.call_scheduler import CallScheduler
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__('rate limited')
+        self.response = type('Response', (), {'headers': {'retry-after-ms': retry_after} if retry_after else {}})()
+
+
+def make_scheduler(max_retries=0, **pool):
+    return CallScheduler({
+        'enabled': True,
+        'pools': {'tts': {'max_concurrent': 8, 'tokens_per_minute': None, 'requests_per_minute': None, **pool}},
+        'decrease_factor': 0.5,
+        'backoff_seconds': 0.01,
+        'max_backoff_seconds': 0.05,
+        'max_retries': max_retries
+    })
+
+
+async def ok():
+    return 'done'
+
+
+async def limited():
+    raise RateLimited()
+
+
+def test_rate_limit_halves_the_limit_and_success_regrows_it():
+    async def run():
+        scheduler = make_scheduler()
+        pool = scheduler.pools['tts']
+        with pytest.raises(RateLimited):
+            await scheduler.call('tts', limited)
+        assert pool.limit == 4.0
+        assert pool.paused_until > 0
+        assert await scheduler.call('tts', ok) == 'done'
+        assert pool.limit == 4.25
+        assert pool.in_flight == 0
+    asyncio.run(run())
+
+
+def test_rate_limited_call_is_retried_after_the_pause():
+    async def run():
+        scheduler = make_scheduler(max_retries=2)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RateLimited(retry_after='20')
+            return 'done'
+        assert await scheduler.call('tts', flaky) == 'done'
+        assert len(attempts) == 2
+        assert scheduler.pools['tts'].limit == 4.25
+    asyncio.run(run())
+
+
+def test_cancelled_call_leaves_the_limit_alone():
+    async def run():
+        scheduler = make_scheduler()
+        pool = scheduler.pools['tts']
+        pool.limit = 2.0
+
+        async def slow():
+            await asyncio.sleep(60)
+        task = asyncio.ensure_future(scheduler.call('tts', slow))
+        await asyncio.sleep(0.01)
+        assert pool.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pool.in_flight == 0
+        assert pool.limit == 2.0
+    asyncio.run(run())
+
+
+def test_stream_closed_early_leaves_the_limit_alone():
+    async def run():
+        scheduler = make_scheduler()
+        pool = scheduler.pools['tts']
+        pool.limit = 2.0
+
+        async def chunks():
+            for chunk in (b'a', b'b', b'c'):
+                yield chunk
+        stream = scheduler.stream('tts', chunks)
+        assert await stream.__anext__() == b'a'
+        await stream.aclose()
+        assert pool.in_flight == 0
+        assert pool.limit == 2.0
+    asyncio.run(run())
+
+
+def test_queued_callers_are_served_round_robin():
+    async def run():
+        from src.services.call_scheduler import set_caller
+        scheduler = make_scheduler(max_concurrent=1)
+        order = []
+
+        async def session(name, calls):
+            set_caller(name)
+            for i in range(calls):
+                async def call(i=i):
+                    order.append(f'{name}{i}')
+                    await asyncio.sleep(0)
+                await scheduler.call('tts', call)
+        await asyncio.gather(session('a', 3), session('b', 1))
+        assert order.index('b0') < order.index('a2')
+    asyncio.run(run())
+
+
+def test_buffered_stream_frees_the_slot_before_the_consumer_finishes():
+    async def run():
+        scheduler = make_scheduler()
+        pool = scheduler.pools['tts']
+
+        async def chunks():
+            for chunk in (b'a', b'b', b'c'):
+                yield chunk
+        received = []
+        async for chunk in scheduler.stream('tts', chunks, buffered=True):
+            received.append(chunk)
+            if len(received) == 1:
+                await asyncio.sleep(0.01)
+                assert pool.in_flight == 0
+        assert received == [b'a', b'b', b'c']
+    asyncio.run(run())
+
+
+def test_buffered_stream_retries_a_rate_limited_start():
+    async def run():
+        scheduler = make_scheduler(max_retries=2)
+        attempts = []
+
+        async def chunks():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RateLimited(retry_after='20')
+            yield b'a'
+        assert [chunk async for chunk in scheduler.stream('tts', chunks, buffered=True)] == [b'a']
+        assert len(attempts) == 2
+    asyncio.run(run())
+
+
+def test_buffered_stream_passes_on_errors_after_its_items():
+    async def run():
+        scheduler = make_scheduler()
+        received = []
+
+        async def chunks():
+            yield b'a'
+            raise ValueError('broken')
+        with pytest.raises(ValueError):
+            async for chunk in scheduler.stream('tts', chunks, buffered=True):
+                received.append(chunk)
+        assert received == [b'a']
+        assert scheduler.pools['tts'].in_flight == 0
+    asyncio.run(run())
+
+
+def test_closing_a_buffered_stream_stops_its_reader():
+    async def run():
+        scheduler = make_scheduler()
+        pool = scheduler.pools['tts']
+
+        async def endless():
+            while True:
+                yield b'a'
+                await asyncio.sleep(0.01)
+        stream = scheduler.stream('tts', endless, buffered=True)
+        assert await stream.__anext__() == b'a'
+        await stream.aclose()
+        assert pool.in_flight == 0
+    asyncio.run(run())
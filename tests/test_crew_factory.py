@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('crewai')
+
+
+@pytest.fixture(scope='module')
+def factory():
+    mp = pytest.MonkeyPatch()
+    mp.setenv('OPENAI_API_KEY', 'test')
+    mp.setenv('OTEL_SDK_DISABLED', 'true')
+    mp.setenv('CREWAI_DISABLE_TELEMETRY', 'true')
+    from src.crews.crew import CrewFactory
+    yield CrewFactory()
+    mp.undo()
+
+
+def test_crew_copies_do_not_share_task_state(factory):
+    first, second = factory.crew(), factory.crew()
+    assert [task.name for task in first.tasks] == ['generate_explanation', 'optimize_visual_narrative']
+    assert first.tasks[0] is not second.tasks[0]
+    assert first.agents[0] is not second.agents[0]
+    assert first.tasks[0].agent is first.agents[0]
+
+
+def test_assigned_models_share_one_llm_per_tier(factory):
+    first, second = factory.crew(), factory.crew()
+    choices = factory._assign_models(first, 'complex')
+    factory._assign_models(second, 'complex')
+    assert len(choices) == 2
+    for task, other, choice in zip(first.tasks, second.tasks, choices):
+        assert task.agent.llm is other.agent.llm is factory._llms[choice.model]
+
+
+def test_task_callback_applies_to_one_copy_only(factory):
+    def callback(output):
+        pass
+    assert factory.crew(task_callback=callback).task_callback is callback
+    assert factory.crew().task_callback is None
+
+
+def test_draft_and_fast_crews_run_a_single_task(factory):
+    assert [task.name for task in factory.draft_crew().tasks] == ['generate_explanation']
+    assert [task.name for task in factory.fast_crew().tasks] == ['explain_directly']
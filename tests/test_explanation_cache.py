@@ -0,0 +1,39 @@
+import pytest
+
+from src.models.math_models import MathExplanation, Step
+from src.services.explanation_cache import ExplanationCache, MemoryBackend, normalize_prompt, prompt_cache_key
+
+
+@pytest.mark.parametrize('a, b', [
+    ('Solve 2x + 3 = 7?', 'solve 2x+3=7'),
+    ('What is 3 × 4', 'what is 3*4'),
+    ('solve 2 * x = 10.', 'Solve 2x = 10'),
+    ('x²  =  9', 'x^2=9'),
+    ('How do you add fractions?!', 'how do you add fractions'),
+])
+def test_equivalent_prompts_share_a_key(a, b):
+    assert normalize_prompt(a) == normalize_prompt(b)
+    assert prompt_cache_key(a) == prompt_cache_key(b)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('what is 5!', 'what is 5'),
+    ('what is (2+3)!', 'what is (2+3)'),
+    ('n!', 'n'),
+    ('what is 5!!', 'what is 5!'),
+    ('solve 2x+3=7', 'solve 2x-3=7'),
+])
+def test_different_prompts_do_not_collide(a, b):
+    assert prompt_cache_key(a) != prompt_cache_key(b)
+
+
+def test_factorial_survives_trailing_punctuation():
+    assert normalize_prompt('What is 5! ?') == 'what is 5!'
+
+
+def test_cache_round_trip_uses_normalized_key():
+    cache = ExplanationCache(MemoryBackend())
+    explanation = MathExplanation(problem='5!', steps=[Step(natural='Multiply.', math='120')])
+    cache.set('What is 5!', explanation)
+    assert cache.get('what is 5 !').steps[0].math == '120'
+    assert cache.get('what is 5') is None
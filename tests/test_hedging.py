@@ -0,0 +1,132 @@
+import asyncio
+import importlib
+
+import pytest
+
+from src.services.hedging import LatencyWindow, hedged, hedged_stream
+
+
+@pytest.fixture
+def tts_service(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    module = importlib.import_module('src.services.tts_service')
+    monkeypatch.setitem(module.TTS_CONFIG, 'deadline_seconds', 0.05)
+    return module
+
+
+def calls(*delays):
+    """make_call for hedged(): the n-th call answers n after delays[n] seconds."""
+    started, cancelled = [], []
+
+    async def make_call():
+        index = len(started)
+        started.append(index)
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+    return make_call, started, cancelled
+
+
+def test_latency_window_waits_for_enough_samples():
+    window = LatencyWindow(size=10, min_samples=3)
+    window.add(1.0)
+    window.add(2.0)
+    assert window.quantile(0.9) is None
+    window.add(3.0)
+    assert window.quantile(0.9) == 3.0
+    assert window.quantile(0.0) == 1.0
+
+
+def test_fast_call_is_not_hedged():
+    async def run():
+        make_call, started, _ = calls(0.0, 0.0)
+        assert await hedged(make_call, 0.05, 'test') == 0
+        assert started == [0]
+    asyncio.run(run())
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    async def run():
+        make_call, started, cancelled = calls(60, 0.0)
+        assert await hedged(make_call, 0.01, 'test') == 1
+        assert started == [0, 1]
+        assert cancelled == [0]
+    asyncio.run(run())
+
+
+def test_no_hedge_when_not_allowed_or_not_calibrated():
+    async def run():
+        make_call, started, _ = calls(0.03, 0.0)
+        assert await hedged(make_call, 0.01, 'test', allow_hedge=lambda: False) == 0
+        make_call, started_uncalibrated, _ = calls(0.03, 0.0)
+        assert await hedged(make_call, None, 'test') == 0
+        assert started == started_uncalibrated == [0]
+    asyncio.run(run())
+
+
+def test_failed_hedge_leaves_the_primary_to_answer():
+    async def run():
+        attempts = []
+
+        async def make_call():
+            attempts.append(1)
+            if len(attempts) == 2:
+                raise RuntimeError('hedge failed')
+            await asyncio.sleep(0.03)
+            return 'primary'
+        assert await hedged(make_call, 0.01, 'test') == 'primary'
+    asyncio.run(run())
+
+
+def test_hedged_stream_reads_the_winner_to_the_end_and_closes_the_loser():
+    async def run():
+        closed = []
+
+        def streams():
+            count = 0
+
+            def make_stream():
+                nonlocal count
+                index, count = count, count + 1
+
+                async def stream():
+                    try:
+                        await asyncio.sleep(60 if index == 0 else 0)
+                        for part in ('a', 'b'):
+                            yield f'{index}{part}'
+                    finally:
+                        closed.append(index)
+                return stream()
+            return make_stream
+        items = [item async for item in hedged_stream(streams(), 0.01, 'test')]
+        assert items == ['1a', '1b']
+        assert sorted(closed) == [0, 1]
+    asyncio.run(run())
+
+
+def test_deadline_skip_cancels_the_call(tts_service, monkeypatch):
+    async def run():
+        monkeypatch.setitem(tts_service.TTS_CONFIG, 'on_deadline', 'skip')
+        make_call, _, cancelled = calls(60)
+        assert await tts_service._within_deadline(make_call()) is None
+        assert cancelled == [0]
+    asyncio.run(run())
+
+
+def test_deadline_wait_keeps_waiting(tts_service, monkeypatch):
+    async def run():
+        monkeypatch.setitem(tts_service.TTS_CONFIG, 'on_deadline', 'wait')
+        make_call, _, cancelled = calls(0.1)
+        assert await tts_service._within_deadline(make_call()) == 0
+        assert cancelled == []
+    asyncio.run(run())
+
+
+def test_call_within_its_deadline_is_returned(tts_service):
+    async def run():
+        make_call, _, _ = calls(0.0)
+        assert await tts_service._within_deadline(make_call()) == 0
+    asyncio.run(run())
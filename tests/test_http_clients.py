@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('httpx')
+
+from src.services import http_clients, metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+def counts(client):
+    return metrics.HTTP_REQUESTS.value(client=client), metrics.HTTP_CONNECTIONS_OPENED.value(client=client)
+
+
+def test_sync_client_reuses_its_connection(server):
+    requests, connections = counts(http_clients.SYNC)
+    with http_clients._build_sync_http() as client:
+        for _ in range(3):
+            assert client.get(server).text == 'ok'
+        assert [state for state, _ in http_clients._connection_states(client)] == ['idle']
+    assert counts(http_clients.SYNC) == (requests + 3, connections + 1)
+
+
+def test_async_client_reuses_its_connection(server):
+    async def run():
+        async with http_clients._build_async_http() as client:
+            for _ in range(3):
+                assert (await client.get(server)).text == 'ok'
+    requests, connections = counts(http_clients.ASYNC)
+    asyncio.run(run())
+    assert counts(http_clients.ASYNC) == (requests + 3, connections + 1)
@@ -0,0 +1,40 @@
+import pytest
+
+from src.config.settings import LATEX_CONFIG
+from src.utils.latex_formatter import board_hash, format_board_latex, format_cache_info
+
+
+@pytest.mark.parametrize('latex, expected', [
+    (r'x + 1 = 2 \\ x = 1', r'\[\begin{align*} x + 1 = 2 \\ & x = 1 \end{align*}\]'),
+    (r'\[a \\\\ b\]', r'\[\begin{align*} a \\ & b \end{align*}\]'),
+    (r'a \\ & b', r'\[\begin{align*} a \\ & b \end{align*}\]'),
+    (r'\frac{1}{2}\\y', r'\[\begin{align*} \frac{1}{2} \\ & y \end{align*}\]'),
+    (r'\color{red}x', r'\[\begin{align*} \color{red}{x} \end{align*}\]'),
+])
+def test_boards_are_aligned_and_wrapped(latex, expected):
+    assert format_board_latex(latex) == expected
+
+
+def test_many_commands_are_copied_through():
+    lines = [rf'\frac{{{i}}}{{2}} = \sqrt{{{i}}}' for i in range(12)]
+    formatted = format_board_latex(r' \\ '.join(lines))
+    assert formatted == r'\[\begin{align*} ' + r' \\ & '.join(lines) + r' \end{align*}\]'
+
+
+def test_empty_board_is_left_alone():
+    assert format_board_latex('') == ''
+
+
+def test_repeated_boards_are_memoized():
+    board = r'y = 2x \\ y = 4'
+    format_board_latex(board)
+    hits = format_cache_info().hits
+    assert format_board_latex(board) == format_board_latex(board)
+    assert format_cache_info().hits == hits + 2
+
+
+def test_board_hash_is_stable_and_distinguishes_boards():
+    formatted = format_board_latex(r'x = 1')
+    assert board_hash(formatted) == board_hash(format_board_latex(r'x = 1'))
+    assert board_hash(formatted) != board_hash(format_board_latex(r'x = 2'))
+    assert len(board_hash(formatted)) == LATEX_CONFIG['board_hash_length']
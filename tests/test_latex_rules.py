@@ -0,0 +1,65 @@
+import re
+
+import pytest
+
+from src.config.settings import LATEX_RULES
+from src.utils import latex_rules
+from src.utils.latex_rules import RuleSet, _first_chars
+
+
+@pytest.mark.parametrize('pattern, chars', [
+    (r'square root of ([^:]+)', {'s'}),
+    (r'(?<![\\a-zA-Z])pi(?![a-zA-Z])', {'p'}),
+    (r'([0-9]+)th power', set('0123456789')),
+    (r'[0-9]+|x', set('0123456789x')),
+    (r'(?:ab|cd)e', {'a', 'c'}),
+])
+def test_first_chars(pattern, chars):
+    assert _first_chars(pattern, 0) == chars
+
+
+def test_first_chars_of_ascii_categories():
+    assert _first_chars(r'\d+', re.ASCII) == set('0123456789')
+    assert _first_chars(r'(?a)\d+', 0) == set('0123456789')
+
+
+@pytest.mark.parametrize('pattern', [r'x?y', r'a*', r'[^a]b', r'\w+', r'.x', r'(?:a|)b', r'\d+', r'\s'])
+def test_first_chars_unknown(pattern):
+    # Unicode \d, \w and \s match more than their ASCII characters
+    assert _first_chars(pattern, 0) is None
+
+
+@pytest.mark.parametrize('name', ['fixes', 'natural_text'])
+@pytest.mark.parametrize('text', [
+    'x^12 + y_10 = 2x', 'x^٣٤ + ３x', '٣x + sqrt ٤', 'square root of ٣th power', 'x_١٢ sum int',
+    'fraction ٣/４ plus pi', '\\frac٣ + \\sqrt ٤',
+])
+def test_gated_and_ungated_stages_agree(monkeypatch, name, text):
+    gated = RuleSet.from_config(name, LATEX_RULES[name])
+    # Stages are compiled on first use
+    gated.apply('')
+    monkeypatch.setattr(latex_rules, '_first_chars', lambda pattern, flags: None)
+    ungated = RuleSet.from_config(name, LATEX_RULES[name])
+    assert gated.apply(text) == ungated.apply(text)
+
+
+def test_gated_stage_matches_case_insensitively():
+    rules = RuleSet('test', flags=re.IGNORECASE)
+    rules.register('pi', r'pi', r'\\pi')
+    rules.register('sum', r'sum', r'\\sum')
+    # The gate is folded like the rules: 'ſ' (long s) matches 's' here
+    assert rules.apply('Pi and PI, ſum') == r'\pi and \pi, \sum'
+
+
+def test_ungated_stage_still_applies():
+    rules = RuleSet('test')
+    rules.register('optional', r'x?y', r'Y')
+    rules.register('digit', r'\d', r'#')
+    assert rules.apply('xy y 3') == 'Y Y #'
+
+
+def test_recursive_rules_convert_nested_phrases():
+    rules = RuleSet('test', recursive=True)
+    rules.register('sqrt', r'root of ([^:]+)', r'\\sqrt{\1}')
+    rules.register('pi', r'pi', r'\\pi')
+    assert rules.apply('root of root of pi: done') == r'\sqrt{\sqrt{\pi}}: done'
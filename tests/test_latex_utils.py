@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from src.utils.latex_utils import find_latex_errors, validate_latex, validate_latex_batch
+
+
+def kinds(expression):
+    return [(error['type'], error['position']) for error in find_latex_errors(expression)]
+
+
+@pytest.mark.parametrize('expression', [
+    '',
+    r'x^{2} + \frac{1}{2}',
+    r'\left( \frac{a}{b} \right]',
+    r'\left. x \right|',
+    r'\{ x \} + [a, (b)]',
+    r'\begin{pmatrix} 1 & 2 \\ 3 & 4 \end{pmatrix}',
+    r'\begin{cases} x & \text{if } x > 0 \end{cases}',
+    r'\left\{ x \right\}',
+])
+def test_valid_expressions(expression):
+    assert find_latex_errors(expression) == []
+    assert validate_latex(expression)
+
+
+@pytest.mark.parametrize('expression, expected', [
+    (r'\frac{1}{2', [('unclosed', 8)]),
+    (r'x}', [('unmatched_closing', 1)]),
+    (r'(a]', [('unclosed', 0), ('unmatched_closing', 2)]),
+    (r'\left( x', [('unclosed', 0)]),
+    (r'x \right)', [('unmatched_closing', 2)]),
+    (r'\left', [('missing_delimiter', 0)]),
+    (r'\begin{matrix} 1', [('unclosed', 0)]),
+    (r'\begin{matrix} 1 \end{pmatrix}', [('unclosed', 0), ('unmatched_closing', 17)]),
+])
+def test_structural_errors(expression, expected):
+    assert kinds(expression) == expected
+    assert not validate_latex(expression)
+
+
+def test_closing_an_outer_group_reports_the_inner_ones():
+    errors = find_latex_errors(r'\sqrt{ \left( x }')
+    assert [error['type'] for error in errors] == ['unclosed']
+    assert errors[0]['position'] == 7
+    assert "'\\left' is not closed before '}'" == errors[0]['message']
+
+
+def test_errors_are_sorted_by_position():
+    errors = find_latex_errors(r'} { ] \begin{x}')
+    positions = [error['position'] for error in errors]
+    assert positions == sorted(positions)
+    assert len(errors) == 4
+
+
+def test_long_input_is_scanned_linearly():
+    assert find_latex_errors('{' * 50000 + '}' * 50000) == []
+    assert len(find_latex_errors('}' * 10000)) == 10000
+
+
+def test_batch_keeps_input_order():
+    assert [bool(errors) for errors in validate_latex_batch(['x', '{', 'y}', '{}'])] == [False, True, True, False]
+
+
+def test_unmatched_closers_do_not_rescan_the_stack():
+    n = 20000
+    start = time.perf_counter()
+    errors = find_latex_errors('(' * n + ']' * n)
+    assert time.perf_counter() - start < 1.0
+    assert [error['type'] for error in errors] == ['unclosed'] * n + ['unmatched_closing'] * n
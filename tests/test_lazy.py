@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+
+from src.utils.lazy import Lazy
+
+
+def test_builds_once_under_concurrent_callers():
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.02)
+        return object()
+    lazy = Lazy(build, 'test object')
+    assert not lazy.ready
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert all(result is results[0] for result in results)
+    assert lazy.ready
+
+
+def test_aget_builds_off_the_event_loop():
+    loop_thread = []
+
+    def build():
+        return threading.current_thread()
+
+    async def run():
+        loop_thread.append(threading.current_thread())
+        return await Lazy(build, 'test object').aget()
+    assert asyncio.run(run()) is not loop_thread[0]
+
+
+def test_failed_warm_up_is_retried_on_first_use():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('not yet')
+        return 'built'
+    lazy = Lazy(build, 'test object')
+    lazy.warm().join()
+    assert not lazy.ready
+    assert lazy.get() == 'built'
+    assert len(attempts) == 2
@@ -0,0 +1,96 @@
+import pytest
+
+from src.models.math_models import Step
+from src.services.lesson_log import LessonLog
+from src.services.lesson_store import Lesson
+
+
+def lesson(prompt, *audio):
+    steps = [Step(natural=f'step {i}', math=f'x = {i}') for i in range(len(audio))]
+    return Lesson(prompt, steps, [f'$x = {i}$' for i in range(len(audio))], list(audio))
+
+
+def exact_garbage(log):
+    return log._size() - 16 - 4 - sum(entry.size for entry in log._live())
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = LessonLog(tmp_path / 'lessons.log', compact_garbage_ratio=1.0)
+    yield log
+    log.close()
+
+
+def test_record_and_read_back(log):
+    lesson_id = log.record(lesson('solve 2x = 4', b'first', None), {'total_seconds': 1.5})
+
+    logged = log.get(lesson_id)
+    assert [step.natural for step in logged.steps] == ['step 0', 'step 1']
+    assert logged.audio == [b'first', None]
+    assert logged.timings == {'total_seconds': 1.5}
+    assert log.latest('Solve 2x=4?').lesson_id == lesson_id
+
+
+def test_garbage_counter_matches_a_full_scan(log):
+    log.record(lesson('a', b'shared', b'only-first'))
+    assert log.stats()['garbage_bytes'] == exact_garbage(log) == 0
+    log.record(lesson('a', b'shared', b'shared'))
+    log.record(lesson('b', b'shared'))
+    log.record(lesson('a', b'new'))
+
+    assert log.stats()['garbage_bytes'] == exact_garbage(log) > 0
+
+
+def test_reopen_recovers_records_missing_from_the_index(tmp_path, log):
+    log.record(lesson('a', b'one'))
+    header = log.index_path.read_text().splitlines()[0]
+    second = log.record(lesson('b', b'two'))
+    log.close()
+    # As if the process died after appending to the log but before the index
+    log.index_path.write_text(header + '\n')
+
+    reopened = LessonLog(log.path)
+    assert len(reopened) == 2
+    assert reopened.get(second).audio == [b'two']
+    assert reopened.stats()['garbage_bytes'] == exact_garbage(reopened)
+    reopened.close()
+
+
+def test_reopen_cuts_off_a_torn_record(log):
+    kept = log.record(lesson('a', b'one'))
+    log.record(lesson('b', b'two'))
+    log.close()
+    with open(log.path, 'r+b') as f:
+        f.truncate(log.path.stat().st_size - 3)
+
+    reopened = LessonLog(log.path)
+    assert len(reopened) == 1
+    assert reopened.get(kept).audio == [b'one']
+    assert reopened.latest('b') is None
+    # Appends after recovery land on a clean record boundary
+    again = reopened.record(lesson('b', b'two'))
+    reopened.close()
+    assert LessonLog(log.path).get(again).audio == [b'two']
+
+
+def test_compact_keeps_the_newest_recording_and_its_audio(log):
+    log.record(lesson('a', b'old-audio'))
+    newest = log.record(lesson('a', b'new-audio'))
+    other = log.record(lesson('b', b'other'))
+
+    sizes = log.compact()
+    assert sizes['after'] < sizes['before']
+    assert len(log) == 2
+    assert log.latest('a').lesson_id == newest
+    assert log.get(other).audio == [b'other']
+    assert log.stats()['garbage_bytes'] == 0
+
+
+def test_compacts_on_its_own_past_the_garbage_ratio(tmp_path):
+    log = LessonLog(tmp_path / 'lessons.log', compact_garbage_ratio=0.5)
+    for i in range(3):
+        latest = log.record(lesson('a', f'audio {i}'.encode()))
+
+    assert len(log) == 1
+    assert log.latest('a').lesson_id == latest
+    log.close()
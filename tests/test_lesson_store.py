@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.math_models import MathExplanation, Step
+from src.services.lesson_batch import build_lesson, read_prompts
+from src.services.lesson_store import Lesson, LessonStore
+
+STEPS = [Step(natural='Subtract three.', math='2x = 4'), Step(natural='', math='x = 2')]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LessonStore(tmp_path / 'lessons.db')
+    yield store
+    store.close()
+
+
+def test_lessons_round_trip_with_their_audio(store):
+    store.put(Lesson('Solve 2x + 3 = 7', STEPS, ['<b1>', '<b2>'], [b'ID3a', None]))
+    lesson = store.get('solve 2x+3=7?')
+    assert lesson.prompt == 'Solve 2x + 3 = 7'
+    assert lesson.steps == STEPS
+    assert lesson.formatted == ['<b1>', '<b2>']
+    assert lesson.audio == [b'ID3a', None]
+    assert lesson.audio_for('Subtract three.') == b'ID3a'
+    assert 'solve 2x + 3 = 7' in store
+    assert len(store) == 1
+
+
+def test_put_replaces_a_lesson_and_its_audio(store):
+    store.put(Lesson('2+2', STEPS, ['a', 'b'], [b'old', b'old']))
+    store.put(Lesson('2+2', STEPS[:1], ['a'], [None]))
+    assert store.get('2+2').audio == [None]
+    store.delete('2+2')
+    assert store.get('2+2') is None
+    assert len(store) == 0
+
+
+def test_a_lesson_needs_one_board_and_audio_per_step():
+    with pytest.raises(ValueError):
+        Lesson('2+2', STEPS, ['a'], [None, None])
+
+
+def test_read_prompts_skips_comments_and_duplicates(tmp_path):
+    path = tmp_path / 'prompts.txt'
+    path.write_text('# warm-up\nSolve 2x + 3 = 7\n\nsolve 2x+3=7?\nwhat is 7 times 8\n', encoding='utf-8')
+    assert read_prompts(path) == ['Solve 2x + 3 = 7', 'what is 7 times 8']
+
+
+def test_build_lesson_synthesizes_every_narrated_step():
+    class Crew:
+        async def kickoff(self, inputs):
+            return SimpleNamespace(pydantic=MathExplanation(problem=inputs['user_query'], steps=STEPS))
+
+    async def synthesize(text):
+        return text.encode()
+
+    async def run():
+        return await build_lesson(Crew(), 'prove that x = 2', synthesize, asyncio.Semaphore(2))
+    lesson = asyncio.run(run())
+    assert lesson.audio == [b'Subtract three.', None]
+    assert len(lesson.formatted) == 2
@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.load_bench import Latency, StubCrew
+
+
+@pytest.mark.parametrize('spec', ['fixed', 'fixed:1:2', 'uniform:1', 'gamma:1:2', 'fixed:x'])
+def test_bad_latency_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        Latency(spec)
+
+
+def test_latencies_are_deterministic_per_seed():
+    assert Latency('fixed:0.5').sample() == 0.5
+    first, again = Latency('lognormal:1:0.5', seed=3), Latency('lognormal:1:0.5', seed=3)
+    assert [first.sample() for _ in range(5)] == [again.sample() for _ in range(5)]
+    assert Latency('uniform:0.2:0.8', seed=1).sample() != Latency('uniform:0.2:0.8', seed=2).sample()
+    assert all(0.2 <= Latency('uniform:0.2:0.8', seed=s).sample() <= 0.8 for s in range(20))
+
+
+def test_stub_lessons_are_deterministic_per_prompt():
+    crew = StubCrew(4, Latency('fixed:0'), Latency('fixed:0'))
+    lesson = crew.lesson('solve 2x + 3 = 7')
+    assert len(lesson.steps) == 4
+    assert lesson == crew.lesson('solve 2x + 3 = 7')
+    assert lesson != crew.lesson('solve 3x + 1 = 4')
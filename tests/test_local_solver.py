@@ -0,0 +1,87 @@
+import pytest
+
+from src.services.local_solver import LocalSolver
+
+
+@pytest.fixture(scope='module')
+def solver():
+    return LocalSolver()
+
+
+def final_math(solution):
+    return solution.explanation.steps[-1].math
+
+
+@pytest.mark.parametrize('prompt, answer', [
+    ('solve 3x = 12', 'x = 4'),
+    ('2x=10', 'x = 5'),
+    ('solve 5x = 20', 'x = 4'),
+    ('-x = 4', 'x = -4'),
+    ('x/4 = 3', 'x = 12'),
+])
+def test_one_step_linear(solver, prompt, answer):
+    solution = solver.solve(prompt)
+    assert solution is not None and solution.problem_class == 'linear'
+    assert answer in final_math(solution)
+    assert any('divide' in step.natural or 'multiply' in step.natural for step in solution.explanation.steps)
+
+
+def test_linear_already_solved_goes_to_crew(solver):
+    assert solver.solve('x = 5') is None
+
+
+def test_two_step_linear(solver):
+    solution = solver.solve('Solve 2x + 3 = 7')
+    assert solution.problem_class == 'linear'
+    assert 'x = 2' in final_math(solution)
+
+
+@pytest.mark.parametrize('prompt, answer', [
+    ('x^2 - 5x + 6 = 0', 'x = 2'),
+    ('x^2 = 9', 'x = 3'),
+    ('3x^2=12', 'x = 2'),
+    ('x^2 + 1 = 10', 'x = 3'),
+    ('2x^2 + 3x - 2 = 0', 'x = -2'),
+    ('x^2 - 4x = 0', 'x = 0'),
+])
+def test_quadratic(solver, prompt, answer):
+    solution = solver.solve(prompt)
+    assert solution is not None and solution.problem_class == 'quadratic'
+    assert answer in final_math(solution)
+
+
+def test_square_root_narration_only_mentions_moves_made(solver):
+    steps = [step.natural for step in solver.solve('3x^2=12').explanation.steps]
+    assert not any('move the constant' in step for step in steps)
+    assert any('divide both sides by three' in step for step in steps)
+    steps = [step.natural for step in solver.solve('x^2 + 1 = 10').explanation.steps]
+    assert any('move the constant' in step for step in steps)
+
+
+def test_quadratic_without_real_roots(solver):
+    assert 'No real solutions' in final_math(solver.solve('x^2 = -4'))
+
+
+@pytest.mark.parametrize('prompt, answer', [
+    ('what is 3 + 4 * 2', '11'),
+    ('what is -2^2', '-4'),
+    ('-(2 + 3)', '-5'),
+    ('3 * -5', '-15'),
+])
+def test_arithmetic(solver, prompt, answer):
+    solution = solver.solve(prompt)
+    assert solution is not None and solution.problem_class == 'arithmetic'
+    assert final_math(solution).endswith(f'= \\boxed{{{answer}}}')
+
+
+def test_earlier_highlights_are_cleared(solver):
+    steps = solver.solve('Solve 2x + 3 = 7').explanation.steps
+    # Each step highlights only what changed in it
+    for previous, step in zip(steps, steps[1:]):
+        for line in previous.math.split('\\\\'):
+            if '\\color{blue}' in line:
+                assert line not in step.math
+
+
+def test_word_problems_fall_back(solver):
+    assert solver.solve('If a train travels 60 miles per hour for 3 hours, how far does it go?') is None
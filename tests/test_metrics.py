@@ -0,0 +1,60 @@
+import pytest
+
+from src.services.metrics import MetricsRegistry, RequestTimer, STAGE_SECONDS
+
+
+def test_counters_and_gauges_render_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests.', labels=('outcome',))
+    in_flight = registry.gauge('in_flight', 'In flight.')
+    requests.inc(outcome='ok')
+    requests.inc(2, outcome='ok')
+    requests.inc(outcome='say "hi"')
+    in_flight.inc()
+    in_flight.dec()
+    in_flight.inc(3)
+    assert registry.render().splitlines() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{outcome="ok"} 3',
+        'requests_total{outcome="say \\"hi\\""} 1',
+        '# HELP in_flight In flight.',
+        '# TYPE in_flight gauge',
+        'in_flight 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 2.0):
+        latency.observe(value)
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 3.05',
+        'latency_seconds_count 4',
+    ]
+    assert latency.count() == 4
+    assert latency.mean() == pytest.approx(0.7625)
+
+
+def test_labels_must_match_and_names_are_unique():
+    registry = MetricsRegistry()
+    counter = registry.counter('errors_total', 'Errors.', labels=('stage',))
+    with pytest.raises(ValueError):
+        counter.inc(kind='tts')
+    with pytest.raises(ValueError):
+        registry.counter('errors_total', 'Errors again.')
+
+
+def test_request_timer_sums_spans_and_feeds_the_stage_histogram():
+    before = STAGE_SECONDS.count(stage='test_stage')
+    timer = RequestTimer()
+    with timer.span('test_stage'):
+        pass
+    timer.record('test_stage', timer.origin, timer.origin + 0.5)
+    assert [span.stage for span in timer.spans] == ['test_stage', 'test_stage']
+    assert timer.summary()['test_stage'] == pytest.approx(0.5, abs=0.01)
+    assert STAGE_SECONDS.count(stage='test_stage') == before + 2
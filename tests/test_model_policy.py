@@ -0,0 +1,60 @@
+import pytest
+
+from src.services.model_policy import ModelPolicy
+
+
+def make_policy(**overrides):
+    config = {
+        'enabled': True,
+        'tiers': {
+            'large': {'model': 'big-model', 'fallback': 'small', 'max_in_flight': 1, 'slow_after_seconds': 5.0},
+            'small': {'model': 'small-model', 'fallback': None, 'max_in_flight': None, 'slow_after_seconds': None},
+        },
+        'default_tier': 'large',
+        'task_tiers': {'explain_directly': 'small'},
+        'query_tiers': {},
+        'latency_smoothing': 0.5,
+        'cooldown_seconds': 60,
+    }
+    config.update(overrides)
+    return ModelPolicy(config)
+
+
+def test_query_tier_wins_over_task_tier_over_default():
+    policy = make_policy(query_tiers={'simple': 'large'})
+    assert policy.select('generate_explanation').model == 'big-model'
+    assert policy.select('explain_directly').model == 'small-model'
+    choice = policy.select('explain_directly', 'simple')
+    assert (choice.tier, choice.reason) == ('large', 'simple query')
+
+
+def test_saturated_tier_falls_back_until_its_call_ends():
+    policy = make_policy()
+    first = policy.select('generate_explanation')
+    with policy.track(first):
+        choice = policy.select('generate_explanation')
+        assert (choice.tier, choice.reason) == ('small', 'large tier saturated')
+    assert policy.select('generate_explanation').tier == 'large'
+
+
+def test_failed_call_bypasses_the_tier_but_cancellation_does_not():
+    policy = make_policy()
+    with pytest.raises(KeyboardInterrupt):
+        with policy.track(policy.select('generate_explanation')):
+            raise KeyboardInterrupt
+    assert policy.select('generate_explanation').tier == 'large'
+
+    with pytest.raises(RuntimeError):
+        with policy.track(policy.select('generate_explanation')):
+            raise RuntimeError('model error')
+    choice = policy.select('generate_explanation')
+    assert (choice.tier, choice.reason) == ('small', 'large tier unhealthy')
+
+
+def test_slow_tier_is_bypassed():
+    policy = make_policy()
+    choice = policy.select('generate_explanation')
+    policy._observe(choice, 4.0)
+    assert policy.select('generate_explanation').tier == 'large'
+    policy._observe(choice, 8.0)
+    assert policy.select('generate_explanation').tier == 'small'
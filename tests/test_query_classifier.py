@@ -0,0 +1,38 @@
+import pytest
+
+from src.config.settings import QUERY_ROUTING_CONFIG
+from src.utils.query_classifier import COMPLEX, SIMPLE, QueryClassifier, classify_query, extract_expression
+
+
+@pytest.mark.parametrize('prompt', [
+    '2+2',
+    'what is 7 times 8',
+    'What is 12 divided by 4?',
+    'solve for x: 2x + 3 = 7',
+])
+def test_short_expressions_are_simple(prompt):
+    route = classify_query(prompt)
+    assert route.complexity == SIMPLE
+    assert route.is_simple
+
+
+@pytest.mark.parametrize('prompt, reason', [
+    ('prove that the square root of 2 is irrational', "keyword 'prove'"),
+    ('find the derivative of x^2', "keyword 'derivative'"),
+    ('x + y = 3', '2 variables'),
+    ('x = 1 = 2', 'several equations'),
+    ('what is x', 'no numbers'),
+])
+def test_complex_prompts_say_why(prompt, reason):
+    route = classify_query(prompt)
+    assert route.complexity == COMPLEX
+    assert route.reason == reason
+
+
+def test_operator_words_are_spelled_as_symbols():
+    assert extract_expression('what is 7 times 8') == '7*8'
+
+
+def test_disabled_routing_keeps_everything_on_the_two_stage_pipeline():
+    classifier = QueryClassifier({**QUERY_ROUTING_CONFIG, 'enabled': False})
+    assert classifier.classify('2+2').complexity == COMPLEX
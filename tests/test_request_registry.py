@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services.async_runtime import AsyncRuntime
+from src.services.request_registry import RequestRegistry
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(max_concurrent=1, executor_workers=2, name='test-runtime')
+    runtime.start()
+    yield runtime
+    runtime.shutdown()
+
+
+def occupy(runtime):
+    """Hold the runtime's only slot until the returned event is set."""
+    release = threading.Event()
+
+    async def hold():
+        await runtime.loop.run_in_executor(None, release.wait)
+    return release, runtime.submit(hold())
+
+
+def test_superseding_cancels_a_request_waiting_for_a_slot(runtime):
+    registry = RequestRegistry()
+    release, holder = occupy(runtime)
+    started = []
+
+    async def handle(active):
+        started.append(active.request_id)
+
+    first = registry.start('sid', 'first', 'solve x+1=2')
+    first.attach(runtime.submit(handle(first)))
+    second = registry.start('sid', 'second', 'solve x+2=3')
+    second.attach(runtime.submit(handle(second)))
+    release.set()
+    holder.result(5)
+    second.future.result(5)
+
+    assert first.future.cancelled()
+    assert started == ['second']
+
+
+def test_request_cancelled_before_it_is_attached(runtime):
+    registry = RequestRegistry()
+    active = registry.start('sid', 'gone', 'solve x+1=2')
+    assert registry.cancel_session('sid') is active
+
+    async def handle():
+        await asyncio.sleep(60)
+    active.attach(runtime.submit(handle()))
+
+    with pytest.raises(BaseException):
+        active.future.result(5)
+    assert active.future.cancelled()
+    assert len(registry) == 0
+
+
+def test_cancel_reaches_a_running_request(runtime):
+    registry = RequestRegistry()
+    running = threading.Event()
+
+    async def handle():
+        running.set()
+        await asyncio.sleep(60)
+
+    active = registry.start('sid', 'slow', 'prove it')
+    active.attach(runtime.submit(handle()))
+    assert running.wait(5)
+    registry.cancel_session('sid')
+
+    with pytest.raises(BaseException):
+        active.future.result(5)
+    assert active.future.cancelled()
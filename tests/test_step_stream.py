@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.utils.step_stream import StepStreamParser
+
+LESSON = {
+    'problem': 'Solve "x + 1 = 2" for {x}',
+    'steps': [
+        {'natural': 'Subtract one, the "easy" way.', 'math': r'\begin{align*} x + 1 - 1 &= 2 - 1 \end{align*}'},
+        {'natural': 'So x is one.', 'math': r'\frac{x}{1} = 1 \quad \text{\{done\}}'}
+    ]
+}
+DOCUMENT = json.dumps(LESSON)
+
+
+def feed_in(parser, text, size):
+    steps = []
+    for start in range(0, len(text), size):
+        steps.extend(parser.feed(text[start:start + size]))
+    return steps
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, len(DOCUMENT)])
+def test_steps_survive_any_chunking(size):
+    parser = StepStreamParser()
+    steps = feed_in(parser, DOCUMENT, size)
+    assert [step.model_dump() for step in steps] == LESSON['steps']
+    assert parser.problem == LESSON['problem']
+    assert parser.steps_complete
+
+
+def test_escaped_quotes_and_braces_inside_strings_are_not_structure():
+    parser = StepStreamParser()
+    document = '{"problem": "p", "steps": [{"natural": "a \\"}\\" b", "math": "{{]"}'
+    step, = parser.feed(document)
+    assert step.natural == 'a "}" b'
+    assert step.math == '{{]'
+    assert not parser.steps_complete
+    assert parser.feed(']}') == []
+    assert parser.steps_complete
+
+
+def test_escape_split_across_chunks():
+    parser = StepStreamParser()
+    steps = parser.feed('{"steps": [{"natural": "say \\')
+    steps += parser.feed('"hi\\"", "math": "x"}]}')
+    assert [step.natural for step in steps] == ['say "hi"']
+
+
+def test_fenced_json():
+    parser = StepStreamParser()
+    steps = feed_in(parser, f'```json\n{DOCUMENT}\n```', 5)
+    assert len(steps) == 2
+    assert parser.result().problem == LESSON['problem']
+
+
+def test_steps_complete_only_once_the_array_is_closed():
+    parser = StepStreamParser()
+    document = json.dumps({'steps': LESSON['steps'], 'problem': 'p'})
+    closed_at = document.index(']') + 1
+    parser.feed(document[:closed_at - 1])
+    assert len(parser.steps) == 2
+    assert not parser.steps_complete
+    parser.feed(document[closed_at - 1:])
+    assert parser.steps_complete